@@ -0,0 +1,388 @@
+"""
+Набор бенчмарков игры: время кадра уровня, задержки работы с историей, построение экрана статистики,
+конкуренция нескольких процессов за один файл истории и воспроизведение уровней.
+
+Запуск из корня репозитория:
+
+    python benchmarks/bench.py --output bench_results.json
+    python benchmarks/bench.py --compare bench_results.json
+
+Окно не открывается: используется видеодрайвер SDL "dummy".
+"""
+import argparse
+import datetime
+import json
+import multiprocessing
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# Пути к ресурсам в FileConsts заданы относительно каталога src
+os.chdir(os.path.join(ROOT, "src"))
+
+import pygame  # noqa: E402
+from src import analytics, consts, engine, game, records, replay, scenes, statistic, storage  # noqa: E402
+
+GRID_SIZES = (*range(2, 11), 25, 50, 64)
+HISTORY_SIZES = (1_000, 10_000, 100_000)
+WRITER_COUNTS = (1, 2, 4, 8)
+# Количество размеров поля в истории для замера страницы аналитики
+ANALYTICS_GRID_COUNT = 40
+BACKENDS = {
+    "json": "history.json",
+    "journal": "history.jsonl",
+    "sqlite": "history.db",
+}
+
+
+def make_history(count: int, seed: int = 0, grid_count: int = 1) -> list[records.HistoryRecord]:
+    """
+    Создает синтетическую историю из count уровней, сыгранных скриптовым игроком.
+
+    :param count: Количество записей.
+    :param seed: Начальное значение генератора случайных чисел.
+    :param grid_count: На сколько размеров поля делятся уровни. Если больше 1, размеры поля
+        выбираются из всего диапазона ползунков, включая прямоугольные поля.
+    :return: Список записей в формате StatsManager.
+    """
+    rng = random.Random(seed)
+    history = []
+    levels_per_grid = -(-count // grid_count)
+    while len(history) < count:
+        if grid_count > 1:
+            size_x = rng.randrange(consts.GridConsts.MIN_SIZE, consts.GridConsts.MAX_SIZE + 1)
+            size_y = rng.randrange(consts.GridConsts.MIN_SIZE, consts.GridConsts.MAX_SIZE + 1)
+        else:
+            size_x = size_y = rng.randrange(2, 11)
+        game_engine = engine.GameEngine(size_x, size_y, rng=rng)
+        levels = min(levels_per_grid, count - len(history))
+        for record in engine.simulate(game_engine, engine.forgetful_player(0.1), levels):
+            history.append(
+                records.HistoryRecord.create(
+                    datetime="2025-01-01 00:00:00",
+                    size_x=record["size_x"],
+                    size_y=record["size_y"],
+                    num_circles=record["num_circles"],
+                    circles=record["circles"],
+                    selected=record["selected_positions"],
+                    score=record["wins"],
+                    streak=record["streak"],
+                    result=record["level_result"],
+                    seed=record["seed"],
+                    clicks=record["clicks"],
+                )
+            )
+    return history
+
+
+def timed(function, repeat: int) -> dict:
+    """
+    Замеряет время выполнения функции.
+
+    :param function: Замеряемая функция без аргументов.
+    :param repeat: Количество повторов.
+    :return: Медиана, минимум и максимум в миллисекундах.
+    """
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {
+        "median_ms": statistics.median(samples),
+        "min_ms": min(samples),
+        "max_ms": max(samples),
+        "repeat": repeat,
+    }
+
+
+def bench_level_frames(game_window: game.Game, frames: int) -> dict:
+    """
+    Время кадра уровня для каждого размера поля: первый кадр (полная перерисовка)
+    и кадры с нажатием на клетку.
+
+    :param game_window: Объект игры.
+    :param frames: Количество замеряемых кадров на каждый размер поля.
+    :return: Результаты по размерам поля.
+    """
+    results = {}
+    for size in GRID_SIZES:
+        game_window.start_game(size, size, num_circles=2, wins=0, errors=0, streak=0)
+        full_frame = timed(lambda: game_window.step([], 0.016), 1)
+        scene = game_window.scene
+        # Показ кружков пропускается, чтобы не ждать таймер
+        scene._start_input()
+        game_window.step([], 0.016)
+
+        # Повторные нажатия на один из двух кружков: уровень не завершается
+        pos = scene.renderer.cell_center(*scene.level.circles[0])
+        click = [pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=pos, button=1)]
+        click_frame = timed(lambda: game_window.step(click, 0.016), frames)
+        idle_frame = timed(lambda: game_window.step([], 0.016), frames)
+        results[f"{size}x{size}"] = {
+            "full_frame": full_frame,
+            "click_frame": click_frame,
+            "idle_frame": idle_frame,
+        }
+    game_window.welcome_screen()
+    game_window.step([], 0.016)
+    return results
+
+
+def bench_history(directory: str, sizes: tuple[int, ...]) -> dict:
+    """
+    Задержки StatsManager.record, load_history, get_record и чтения последней (самой старой)
+    страницы истории для каждого хранилища и размера истории.
+
+    :param directory: Временный каталог для файлов истории.
+    :param sizes: Размеры синтетической истории.
+    :return: Результаты по хранилищам и размерам истории.
+    """
+    results = {}
+    for size in sizes:
+        history = make_history(size)
+        for backend, filename in BACKENDS.items():
+            path = os.path.join(directory, f"{size}_{filename}")
+            stats = statistic.StatsManager(path)
+            stats.storage.rewrite(history)
+            stats = statistic.StatsManager(path)
+            repeat_record = 3 if backend == "json" else 50
+            results.setdefault(backend, {})[str(size)] = {
+                "load_history": timed(stats.load_history, 3),
+                "get_record": timed(stats.get_record, 100),
+                "last_page": timed(lambda: stats.get_page(size // 10 - 1, 10), 3),
+                "record": timed(
+                    lambda: stats.record(3, 3, 2, [(0, 0), (1, 1)], [(0, 0), (1, 1)], 1, 1, "win"),
+                    repeat_record,
+                ),
+                "startup": timed(lambda: statistic.StatsManager(path).get_record(), 3),
+            }
+            stats.storage.close()
+    return results
+
+
+def contention_writer(path: str, count: int) -> dict:
+    """
+    Процесс-писатель для bench_contention: записывает count уровней через собственный StatsManager.
+
+    :param path: Путь к общему файлу истории.
+    :param count: Количество записей.
+    :return: Задержки записи в миллисекундах и показатели блокировки файла истории.
+    """
+    stats = statistic.StatsManager(path)
+    samples = []
+    for i in range(count):
+        start = time.perf_counter()
+        stats.record(3, 3, 2, [(0, 0), (1, 1)], [(0, 0), (1, 1)], i, i, "win")
+        samples.append((time.perf_counter() - start) * 1000)
+    stats.close()
+    return {"samples": samples, "lock": stats.storage.lock.metrics()}
+
+
+def bench_contention(directory: str, writer_counts: tuple[int, ...], count: int = 100) -> dict:
+    """
+    Цена конкуренции нескольких процессов игры за один файл истории: задержка StatsManager.record,
+    время ожидания межпроцессной блокировки и количество потерянных записей.
+
+    :param directory: Временный каталог для файлов истории.
+    :param writer_counts: Количества одновременно пишущих процессов.
+    :param count: Количество записей от каждого процесса.
+    :return: Результаты по хранилищам и количеству процессов.
+    """
+    results = {}
+    for backend, filename in BACKENDS.items():
+        for writers in writer_counts:
+            path = os.path.join(directory, f"contention_{writers}_{filename}")
+            start = time.perf_counter()
+            # spawn, а не fork: у процесса бенчмарка есть фоновые потоки игры, чьи блокировки fork унаследовал бы
+            with multiprocessing.get_context("spawn").Pool(writers) as pool:
+                outputs = pool.starmap(contention_writer, [(path, count)] * writers)
+            elapsed = time.perf_counter() - start
+            samples = sorted(sample for output in outputs for sample in output["samples"])
+            history_storage = statistic.StatsManager(path).storage
+            stored = len(history_storage.load())
+            history_storage.close()
+            results.setdefault(backend, {})[str(writers)] = {
+                "record": {
+                    "median_ms": statistics.median(samples),
+                    "p95_ms": samples[int(len(samples) * 0.95) - 1],
+                    "max_ms": samples[-1],
+                },
+                "records_per_second": writers * count / elapsed,
+                "lock_contended": sum(output["lock"]["contended"] for output in outputs),
+                "lock_wait_total_ms": sum(output["lock"]["wait_total_ms"] for output in outputs),
+                "lock_wait_max_ms": max(output["lock"]["wait_max_ms"] for output in outputs),
+                "lost_records": writers * count - stored,
+            }
+    return results
+
+
+def bench_statistics_screen(game_window: game.Game, directory: str, sizes: tuple[int, ...]) -> dict:
+    """
+    Время и пиковая память построения меню статистики, время построения аналитики и заполнения
+    ее страницы на истории с ANALYTICS_GRID_COUNT размерами поля.
+
+    :param game_window: Объект игры.
+    :param directory: Временный каталог для файлов истории.
+    :param sizes: Размеры синтетической истории.
+    :return: Результаты по размерам истории.
+    """
+    results = {}
+    for size in sizes:
+        path = os.path.join(directory, f"menu_{size}.jsonl")
+        storage.JournalHistoryStorage(path).rewrite(make_history(size))
+        game_window.stats = statistic.StatsManager(path)
+        game_window.stats.recent  # Последние игры загружаются до замера: измеряется только построение меню
+        scene = scenes.StatisticsScene(game_window)
+        build = timed(scene.build_menu, 3)
+        # Память замеряется отдельным прогоном: tracemalloc заметно замедляет построение
+        tracemalloc.start()
+        scene.build_menu()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        # Аналитика строится при первом открытии ее страницы; замеряется ее построение с нуля
+        path = os.path.join(directory, f"analytics_{size}.jsonl")
+        storage.JournalHistoryStorage(path).rewrite(make_history(size, grid_count=ANALYTICS_GRID_COUNT))
+        game_window.stats = statistic.StatsManager(path)
+        analytics_build = timed(
+            lambda: analytics.HistoryAnalytics.from_records(game_window.stats.iter_history()), 1
+        )
+        # Страница аналитики: заполнение при первом переходе, аналитика уже построена
+        grid_sizes = len(game_window.stats.analytics.grids)
+        theme = scene._create_theme()
+        page = timed(lambda: scene.fill_analytics_menu(scene.create_analytics_menu(theme)), 3)
+        # Следующий запуск восстанавливает аналитику из файла вместо прохода по истории
+        game_window.stats.close()
+
+        managers = [statistic.StatsManager(path) for _ in range(3)]
+
+        def restore() -> None:
+            assert managers.pop().restore_analytics()
+
+        results[str(size)] = {
+            "build": build,
+            "peak_memory_bytes": peak,
+            "analytics": analytics_build,
+            "analytics_page": page,
+            "analytics_restore": timed(restore, 3),
+            "analytics_grid_sizes": grid_sizes,
+        }
+    return results
+
+
+def bench_replay(directory: str, sizes: tuple[int, ...]) -> dict:
+    """
+    Скорость воспроизведения уровней без окна: только правила игры и с записью воспроизведенных
+    уровней в журнал через отложенную запись (как в игре) - генератор нагрузки на хранилище.
+
+    :param directory: Временный каталог для файлов истории.
+    :param sizes: Размеры воспроизводимого сеанса.
+    :return: Результаты по размерам сеанса.
+    """
+    results = {}
+    for size in sizes:
+        session = make_history(size)
+
+        def replay_to_journal() -> dict:
+            path = os.path.join(directory, f"replay_{size}_{time.perf_counter_ns()}.jsonl")
+            stats = statistic.StatsManager(path, storage.WriteBehindStorage(storage.JournalHistoryStorage(path)))
+            try:
+                return replay.replay_headless(session, stats)
+            finally:
+                stats.close()
+
+        results[str(size)] = {
+            "headless": timed(lambda: replay.replay_headless(session), 3),
+            "to_journal": timed(replay_to_journal, 1),
+            "mismatches": replay.replay_headless(session)["mismatches"],
+        }
+    return results
+
+
+def compare(current: dict, baseline: dict, threshold: float, path: str = "") -> list[str]:
+    """
+    Сравнивает результаты с эталонными и возвращает замеры, ухудшившиеся больше чем в threshold раз.
+
+    :param current: Текущие результаты.
+    :param baseline: Эталонные результаты.
+    :param threshold: Допустимое отношение текущего значения к эталонному.
+    :param path: Путь к текущему узлу результатов (для сообщений).
+    :return: Список описаний регрессий.
+    """
+    regressions = []
+    for key, value in current.items():
+        if key not in baseline:
+            continue
+        name = f"{path}.{key}" if path else key
+        if isinstance(value, dict):
+            regressions += compare(value, baseline[key], threshold, name)
+        elif key in ("median_ms", "peak_memory_bytes") and baseline[key] > 0:
+            ratio = value / baseline[key]
+            if ratio > threshold:
+                regressions.append(f"{name}: {baseline[key]:.3f} -> {value:.3f} (x{ratio:.2f})")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Бенчмарки игры.")
+    parser.add_argument("--output", default=os.path.join(ROOT, "bench_results.json"))
+    parser.add_argument("--compare", help="Файл с эталонными результатами для поиска регрессий.")
+    parser.add_argument("--threshold", type=float, default=1.25)
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument(
+        "--history-sizes", type=int, nargs="+", default=list(HISTORY_SIZES)
+    )
+    parser.add_argument("--writers", type=int, nargs="+", default=list(WRITER_COUNTS))
+    args = parser.parse_args()
+    sizes = tuple(args.history_sizes)
+
+    with tempfile.TemporaryDirectory() as directory:
+        # Игра не должна трогать настоящую историю игрока
+        consts.FileConsts.HISTORY_FILE = os.path.join(directory, "history.json")
+        consts.FileConsts.HISTORY_JOURNAL_FILE = os.path.join(directory, "history.jsonl")
+        consts.FileConsts.HISTORY_DB_FILE = os.path.join(directory, "history.db")
+        game_window = game.Game()
+
+        results = {
+            "meta": {
+                "datetime": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "python": platform.python_version(),
+                "pygame": pygame.version.ver,
+                "platform": platform.platform(),
+            },
+            "level_frames": bench_level_frames(game_window, args.frames),
+            "history": bench_history(directory, sizes),
+            "statistics_screen": bench_statistics_screen(game_window, directory, sizes),
+            "contention": bench_contention(directory, tuple(args.writers)),
+            "replay": bench_replay(directory, sizes),
+        }
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=4)
+    print(f"Результаты сохранены в {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(
+            {key: value for key, value in results.items() if key != "meta"}, baseline, args.threshold
+        )
+        for regression in regressions:
+            print(f"Регрессия: {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,247 @@
+from typing import Iterable
+
+import numpy as np
+
+from src import records
+
+# Сколько клеток (уровней, умноженных на размер поля) обрабатывается одной векторной операцией:
+# ограничивает память промежуточных массивов и на экспертных полях
+CHUNK_CELLS = 1 << 20
+# Сколько записей накапливается для подсчета серий по дням одной операцией
+CHUNK_RECORDS = 1 << 16
+
+
+# --- Аналитика по одному размеру поля ---
+class GridAnalytics:
+    """
+    Тепловые карты одного размера поля: сколько раз в клетке появлялся кружок,
+    сколько раз игрок нашел его и сколько раз ошибочно выбрал пустую клетку.
+    """
+
+    def __init__(self, size_x: int, size_y: int) -> None:
+        """
+        Инициализирует пустые карты.
+
+        :param size_x: Ширина поля.
+        :param size_y: Высота поля.
+        """
+        self.size_x = size_x
+        self.size_y = size_y
+        self.games = 0
+        self.circles = np.zeros((size_y, size_x), dtype=np.int64)  # Появления кружков
+        self.hits = np.zeros((size_y, size_x), dtype=np.int64)  # Найденные кружки
+        self.wrong_clicks = np.zeros((size_y, size_x), dtype=np.int64)  # Ошибочно выбранные клетки
+
+    @property
+    def hit_rate(self) -> np.ndarray:
+        """
+        Доля найденных кружков по клеткам.
+
+        :return: Массив (size_y, size_x) со значениями от 0 до 1; 0 там, где кружков не было.
+        """
+        return np.divide(
+            self.hits, self.circles, out=np.zeros(self.circles.shape), where=self.circles > 0
+        )
+
+    def add_batch(self, circle_masks: list[int], selected_cells: list[bytes]) -> None:
+        """
+        Учитывает пачку уровней одной векторной операцией.
+
+        :param circle_masks: Битовые маски кружков (см. records.encode_mask).
+        :param selected_cells: Упакованные выбранные клетки (см. records.pack_cells).
+        """
+        count = len(circle_masks)
+        if not count:
+            return
+        cells = self.size_x * self.size_y
+        mask_bytes = (cells + 7) // 8
+        packed = np.frombuffer(
+            b"".join(mask.to_bytes(mask_bytes, "little") for mask in circle_masks), dtype=np.uint8
+        ).reshape(count, mask_bytes)
+        # Строка i - клетки с кружками на i-м уровне пачки
+        is_circle = np.unpackbits(packed, axis=1, bitorder="little")[:, :cells].astype(bool)
+
+        width = records.cell_width(self.size_x, self.size_y)
+        lengths = np.fromiter((len(data) // width for data in selected_cells), dtype=np.int64, count=count)
+        selected = np.frombuffer(b"".join(selected_cells), dtype=np.uint8 if width == 1 else ">u2").astype(np.intp)
+        levels = np.repeat(np.arange(count), lengths)
+        is_hit = is_circle[levels, selected]
+
+        shape = (self.size_y, self.size_x)
+        self.games += count
+        self.circles += is_circle.sum(axis=0).reshape(shape)
+        self.hits += np.bincount(selected[is_hit], minlength=cells).reshape(shape)
+        self.wrong_clicks += np.bincount(selected[~is_hit], minlength=cells).reshape(shape)
+
+    def to_dict(self) -> dict:
+        """
+        Преобразует карты в словарь для сохранения в JSON.
+
+        :return: Словарь с количеством уровней и картами построчно.
+        """
+        return {
+            "games": self.games,
+            "circles": self.circles.ravel().tolist(),
+            "hits": self.hits.ravel().tolist(),
+            "wrong_clicks": self.wrong_clicks.ravel().tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, grid_size: str, data: dict) -> "GridAnalytics":
+        """
+        Восстанавливает карты из словаря, сохраненного методом to_dict.
+
+        :param grid_size: Размер поля вида "3x3".
+        :param data: Словарь с картами.
+        :return: Объект GridAnalytics.
+        """
+        grid = cls(*records.parse_grid_size(grid_size))
+        shape = (grid.size_y, grid.size_x)
+        grid.games = data["games"]
+        grid.circles = np.array(data["circles"], dtype=np.int64).reshape(shape)
+        grid.hits = np.array(data["hits"], dtype=np.int64).reshape(shape)
+        grid.wrong_clicks = np.array(data["wrong_clicks"], dtype=np.int64).reshape(shape)
+        return grid
+
+
+# --- Аналитика по всей истории ---
+class HistoryAnalytics:
+    """
+    Аналитика истории игры: тепловые карты по каждому размеру поля и распределение
+    серий побед по дням. Строится одним векторным проходом по истории и затем
+    обновляется по одной записи.
+    """
+
+    def __init__(self) -> None:
+        """
+        Инициализирует пустую аналитику.
+        """
+        self.grids = {}  # Размер поля вида "3x3" -> GridAnalytics
+        self.streaks = {}  # День "ГГГГ-ММ-ДД" -> количество уровней с каждой длиной серии
+
+    @classmethod
+    def from_records(cls, history: Iterable[records.HistoryRecord]) -> "HistoryAnalytics":
+        """
+        Строит аналитику по истории. Записи читаются потоком и обрабатываются пачками
+        примерно по CHUNK_CELLS клеток для каждого размера поля и по CHUNK_RECORDS записей
+        для серий, поэтому память не зависит от длины истории.
+
+        :param history: Записи истории игры (список или итератор).
+        :return: Заполненный объект HistoryAnalytics.
+        """
+        analytics = cls()
+        pending = {}  # Размер поля -> (маски кружков, выбранные клетки)
+        days, streaks = [], []
+        for record in history:
+            masks, selected = pending.setdefault(record.grid_size, ([], []))
+            masks.append(record.circles_mask)
+            selected.append(record.selected_cells)
+            grid = analytics._grid(record.grid_size)
+            if len(masks) * grid.size_x * grid.size_y >= CHUNK_CELLS:
+                grid.add_batch(masks, selected)
+                masks.clear()
+                selected.clear()
+            days.append(record.datetime[:10])
+            streaks.append(record.streak)
+            if len(days) >= CHUNK_RECORDS:
+                analytics._add_streaks(days, streaks)
+                days.clear()
+                streaks.clear()
+        for grid_size, (masks, selected) in pending.items():
+            analytics._grid(grid_size).add_batch(masks, selected)
+        analytics._add_streaks(days, streaks)
+        return analytics
+
+    def to_dict(self) -> dict:
+        """
+        Преобразует аналитику в словарь для сохранения в JSON.
+
+        :return: Словарь с картами по размерам поля и сериями по дням.
+        """
+        return {
+            "grids": {grid_size: grid.to_dict() for grid_size, grid in self.grids.items()},
+            "streaks": {day: counts.tolist() for day, counts in self.streaks.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "HistoryAnalytics":
+        """
+        Восстанавливает аналитику из словаря, сохраненного методом to_dict.
+
+        :param data: Словарь с аналитикой.
+        :return: Объект HistoryAnalytics.
+        """
+        analytics = cls()
+        analytics.grids = {
+            grid_size: GridAnalytics.from_dict(grid_size, grid) for grid_size, grid in data["grids"].items()
+        }
+        analytics.streaks = {day: np.array(counts, dtype=np.int64) for day, counts in data["streaks"].items()}
+        return analytics
+
+    def update(self, record: records.HistoryRecord) -> None:
+        """
+        Учитывает одну новую запись истории.
+
+        :param record: Запись истории игры.
+        """
+        self._grid(record.grid_size).add_batch([record.circles_mask], [record.selected_cells])
+        day = record.datetime[:10]
+        counts = self.streaks.get(day, np.zeros(1, dtype=np.int64))
+        if record.streak >= len(counts):
+            counts = np.pad(counts, (0, record.streak + 1 - len(counts)))
+        counts[record.streak] += 1
+        self.streaks[day] = counts
+
+    def streak_summary(self, days: int = 7) -> list[dict]:
+        """
+        Распределение серий побед за последние дни.
+
+        :param days: Количество последних дней с играми.
+        :return: Список словарей {"day", "games", "mean", "p90", "max"} от новых дней к старым.
+        """
+        summary = []
+        for day in sorted(self.streaks, reverse=True)[:days]:
+            counts = self.streaks[day]
+            games = int(counts.sum())
+            cumulative = np.cumsum(counts)
+            summary.append(
+                {
+                    "day": day,
+                    "games": games,
+                    "mean": float(np.dot(np.arange(len(counts)), counts) / games),
+                    "p90": int(np.searchsorted(cumulative, 0.9 * games)),
+                    "max": int(np.flatnonzero(counts)[-1]),
+                }
+            )
+        return summary
+
+    def _add_streaks(self, days: list[str], streaks: list[int]) -> None:
+        """
+        Учитывает серии пачки уровней: гистограмма (день, длина серии) строится одним вызовом bincount.
+
+        :param days: Дни уровней вида "ГГГГ-ММ-ДД".
+        :param streaks: Серии побед тех же уровней.
+        """
+        if not days:
+            return
+        unique_days, day_index = np.unique(np.array(days), return_inverse=True)
+        streak_values = np.array(streaks, dtype=np.int64)
+        length = int(streak_values.max()) + 1
+        counts = np.bincount(day_index * length + streak_values, minlength=len(unique_days) * length)
+        for day, row in zip(unique_days, counts.reshape(len(unique_days), length)):
+            previous = self.streaks.get(str(day))
+            if previous is not None:
+                size = max(len(previous), len(row))
+                row = np.pad(previous, (0, size - len(previous))) + np.pad(row, (0, size - len(row)))
+            self.streaks[str(day)] = row
+
+    def _grid(self, grid_size: str) -> GridAnalytics:
+        """
+        Возвращает карты размера поля, создавая их при первом обращении.
+
+        :param grid_size: Размер поля вида "3x3".
+        :return: Карты размера поля.
+        """
+        if grid_size not in self.grids:
+            self.grids[grid_size] = GridAnalytics(*records.parse_grid_size(grid_size))
+        return self.grids[grid_size]
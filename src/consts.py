@@ -5,6 +5,16 @@ class GUIConsts:
     # Размеры окна игры
     WIDTH, HEIGHT = 800, 600
 
+    # Полоса над игровым полем с подписями счета и кнопкой выхода: поле рисуется под ней,
+    # и элементы интерфейса не закрывают клетки
+    HUD_HEIGHT = 50
+    # Область игрового поля (x, y, ширина, высота)
+    BOARD_RECT = (0, HUD_HEIGHT, WIDTH, HEIGHT - HUD_HEIGHT)
+    # Элементы полосы (x, y, ширина, высота)
+    EXIT_BUTTON_RECT = (WIDTH - 50, 5, 40, 40)
+    SCORE_LABEL_RECT = (10, 0, 200, HUD_HEIGHT)
+    RECORD_LABEL_RECT = (220, 0, 200, HUD_HEIGHT)
+
     # Цвета, используемые в интерфейсе
     BACKGROUND = (166, 186, 159)  # Цвет фона
     WIDGET_BACKGROUND = (44, 84, 52)  # Цвет фона для виджетов
@@ -14,6 +24,36 @@ class GUIConsts:
     RED = (255, 0, 0)  # Красный цвет
     GRID_COLOR = (200, 200, 200)  # Цвет сетки на игровом поле
 
+    # Ограничение частоты кадров
+    FPS = 60
+
+    # Режим ожидания: если на экране ничего не анимируется, главный цикл ждет событий
+    IDLE_MODE = True
+
+    # Максимальное время ожидания события в режиме ожидания, мс
+    IDLE_TIMEOUT_MS = 500
+
+    # Количество записей на одной странице статистики
+    STATS_PAGE_SIZE = 10
+
+    # Размер тепловой карты на странице аналитики, пикселей
+    HEATMAP_SIZE = 200
+
+
+class GridConsts:
+    """
+    Класс для хранения допустимых размеров игрового поля.
+    """
+    # Диапазон ползунков ширины и высоты поля
+    MIN_SIZE = 2
+    MAX_SIZE = 64
+
+    # Размер поля, выбранный по умолчанию
+    DEFAULT_SIZE = 3
+
+    # Начиная с этого размера поле считается экспертным
+    EXPERT_SIZE = 25
+
 
 class FileConsts:
     """
@@ -22,8 +62,79 @@ class FileConsts:
     # Путь к файлу истории игры
     HISTORY_FILE = "../static/history.json"
 
+    # Путь к журналу истории игры (JSON Lines, одна запись на строку)
+    HISTORY_JOURNAL_FILE = "../static/history.jsonl"
+
+    # Путь к базе SQLite с историей игры
+    HISTORY_DB_FILE = "../static/history.db"
+
     # Путь к файлу с темой оформления
     THEME_FILE = "../static/theme.json"
 
     # Путь к файлу с шрифтом
     FONT_FILE = "../static/comic_sans_ms.ttf"
+
+    # Путь к файлу трассировки профилировщика (формат Chrome Trace Event)
+    TRACE_FILE = "../static/trace.json"
+
+
+class HistoryConsts:
+    """
+    Класс для хранения настроек сохранения истории игры.
+    """
+    # Хранилище истории: "journal" (JSON Lines), "sqlite" или "json"
+    BACKEND = "journal"
+
+    # Политика fsync для журнала: "always", "interval" или "never"
+    FSYNC_POLICY = "always"
+
+    # Минимальный интервал между fsync в секундах для политики "interval"
+    FSYNC_INTERVAL = 1.0
+
+    # Отложенная запись: история сохраняется фоновым потоком, а не в обработчике нажатия
+    WRITE_BEHIND = True
+
+    # Сколько секунд фоновый поток копит записи, прежде чем сохранить их одной пачкой
+    WRITE_BEHIND_INTERVAL = 0.25
+
+    # Сколько последних игр держится в памяти; более старые читаются из хранилища по страницам
+    RECENT_LIMIT = 100
+
+
+class ProfilerConsts:
+    """
+    Класс для хранения настроек встроенного профилировщика кадров.
+    """
+    # Количество последних замеров каждого участка для расчета перцентилей
+    WINDOW = 600
+
+    # Максимальное количество событий трассировки в памяти
+    TRACE_LIMIT = 50000
+
+    # Интервал обновления текста оверлея в секундах
+    OVERLAY_REFRESH = 0.25
+
+
+class TimingConsts:
+    """
+    Класс для хранения длительностей фаз уровня (в миллисекундах) для разных уровней сложности.
+    """
+    # show - показ кружков, miss - показ ошибки, win - показ победы
+    DIFFICULTY_TIMINGS = {
+        "easy": {"show": 1200, "miss": 800, "win": 800},
+        "normal": {"show": 800, "miss": 800, "win": 800},
+        "hard": {"show": 500, "miss": 600, "win": 600},
+    }
+
+    # Текущий уровень сложности
+    DIFFICULTY = "normal"
+
+
+class ReplayConsts:
+    """
+    Класс для хранения настроек воспроизведения сыгранных уровней.
+    """
+    # Сколько последних уровней истории воспроизводит режим --replay, если не задано иное
+    LEVELS = 20
+    # Сколько ждать завершения уровня после последнего нажатия записи, прежде чем считать его несовпадением
+    LEVEL_TIMEOUT_MS = 2000
@@ -0,0 +1,245 @@
+import random
+from typing import Callable, Iterable
+
+# Разрядность начального значения генератора уровня
+SEED_BITS = 32
+
+
+# --- Исходы нажатия на клетку ---
+class Outcome:
+    """
+    Класс для хранения возможных исходов нажатия на клетку поля.
+    """
+    HIT = "hit"  # Угадан кружок, уровень продолжается
+    MISS = "miss"  # Выбрана пустая клетка, уровень проигран
+    WIN = "win"  # Угаданы все кружки, уровень выигран
+    IGNORED = "ignored"  # Уровень уже завершен, нажатие не учитывается
+
+
+# --- Модель одного уровня ---
+class Level:
+    """
+    Модель одного уровня: позиции кружков и выбранные игроком клетки. Не зависит от pygame.
+    Кружки и выбранные клетки хранятся битовыми масками поля (клетке (x, y) соответствует
+    бит y * size_x + x), поэтому проверка нажатия выполняется за O(1) при любом размере поля.
+    Кружки расставляются собственным генератором с начальным значением seed, поэтому уровень
+    с тем же seed воспроизводится точно; нажатия сохраняются вместе со временем.
+    """
+
+    def __init__(self, size_x: int, size_y: int, num_circles: int, seed: int) -> None:
+        """
+        Инициализирует уровень и расставляет кружки.
+
+        :param size_x: Ширина поля.
+        :param size_y: Высота поля.
+        :param num_circles: Количество кружков (не больше количества клеток).
+        :param seed: Начальное значение генератора для расстановки кружков.
+        """
+        self.size_x = size_x
+        self.size_y = size_y
+        self.seed = seed
+        # range не создает список клеток: выбираются только num_circles номеров
+        cells = random.Random(seed).sample(range(size_x * size_y), num_circles)
+        self.circles = [(cell % size_x, cell // size_x) for cell in cells]
+        self.circle_mask = 0
+        for cell in cells:
+            self.circle_mask |= 1 << cell
+        self.selected_mask = 0
+        self.selected_positions = []  # Выбранные клетки в порядке выбора
+        self.clicks = []  # Нажатия (мс от начала уровня, x, y), включая повторные
+        self._found = 0  # Количество найденных кружков
+        self.result = None  # "win" или "loss" после завершения уровня
+
+    def is_circle(self, x: int, y: int) -> bool:
+        """
+        Проверяет, стоит ли в клетке кружок.
+
+        :param x: Столбец клетки.
+        :param y: Строка клетки.
+        :return: True, если в клетке кружок.
+        """
+        return bool(self.circle_mask >> (y * self.size_x + x) & 1)
+
+    def click(self, x: int, y: int, time_ms: int = 0) -> str:
+        """
+        Обрабатывает выбор клетки игроком.
+
+        :param x: Столбец клетки.
+        :param y: Строка клетки.
+        :param time_ms: Время нажатия в миллисекундах от начала уровня.
+        :return: Исход нажатия (см. Outcome).
+        """
+        if self.result is not None:
+            return Outcome.IGNORED
+        self.clicks.append((time_ms, x, y))
+        bit = 1 << (y * self.size_x + x)
+        is_new = not self.selected_mask & bit
+        if is_new:
+            self.selected_mask |= bit
+            self.selected_positions.append((x, y))
+        if not self.circle_mask & bit:
+            self.result = "loss"
+            return Outcome.MISS
+        self._found += is_new
+        if self._found == len(self.circles):
+            self.result = "win"
+            return Outcome.WIN
+        return Outcome.HIT
+
+
+# --- Правила игры ---
+class GameEngine:
+    """
+    Правила игры без отрисовки: расстановка кружков, проверка нажатий, подсчет побед,
+    ошибок и серии, изменение количества кружков. Используется окном игры и симуляцией.
+    """
+
+    def __init__(
+        self,
+        size_x: int,
+        size_y: int,
+        num_circles: int = 1,
+        wins: int = 0,
+        errors: int = 0,
+        streak: int = 0,
+        rng: random.Random | None = None,
+    ) -> None:
+        """
+        Инициализирует игру.
+
+        :param size_x: Ширина поля.
+        :param size_y: Высота поля.
+        :param num_circles: Количество кружков на первом уровне.
+        :param wins: Количество побед.
+        :param errors: Количество ошибок подряд.
+        :param streak: Текущая серия побед.
+        :param rng: Генератор случайных чисел. Если не задан, создается новый.
+        """
+        self.size_x = size_x
+        self.size_y = size_y
+        self.num_circles = num_circles
+        self.wins = wins
+        self.errors = errors
+        self.streak = streak
+        self.rng = rng or random.Random()
+        self.level = None
+        self.last_record = None  # Аргументы StatsManager.record для последнего завершенного уровня
+
+    def start_level(self, seed: int | None = None) -> Level:
+        """
+        Начинает новый уровень с текущим количеством кружков.
+
+        :param seed: Начальное значение генератора уровня (при воспроизведении).
+            Если не задано, берется из генератора игры.
+        :return: Модель нового уровня.
+        """
+        num_circles = min(self.num_circles, self.size_x * self.size_y)
+        if seed is None:
+            seed = self.rng.getrandbits(SEED_BITS)
+        self.level = Level(self.size_x, self.size_y, num_circles, seed)
+        self.last_record = None
+        return self.level
+
+    def click(self, x: int, y: int, time_ms: int = 0) -> str:
+        """
+        Обрабатывает выбор клетки на текущем уровне и применяет правила игры.
+        После проигрыша или выигрыша заполняет self.last_record.
+
+        :param x: Столбец клетки.
+        :param y: Строка клетки.
+        :param time_ms: Время нажатия в миллисекундах от начала уровня.
+        :return: Исход нажатия (см. Outcome).
+        """
+        outcome = self.level.click(x, y, time_ms)
+        if outcome == Outcome.MISS:
+            self.streak = 0
+            self.errors += 1
+            if self.errors >= 2:
+                self.num_circles = max(1, self.num_circles - 1)
+            self.last_record = self._make_record("loss")
+        elif outcome == Outcome.WIN:
+            self.streak += 1
+            self.last_record = self._make_record("win")
+            self.wins += 1
+            # Кружков не может быть больше, чем клеток на поле
+            self.num_circles = min(self.num_circles + 1, self.size_x * self.size_y)
+            self.errors = 0
+        return outcome
+
+    def _make_record(self, level_result: str) -> dict:
+        """
+        Формирует аргументы StatsManager.record для завершенного уровня.
+
+        :param level_result: Результат уровня ("win" или "loss").
+        :return: Словарь с именованными аргументами.
+        """
+        return {
+            "size_x": self.size_x,
+            "size_y": self.size_y,
+            "num_circles": self.num_circles,
+            "circles": self.level.circles,
+            "selected_positions": self.level.selected_positions,
+            "wins": self.wins,
+            "streak": self.streak,
+            "level_result": level_result,
+            "seed": self.level.seed,
+            "clicks": self.level.clicks,
+        }
+
+
+# --- Симуляция ---
+def perfect_player(level: Level, rng: random.Random) -> Iterable[tuple[int, int]]:
+    """
+    Игрок, который всегда помнит все кружки.
+
+    :param level: Текущий уровень.
+    :param rng: Генератор случайных чисел.
+    :return: Последовательность нажатий.
+    """
+    return list(level.circles)
+
+
+def forgetful_player(forget_chance: float) -> Callable[[Level, random.Random], Iterable[tuple[int, int]]]:
+    """
+    Создает игрока, который забывает каждый кружок с вероятностью forget_chance
+    и вместо него нажимает на случайную клетку. Если случайная клетка оказалась пустой,
+    уровень проигран; если в ней кружок - игрок все-таки вспоминает нужную клетку.
+
+    :param forget_chance: Вероятность забыть кружок.
+    :return: Функция-игрок для simulate.
+    """
+
+    def player(level: Level, rng: random.Random) -> Iterable[tuple[int, int]]:
+        for position in level.circles:
+            if rng.random() < forget_chance:
+                x, y = rng.randrange(level.size_x), rng.randrange(level.size_y)
+                if not level.is_circle(x, y):
+                    yield x, y
+                    return
+            yield position
+
+    return player
+
+
+def simulate(
+    engine: GameEngine,
+    player: Callable[[Level, random.Random], Iterable[tuple[int, int]]],
+    levels: int,
+) -> list[dict]:
+    """
+    Прогоняет заданное количество уровней со скриптовым игроком без окна и задержек.
+
+    :param engine: Игра, на которой выполняется симуляция.
+    :param player: Функция, возвращающая последовательность нажатий для уровня.
+    :param levels: Количество уровней.
+    :return: Список записей (аргументов StatsManager.record) по каждому уровню.
+    """
+    records = []
+    for _ in range(levels):
+        level = engine.start_level()
+        for x, y in player(level, engine.rng):
+            if engine.click(x, y) in (Outcome.MISS, Outcome.WIN):
+                break
+        if engine.last_record is not None:
+            records.append(engine.last_record)
+    return records
@@ -1,26 +1,59 @@
-import random
+import time
+
+# Момент начала импорта модуля игры: от него отсчитывается время до первого кадра
+STARTUP_TIME = time.perf_counter()
+
+import os
+import threading
 import pygame
 import pygame_gui
-import pygame_menu
-from src import statistic, consts
-
-pygame.init()
+from src import engine, profiler, replay, scenes, statistic, storage, timers, consts
 
 
 # --- Основной класс игры ---
 class Game:
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        measure_startup: bool = False,
+        trace_file: str | None = None,
+        replay_session: list | None = None,
+    ) -> None:
         """
-        Инициализация игры, создание экрана, менеджера UI и статистики.
+        Инициализация игры, создание экрана и менеджера UI. Статистика загружается
+        в фоновом потоке, шрифт - при первом обращении.
+
+        :param measure_startup: Режим замера запуска: вывести время до первого кадра и выйти.
+        :param trace_file: Если задан, при выходе в него сохраняется трассировка профилировщика.
+        :param replay_session: Записи истории для воспроизведения в реальном времени (см. replay.load_session).
+            Воспроизведенные уровни в историю не записываются.
         """
+        pygame.init()
         self.screen = pygame.display.set_mode(
             (consts.GUIConsts.WIDTH, consts.GUIConsts.HEIGHT),
         )
         pygame.display.set_caption("Тест на запоминание")
-        self.font = pygame.font.Font(consts.FileConsts.FONT_FILE, 18)
+        self.measure_startup = measure_startup
+        self.trace_file = trace_file
+        self.replayer = replay.Replayer(replay_session) if replay_session is not None else None
+        # Замеры кадров: F3 - показать/скрыть оверлей, F4 - сохранить трассировку
+        self.profiler = profiler.Profiler(consts.ProfilerConsts.WINDOW, consts.ProfilerConsts.TRACE_LIMIT)
+        self._events_received = None  # Время получения событий текущего кадра
+        self._overlay_rect = None
+        self._trace_status = None  # Итог последнего сохранения трассировки по F4 для оверлея
+        self._font = None
+        self._stats = None
+        self._stats_error = None
+        self._stats_ready_time = None
+        self._stats_loader = threading.Thread(target=self._load_stats, name="history-loader", daemon=True)
+        self._stats_loader.start()
         self.running = True
-        self.exit_button = None
-        self.stats = statistic.StatsManager(consts.FileConsts.HISTORY_FILE)
+        self.fps = consts.GUIConsts.FPS  # Ограничение частоты кадров
+        self.idle_mode = consts.GUIConsts.IDLE_MODE  # Ожидание событий, когда ничего не анимируется
+        self.scene = None  # Текущая сцена
+        self.next_scene = None  # Сцена, на которую запрошен переход
+        self.scheduler = timers.Scheduler()  # Таймеры текущей сцены
+        # Элементы интерфейса сцен: класс сцены -> {имя: элемент}; создаются один раз и переиспользуются
+        self.widget_sets = {}
         self.ui_manager = pygame_gui.UIManager(
             (consts.GUIConsts.WIDTH, consts.GUIConsts.HEIGHT), consts.FileConsts.THEME_FILE
         )
@@ -28,197 +61,247 @@ class Game:
         self.background.fill(consts.GUIConsts.BACKGROUND)
         self.screen.blit(self.background, (0, 0))
 
-    def run(self) -> None:
+    @property
+    def font(self) -> pygame.font.Font:
         """
-        Запуск игры, отображение начального экрана.
+        Шрифт экрана статистики. Загружается при первом обращении.
         """
-        self.welcome_screen()
+        if self._font is None:
+            self._font = pygame.font.Font(consts.FileConsts.FONT_FILE, 18)
+        return self._font
 
-    def welcome_screen(self) -> None:
+    @property
+    def stats(self) -> statistic.StatsManager:
         """
-        Отображение приветственного экрана с кнопками 'Новая игра' и 'Статистика'.
+        Менеджер статистики. Если фоновая загрузка еще не завершена, дожидается ее.
         """
-        clock = pygame.time.Clock()
+        if self._stats is None:
+            self._stats_loader.join()
+            if self._stats_error is not None:
+                raise self._stats_error
+        return self._stats
+
+    @stats.setter
+    def stats(self, stats: statistic.StatsManager) -> None:
+        """
+        Замена менеджера статистики.
+        """
+        self._stats_loader.join()
+        self._stats = stats
 
-        # Кнопки для новой игры и статистики
-        new_game_button = pygame_gui.elements.UIButton(
-            relative_rect=pygame.Rect(
-                (consts.GUIConsts.WIDTH // 2 - 100, consts.GUIConsts.HEIGHT // 2 - 50), (200, 50)
-            ),
-            text="Новая игра",
-            manager=self.ui_manager,
-        )
+    def _load_stats(self) -> None:
+        """
+        Фоновая загрузка статистики и истории, пока приветственный экран уже работает.
+        """
+        try:
+            stats = self._create_stats_manager()
+            if isinstance(stats.storage, storage.WriteBehindStorage):
+                stats.storage.on_write = lambda start, end: self.profiler.add("history_write", start, end)
+            stats.recent  # Загружаем последние игры заранее, чтобы экран статистики открывался сразу
+            try:
+                # Только сохраненная аналитика: полный проход по истории откладывается до открытия ее страницы
+                stats.restore_analytics()
+            except ImportError:
+                pass  # Без NumPy экран аналитики сообщит, что она недоступна
+            self._stats = stats
+        except Exception as error:
+            self._stats_error = error
+        self._stats_ready_time = time.perf_counter()
 
-        stats_button = pygame_gui.elements.UIButton(
-            relative_rect=pygame.Rect(
-                (consts.GUIConsts.WIDTH // 2 - 100, consts.GUIConsts.HEIGHT // 2 + 20), (200, 50)
-            ),
-            text="Статистика",
-            manager=self.ui_manager,
+    @staticmethod
+    def _create_stats_manager() -> statistic.StatsManager:
+        """
+        Создание менеджера статистики с хранилищем, выбранным в HistoryConsts.BACKEND
+        (хранилище открывается по расширению файла с политикой fsync из настроек, см. storage.open_history).
+        При первом запуске история из старого history.json переносится в новое хранилище.
+        """
+        legacy_file = consts.FileConsts.HISTORY_FILE
+        backend = consts.HistoryConsts.BACKEND
+        if backend == "sqlite":
+            history_file = consts.FileConsts.HISTORY_DB_FILE
+            # Несколько одновременно запущенных игр не должны импортировать историю дважды
+            with storage.file_lock(history_file):
+                if not os.path.exists(history_file) and os.path.exists(legacy_file):
+                    storage.import_history_to_sqlite(legacy_file, history_file)
+        elif backend == "journal":
+            history_file = consts.FileConsts.HISTORY_JOURNAL_FILE
+            with storage.file_lock(history_file):
+                if not os.path.exists(history_file) and os.path.exists(legacy_file):
+                    storage.migrate_json_to_journal(legacy_file, history_file)
+        else:
+            history_file = legacy_file
+        history_storage = storage.open_history(history_file)
+        if consts.HistoryConsts.WRITE_BEHIND:
+            history_storage = storage.WriteBehindStorage(
+                history_storage, flush_interval=consts.HistoryConsts.WRITE_BEHIND_INTERVAL
+            )
+        return statistic.StatsManager(
+            history_file, history_storage, recent_limit=consts.HistoryConsts.RECENT_LIMIT
         )
 
-        # Главный цикл ожидания событий
-        while self.running:
-            time_delta = clock.tick(60) / 1000.0
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    self.running = False
-                self.ui_manager.process_events(event)
-
-                # Обработка нажатий на кнопки
-                if event.type == pygame.USEREVENT:
-                    if event.user_type == pygame_gui.UI_BUTTON_PRESSED:
-                        if event.ui_element == new_game_button:
-                            self.__clear_screen([new_game_button, stats_button])
-                            self.select_grid_size()
-                            return
-                        elif event.ui_element == stats_button:
-                            self.show_statistics()
-            self.ui_manager.update(time_delta)
-            self.screen.fill(consts.GUIConsts.BACKGROUND)
-            self.ui_manager.draw_ui(self.screen)
-            pygame.display.flip()
+    def run(self) -> None:
+        """
+        Запуск игры: единый главный цикл, передающий события, обновление и отрисовку текущей сцене.
+        """
+        clock = pygame.time.Clock()
+        if self.replayer is not None:
+            self.next_level(None)
+        else:
+            self.welcome_screen()
+        try:
+            while self.running:
+                self._switch_scene()
+                events = self._get_events()
+                # Ограничение частоты кадров; time_delta включает время ожидания событий
+                time_delta = clock.tick(self.fps) / 1000.0
+                self.step(events, time_delta)
+                if self.measure_startup:
+                    self._report_startup()
+            if self.scene is not None:
+                self.scene.exit()
+        finally:
+            # История, ожидающая записи в фоновом потоке, сохраняется при любом выходе
+            self.stats.close()
+            if self.trace_file is not None:
+                self.profiler.export_trace(self.trace_file)
+
+    def _report_startup(self) -> None:
+        """
+        Вывод времени запуска после первого кадра и завершение игры.
+        """
+        first_frame = (time.perf_counter() - STARTUP_TIME) * 1000
+        self._stats_loader.join()
+        history_ready = (self._stats_ready_time - STARTUP_TIME) * 1000
+        print(f"Время до первого кадра: {first_frame:.1f} мс")
+        print(f"Время до загрузки истории: {history_ready:.1f} мс")
+        self.running = False
+
+    def step(self, events: list[pygame.event.Event], time_delta: float) -> None:
+        """
+        Одна итерация главного цикла: переход между сценами, обработка событий и таймеров,
+        обновление и вывод кадра на экран.
 
-    def select_grid_size(self) -> None:
+        :param events: События pygame за кадр.
+        :param time_delta: Время с предыдущего кадра в секундах.
         """
-        Экран выбора размера поля для игры.
+        frame_start = time.perf_counter()
+        received = self._events_received or frame_start
+        self._events_received = None
+        self._switch_scene()
+        for event in events:
+            if event.type == pygame.QUIT:
+                self.running = False
+            elif event.type == pygame.MOUSEBUTTONDOWN:
+                self.profiler.click_received(received)
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                self.profiler.toggle_overlay()
+                self.scene.invalidate()
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F4:
+                count = self.profiler.export_trace(consts.FileConsts.TRACE_FILE)
+                self._trace_status = f"трассировка: {count} событий сохранено в {consts.FileConsts.TRACE_FILE}"
+        with self.profiler.section("events"):
+            self.scene.handle_events(events)
+            self.scheduler.update()
+        if self.next_scene is not None:
+            return
+        with self.profiler.section("ui_update"):
+            self.scene.update(time_delta)
+        with self.profiler.section("draw"):
+            dirty_rects = self.scene.draw()
+        if self.profiler.overlay_visible:
+            self._draw_overlay(dirty_rects)
+        with self.profiler.section("flip"):
+            if dirty_rects is None:
+                pygame.display.flip()
+            else:
+                pygame.display.update(dirty_rects)
+        self.profiler.frame_presented()
+        self.profiler.add("frame", frame_start, time.perf_counter())
+
+    def _draw_overlay(self, dirty_rects: list[pygame.Rect] | None) -> None:
         """
-        size_x = 3
-        size_y = 3
-        selecting = True
+        Вывод оверлея профилировщика поверх сцены.
 
-        # Создание кнопки выхода
-        self._create_exit_button()
+        :param dirty_rects: Обновляемые области экрана; область оверлея добавляется к ним.
+        """
+        extra_lines = []
+        if self._stats is not None and isinstance(self._stats.storage, storage.WriteBehindStorage):
+            metrics = self._stats.storage.metrics()
+            extra_lines.append(
+                f"очередь записи: {metrics['queue_depth']}, пачка: {metrics['last_flush_latency_ms']:.1f} мс,"
+                f" ошибок: {metrics['errors']}, не сохранено: {metrics['unsaved_records']}"
+            )
+        if self._stats is not None:
+            lock_metrics = self._stats.storage.lock.metrics()
+            extra_lines.append(
+                f"блокировка истории: {lock_metrics['acquisitions']} захватов, {lock_metrics['contended']} с ожиданием,"
+                f" макс. {lock_metrics['wait_max_ms']:.1f} мс"
+            )
+        if self._trace_status is not None:
+            extra_lines.append(self._trace_status)
+        rect = self.profiler.draw_overlay(self.screen, extra_lines)
+        # Если оверлей изменил размер, остатки прежнего стираются полной перерисовкой
+        if self._overlay_rect is not None and rect != self._overlay_rect:
+            self.scene.invalidate()
+        self._overlay_rect = rect
+        if dirty_rects is not None:
+            dirty_rects.append(rect)
+
+    def _get_events(self) -> list[pygame.event.Event]:
+        """
+        Получение событий за кадр с отметкой времени получения (от нее отсчитывается задержка нажатия).
 
-        # Ползунки для выбора ширины и высоты поля
-        slider_width = pygame_gui.elements.UIHorizontalSlider(
-            relative_rect=pygame.Rect(
-                (consts.GUIConsts.WIDTH // 2 - 125, consts.GUIConsts.HEIGHT // 2 - 90), (260, 33)
-            ),
-            start_value=3,
-            value_range=(2, 10),
-            manager=self.ui_manager,
-        )
-        slider_height = pygame_gui.elements.UIHorizontalSlider(
-            relative_rect=pygame.Rect(
-                (consts.GUIConsts.WIDTH // 2 - 125, consts.GUIConsts.HEIGHT // 2), (260, 33)
-            ),
-            start_value=3,
-            value_range=(2, 10),
-            manager=self.ui_manager,
-        )
+        :return: Список событий pygame.
+        """
+        events = self._wait_events()
+        self._events_received = time.perf_counter()
+        return events
 
-        # Лейблы для отображения текущего значения ползунков
-        label_width = pygame_gui.elements.UILabel(
-            relative_rect=pygame.Rect(
-                (consts.GUIConsts.WIDTH // 2 - 150, consts.GUIConsts.HEIGHT // 2 - 130), (300, 25)
-            ),
-            text="Ширина поля: 3",
-            manager=self.ui_manager,
-        )
-        label_height = pygame_gui.elements.UILabel(
-            relative_rect=pygame.Rect(
-                (consts.GUIConsts.WIDTH // 2 - 150, consts.GUIConsts.HEIGHT // 2 - 40), (300, 25)
-            ),
-            text="Высота поля: 3",
-            manager=self.ui_manager,
-        )
+    def _wait_events(self) -> list[pygame.event.Event]:
+        """
+        Ожидание событий. Если сцена ничего не анимирует, кадр не перерисовывается впустую:
+        ожидание блокируется до первого события, ближайшего таймера или до IDLE_TIMEOUT_MS.
 
-        # Кнопка для начала игры
-        start_button = pygame_gui.elements.UIButton(
-            relative_rect=pygame.Rect(
-                (consts.GUIConsts.WIDTH // 2 - 100, consts.GUIConsts.HEIGHT // 2 + 70), (200, 50)
-            ),
-            text="Начать",
-            manager=self.ui_manager,
-        )
+        :return: Список событий pygame.
+        """
+        if not self.idle_mode or self.scene.is_animating():
+            return pygame.event.get()
+        timeout = consts.GUIConsts.IDLE_TIMEOUT_MS
+        next_timer = self.scheduler.time_until_next()
+        if next_timer is not None:
+            timeout = min(timeout, next_timer)
+        if timeout == 0:
+            return pygame.event.get()
+        event = pygame.event.wait(timeout)
+        if event.type == pygame.NOEVENT:
+            return []
+        return [event] + pygame.event.get()
+
+    def change_scene(self, scene: scenes.Scene) -> None:
+        """
+        Запрос перехода на другую сцену. Переход выполняется главным циклом в начале следующего кадра.
 
-        clock = pygame.time.Clock()
-        while selecting:
-            time_delta = clock.tick(60) / 1000.0
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    selecting = False
-                    self.running = False
-                self.ui_manager.process_events(event)
-                if event.type == pygame.USEREVENT:
-                    if event.user_type == pygame_gui.UI_HORIZONTAL_SLIDER_MOVED:
-                        if event.ui_element == slider_width:
-                            label_width.set_text(
-                                f"Ширина поля: {int(slider_width.get_current_value())}"
-                            )
-                        elif event.ui_element == slider_height:
-                            label_height.set_text(
-                                f"Высота поля: {int(slider_height.get_current_value())}"
-                            )
-                    if event.user_type == pygame_gui.UI_BUTTON_PRESSED:
-                        if event.ui_element == start_button:
-                            size_x = int(slider_width.get_current_value())
-                            size_y = int(slider_height.get_current_value())
-                            selecting = False
-                        if event.ui_element == self.exit_button:
-                            level_running = False
-                            self.__clear_screen([self.exit_button, slider_width, slider_height, label_width, label_height, start_button])
-                            self.welcome_screen()
-                            return
-
-            self.ui_manager.update(time_delta)
-            self.screen.fill(consts.GUIConsts.BACKGROUND)
-            self.ui_manager.draw_ui(self.screen)
-            pygame.display.flip()
-
-        if self.running:
-            self.__clear_screen(
-                [slider_width, slider_height, label_width, label_height, start_button, self.exit_button]
-            )
-            self.start_game(size_x, size_y, num_circles=1, wins=0, errors=0, streak=0)
+        :param scene: Новая сцена.
+        """
+        self.next_scene = scene
 
-    def show_statistics(self) -> None:
+    def welcome_screen(self) -> None:
         """
-        Отображение статистики игры через pygame_menu.
+        Переход на приветственный экран с кнопками 'Новая игра' и 'Статистика'.
         """
-        custom_theme = pygame_menu.themes.Theme(
-            background_color=consts.GUIConsts.BACKGROUND,
-            title_background_color=consts.GUIConsts.BACKGROUND,
-            widget_font=self.font,
-            widget_font_color=consts.GUIConsts.WHITE,
-            widget_background_color=consts.GUIConsts.WIDGET_BACKGROUND,
-            widget_selection_effect=pygame_menu.widgets.HighlightSelection(),
-            widget_padding=10,
-        )
+        self.change_scene(scenes.WelcomeScene(self))
 
-        menu = pygame_menu.Menu(
-            title="",
-            width=consts.GUIConsts.WIDTH,
-            height=consts.GUIConsts.HEIGHT,
-            theme=custom_theme,
-            onclose=pygame_menu.events.BACK,
-        )
+    def select_grid_size(self) -> None:
+        """
+        Переход на экран выбора размера поля для игры.
+        """
+        self.change_scene(scenes.GridSizeScene(self))
 
-        history = self.stats.history
-        if not history:
-            menu.add.label("Нет данных", font_size=30)
-        else:
-            for i, entry in enumerate(history):
-                text = (
-                    f"Игра {i + 1} | {entry['datetime']} | Результат: {entry['result']}\n"
-                    f"Размер поля: {entry['grid_size']} | Кружков: {entry['num_circles']}\n"
-                    f"Счет: {entry['score']} | Серия: {entry['streak']}\n"
-                    f"Выбранные клетки: {entry['selected']}"
-                )
-                game_frame = menu.add.frame_v(
-                    width=consts.GUIConsts.WIDTH - 80,
-                    height=140,
-                    background_color=consts.GUIConsts.WIDGET_BACKGROUND,
-                    padding=10,
-                )
-                game_frame._relax = True
-                game_frame.pack(
-                    menu.add.label(text, font_size=20, wordwrap=True),
-                    align=pygame_menu.locals.ALIGN_LEFT,
-                )
-
-        menu.mainloop(self.screen)
+    def show_statistics(self) -> None:
+        """
+        Переход на экран статистики игры.
+        """
+        self.change_scene(scenes.StatisticsScene(self))
 
     def start_game(
         self,
@@ -230,165 +313,67 @@ class Game:
         streak: int,
     ) -> None:
         """
-        Основной игровой процесс. Отображение сетки, появление кружков, обработка выбора.
+        Переход на новый уровень игры.
         """
-        clock = pygame.time.Clock()
-        time_delta = clock.tick(60) / 1000.0
-        cell_width = consts.GUIConsts.WIDTH / size_x
-        cell_height = consts.GUIConsts.HEIGHT / size_y
-        circle_radius = int(min(cell_width, cell_height) / 3)
-
-        # Генерация случайных позиций для кружков
-        possible_positions = [(x, y) for x in range(size_x) for y in range(size_y)]
-        circles = random.sample(possible_positions, num_circles)
-        selected_positions = []
-
-        self.screen.fill(consts.GUIConsts.BACKGROUND)
-        # Отображение сетки
-        for x in range(size_x):
-            for y in range(size_y):
-                rect = pygame.Rect(
-                    x * cell_width,
-                    y * cell_height,
-                    cell_width,
-                    cell_height,
-                )
-                pygame.draw.rect(self.screen, consts.GUIConsts.GRID_COLOR, rect, 1)
-        # Отображение кружков
-        for cx, cy in circles:
-            pygame.draw.circle(
-                self.screen,
-                consts.GUIConsts.BLUE,
-                (
-                    int(cx * cell_width + cell_width / 2),
-                    int(cy * cell_height + cell_height / 2),
-                ),
-                circle_radius,
-            )
-        pygame.display.flip()
-        pygame.time.delay(800)
+        game_engine = engine.GameEngine(size_x, size_y, num_circles, wins, errors, streak)
+        self.change_scene(scenes.LevelScene(self, game_engine))
 
-        score_label = pygame_gui.elements.UILabel(
-            relative_rect=pygame.Rect((consts.GUIConsts.WIDTH - 840, 0), (200, 50)),
-            text=f"Выиграно: {wins}",
-            manager=self.ui_manager,
-        )
-        record_label = pygame_gui.elements.UILabel(
-            relative_rect=pygame.Rect((consts.GUIConsts.WIDTH - 850, 35), (200, 50)),
-            text=f"Рекорд: {self.stats.get_record()}",
-            manager=self.ui_manager,
-        )
-        self._create_exit_button()
-
-        level_running = True
-        while level_running:
-            self.screen.fill(consts.GUIConsts.BACKGROUND)
-            # Отображение сетки
-            for x in range(size_x):
-                for y in range(size_y):
-                    pygame.draw.rect(
-                        self.screen,
-                        consts.GUIConsts.GRID_COLOR,
-                        (
-                            x * cell_width,
-                            y * cell_height,
-                            cell_width,
-                            cell_height,
-                        ),
-                        1,
-                    )
-            # Отображение выбранных позиций
-            for sx, sy in selected_positions:
-                color = consts.GUIConsts.BLUE if (sx, sy) in circles else consts.GUIConsts.RED
-                pygame.draw.circle(
-                    self.screen,
-                    color,
-                    (
-                        int(sx * cell_width + cell_width / 2),
-                        int(sy * cell_height + cell_height / 2),
-                    ),
-                    circle_radius,
-                )
-
-            self.ui_manager.update(time_delta)
-            self.ui_manager.draw_ui(self.screen)
-            pygame.display.flip()
-
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    level_running = False
-                    self.running = False
-                    return
-
-                elif event.type == pygame.MOUSEBUTTONDOWN:
-                    if self.exit_button.get_abs_rect().collidepoint(event.pos):
-                        level_running = False
-                        self.__clear_screen([score_label, record_label, self.exit_button])
-                        self.screen.fill(consts.GUIConsts.BACKGROUND)
-                        self.ui_manager.update(time_delta)
-                        self.ui_manager.draw_ui(self.screen)
-                        pygame.display.flip()
-                        self.welcome_screen()
-                        return
-                    x = int(event.pos[0] // cell_width)
-                    y = int(event.pos[1] // cell_height)
-                    if (x, y) not in selected_positions:
-                        selected_positions.append((x, y))
-                    color = consts.GUIConsts.BLUE if (x, y) in circles else consts.GUIConsts.RED
-                    pygame.draw.circle(
-                        self.screen,
-                        color,
-                        (
-                            int(x * cell_width + cell_width / 2),
-                            int(y * cell_height + cell_height / 2),
-                        ),
-                        circle_radius,
-                    )
-                    pygame.display.flip()
-
-                    # Обработка ошибок и выигрыша
-                    if color == consts.GUIConsts.RED:
-                        streak = 0
-                        pygame.time.delay(800)
-                        errors += 1
-                        if errors >= 2:
-                            num_circles = max(1, num_circles - 1)
-                        self.stats.record(
-                            size_x, size_y, num_circles, circles, selected_positions, wins, streak, "loss"
-                        )
-                        self.__clear_screen([score_label, record_label, self.exit_button])
-                        self.start_game(size_x, size_y, num_circles, wins, errors, streak)
-                        return
-
-                    if set(selected_positions) == set(circles):
-                        streak += 1
-                        pygame.time.delay(800)
-                        self.stats.record(size_x, size_y, num_circles, circles, selected_positions, wins, streak, "win")
-                        wins += 1
-                        num_circles += 1
-                        errors = 0
-                        self.stats.history = self.stats.load_history()  # Обновляем историю
-                        self.__clear_screen([score_label, record_label, self.exit_button])
-                        self.start_game(size_x, size_y, num_circles, wins, errors, streak)
-                        return
-
-    def _create_exit_button(self) -> pygame_gui.elements.UIButton:
-        """
-        Создание кнопки для выхода из игры.
-        """
-        self.exit_button = pygame_gui.elements.UIButton(
-            relative_rect=pygame.Rect((consts.GUIConsts.WIDTH - 50, 5), (40, 40)),
-            text="X",
-            manager=self.ui_manager,
-        )
+    def next_level(self, game_engine: engine.GameEngine | None) -> None:
+        """
+        Переход на следующий уровень. При воспроизведении уровень берется из следующей записи
+        сеанса, а после последней записи игра выводит итог и завершается.
 
-    @staticmethod
-    def __clear_screen(elements: list) -> None:
+        :param game_engine: Правила и состояние текущей игры (при воспроизведении не используются).
+        """
+        if self.replayer is None:
+            self.change_scene(scenes.LevelScene(self, game_engine))
+            return
+        record = self.replayer.next_record()
+        if record is None:
+            print(self.replayer.summary())
+            self.running = False
+            return
+        self.change_scene(scenes.LevelScene(self, self.replayer.create_engine(record), replay_record=record))
+
+    def _switch_scene(self) -> None:
         """
-        Очистка списка элементов на экране.
+        Выполнение запрошенного перехода: завершение текущей сцены и вход в новую.
         """
-        [element.kill() for element in elements]
+        if self.next_scene is None:
+            return
+        if self.scene is not None:
+            self.scene.exit()
+        # Таймеры принадлежат сцене и не переживают переход
+        self.scheduler.clear()
+        self.scene, self.next_scene = self.next_scene, None
+        self.scene.enter()
 
 
 if __name__ == "__main__":
-    Game().run()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Тест на запоминание.")
+    parser.add_argument(
+        "--startup-time",
+        action="store_true",
+        help="Вывести время до первого кадра и до загрузки истории, затем выйти.",
+    )
+    parser.add_argument(
+        "--trace",
+        metavar="PATH",
+        help="Сохранить при выходе трассировку кадров и записи истории (формат Chrome Trace Event).",
+    )
+    parser.add_argument(
+        "--replay",
+        metavar="PATH",
+        help="Воспроизвести в реальном времени последние уровни из файла истории (.json, .jsonl или .db).",
+    )
+    parser.add_argument(
+        "--replay-levels",
+        type=int,
+        default=consts.ReplayConsts.LEVELS,
+        help="Количество воспроизводимых последних уровней.",
+    )
+    args = parser.parse_args()
+    session = replay.load_session(args.replay, args.replay_levels) if args.replay else None
+    Game(measure_startup=args.startup_time, trace_file=args.trace, replay_session=session).run()
@@ -0,0 +1,204 @@
+import collections
+import contextlib
+import json
+import threading
+import time
+from typing import Iterator
+
+import pygame
+from src import consts
+
+
+def percentile(samples: list[float], q: float) -> float:
+    """
+    Возвращает перцентиль отсортированной выборки (ближайший ранг).
+
+    :param samples: Отсортированные значения.
+    :param q: Перцентиль от 0 до 100.
+    :return: Значение перцентиля или 0, если выборка пуста.
+    """
+    if not samples:
+        return 0.0
+    index = min(len(samples) - 1, max(0, round(q / 100 * len(samples)) - 1))
+    return samples[index]
+
+
+# --- Профилировщик кадров ---
+class Profiler:
+    """
+    Замеры времени главного цикла: участки кадра (события, обновление интерфейса, отрисовка,
+    вывод на экран), задержка от нажатия до отрисовки кружка и работа с историей.
+    Последние замеры показываются на экране поверх сцены и могут быть сохранены
+    в файл трассировки формата Chrome Trace Event (открывается в chrome://tracing и Perfetto).
+    """
+
+    # Участки, показываемые на экране, в порядке вывода
+    SECTIONS = ("frame", "events", "ui_update", "draw", "flip", "click_latency", "stats_record", "history_write")
+
+    def __init__(self, window: int = 600, trace_limit: int = 50000) -> None:
+        """
+        Инициализирует профилировщик.
+
+        :param window: Количество последних замеров каждого участка для расчета перцентилей.
+        :param trace_limit: Максимальное количество событий трассировки в памяти.
+        """
+        self.samples = collections.defaultdict(lambda: collections.deque(maxlen=window))
+        # deque.append атомарна, поэтому фоновый поток записи истории добавляет события без блокировки
+        self.trace = collections.deque(maxlen=trace_limit)
+        self.origin = time.perf_counter()
+        self.overlay_visible = False
+        self._click_time = None  # Время получения последнего необработанного нажатия
+        self._feedback_pending = False  # Кружок нарисован и будет выведен в этом кадре
+        self._font = None
+        self._overlay = None  # Отрисованный текст оверлея
+        self._overlay_time = 0.0
+
+    def add(self, name: str, start: float, end: float) -> None:
+        """
+        Добавляет замер участка.
+
+        :param name: Название участка.
+        :param start: Время начала (time.perf_counter()).
+        :param end: Время окончания (time.perf_counter()).
+        """
+        self.samples[name].append((end - start) * 1000)
+        self.trace.append((name, start, end, threading.current_thread().name))
+
+    @contextlib.contextmanager
+    def section(self, name: str) -> Iterator[None]:
+        """
+        Замеряет время выполнения блока with.
+
+        :param name: Название участка.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, start, time.perf_counter())
+
+    def click_received(self, received: float) -> None:
+        """
+        Отмечает получение нажатия мыши.
+
+        :param received: Время получения события (time.perf_counter()).
+        """
+        self._click_time = received
+
+    def feedback_drawn(self) -> None:
+        """
+        Отмечает, что сцена нарисовала отклик на нажатие; задержка будет учтена после вывода кадра.
+        """
+        self._feedback_pending = self._click_time is not None
+
+    def frame_presented(self) -> None:
+        """
+        Завершает замер задержки нажатия после вывода кадра на экран.
+        """
+        if self._feedback_pending:
+            self.add("click_latency", self._click_time, time.perf_counter())
+        self._feedback_pending = False
+        self._click_time = None
+
+    def summary(self, name: str) -> dict:
+        """
+        Сводка замеров участка.
+
+        :param name: Название участка.
+        :return: Количество замеров, перцентили p50, p95, p99 и максимум в миллисекундах.
+        """
+        samples = sorted(self.samples.get(name, ()))
+        return {
+            "count": len(samples),
+            "p50": percentile(samples, 50),
+            "p95": percentile(samples, 95),
+            "p99": percentile(samples, 99),
+            "max": samples[-1] if samples else 0.0,
+        }
+
+    def toggle_overlay(self) -> None:
+        """
+        Показывает или скрывает оверлей с замерами.
+        """
+        self.overlay_visible = not self.overlay_visible
+        self._overlay = None
+
+    def draw_overlay(self, screen: pygame.Surface, extra_lines: list[str] = ()) -> pygame.Rect:
+        """
+        Рисует оверлей в правом нижнем углу экрана. Текст обновляется не чаще
+        ProfilerConsts.OVERLAY_REFRESH секунд, чтобы сам оверлей не влиял на замеры.
+
+        :param screen: Поверхность экрана.
+        :param extra_lines: Дополнительные строки (например, показатели фоновой записи истории).
+        :return: Область экрана, занятая оверлеем.
+        """
+        now = time.perf_counter()
+        if self._overlay is None or now - self._overlay_time >= consts.ProfilerConsts.OVERLAY_REFRESH:
+            self._overlay = self._render_overlay(list(extra_lines))
+            self._overlay_time = now
+        rect = self._overlay.get_rect(bottomright=screen.get_rect().bottomright)
+        return screen.blit(self._overlay, rect)
+
+    def _render_overlay(self, extra_lines: list[str]) -> pygame.Surface:
+        """
+        Отрисовка текста оверлея.
+
+        :param extra_lines: Дополнительные строки.
+        :return: Поверхность с текстом на непрозрачном фоне.
+        """
+        if self._font is None:
+            self._font = pygame.font.Font(None, 18)
+        rows = [["мс", "p50", "p95", "p99", "max"]]
+        for name in self.SECTIONS:
+            stats = self.summary(name)
+            if stats["count"]:
+                rows.append([name] + [f"{stats[key]:.2f}" for key in ("p50", "p95", "p99", "max")])
+        # Таблица выводится по столбцам: шрифт пропорциональный
+        rendered_rows = [[self._font.render(cell, True, consts.GUIConsts.WHITE) for cell in row] for row in rows]
+        column_widths = [max(row[i].get_width() for row in rendered_rows) + 10 for i in range(len(rows[0]))]
+        rendered_lines = [self._font.render(line, True, consts.GUIConsts.WHITE) for line in extra_lines]
+        line_height = self._font.get_linesize()
+        width = max([sum(column_widths)] + [line.get_width() for line in rendered_lines]) + 10
+        height = line_height * (len(rendered_rows) + len(rendered_lines)) + 10
+        overlay = pygame.Surface((width, height))
+        overlay.fill(consts.GUIConsts.BLACK)
+        y = 5
+        for row in rendered_rows:
+            x = 5
+            for i, cell in enumerate(row):
+                # Название участка выравнивается влево, числа - вправо
+                overlay.blit(cell, (x if i == 0 else x + column_widths[i] - cell.get_width() - 10, y))
+                x += column_widths[i]
+            y += line_height
+        for line in rendered_lines:
+            overlay.blit(line, (5, y))
+            y += line_height
+        return overlay
+
+    def export_trace(self, path: str) -> int:
+        """
+        Сохраняет накопленные замеры в файл трассировки Chrome Trace Event.
+
+        :param path: Путь к файлу.
+        :return: Количество сохраненных событий.
+        """
+        events = list(self.trace)
+        thread_ids = {}
+        trace_events = []
+        for name, start, end, thread in events:
+            tid = thread_ids.setdefault(thread, len(thread_ids))
+            trace_events.append(
+                {
+                    "name": name,
+                    "ph": "X",
+                    "ts": (start - self.origin) * 1e6,
+                    "dur": (end - start) * 1e6,
+                    "pid": 0,
+                    "tid": tid,
+                }
+            )
+        for thread, tid in thread_ids.items():
+            trace_events.append({"name": "thread_name", "ph": "M", "pid": 0, "tid": tid, "args": {"name": thread}})
+        with open(path, "w") as f:
+            json.dump({"traceEvents": trace_events, "displayTimeUnit": "ms"}, f)
+        return len(events)
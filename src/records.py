@@ -0,0 +1,345 @@
+import base64
+
+
+# --- Компактное кодирование позиций ---
+def encode_mask(positions: list[tuple[int, int]], size_x: int) -> int:
+    """
+    Кодирует набор клеток битовой маской поля: клетке (x, y) соответствует бит y * size_x + x.
+
+    :param positions: Позиции клеток.
+    :param size_x: Ширина поля.
+    :return: Битовая маска.
+    """
+    mask = 0
+    for x, y in positions:
+        mask |= 1 << (y * size_x + x)
+    return mask
+
+
+def decode_mask(mask: int, size_x: int) -> list[tuple[int, int]]:
+    """
+    Раскодирует битовую маску поля в позиции клеток (в порядке номеров клеток).
+
+    :param mask: Битовая маска.
+    :param size_x: Ширина поля.
+    :return: Список позиций (x, y).
+    """
+    positions = []
+    while mask:
+        low_bit = mask & -mask
+        index = low_bit.bit_length() - 1
+        positions.append((index % size_x, index // size_x))
+        mask ^= low_bit
+    return positions
+
+
+def cell_width(size_x: int, size_y: int) -> int:
+    """
+    Количество байт на номер клетки в упакованной последовательности.
+
+    :param size_x: Ширина поля.
+    :param size_y: Высота поля.
+    :return: 1 для полей до 256 клеток, иначе 2.
+    """
+    return 1 if size_x * size_y <= 256 else 2
+
+
+def pack_cells(positions: list[tuple[int, int]], size_x: int, size_y: int) -> bytes:
+    """
+    Упаковывает последовательность клеток в байты с сохранением порядка.
+
+    :param positions: Позиции клеток в порядке выбора.
+    :param size_x: Ширина поля.
+    :param size_y: Высота поля.
+    :return: Номера клеток, по 1 или 2 байта на клетку.
+    """
+    width = cell_width(size_x, size_y)
+    return b"".join((y * size_x + x).to_bytes(width, "big") for x, y in positions)
+
+
+def unpack_cells(data: bytes, size_x: int, size_y: int) -> list[tuple[int, int]]:
+    """
+    Распаковывает последовательность клеток, упакованную функцией pack_cells.
+
+    :param data: Упакованные номера клеток.
+    :param size_x: Ширина поля.
+    :param size_y: Высота поля.
+    :return: Список позиций (x, y) в исходном порядке.
+    """
+    width = cell_width(size_x, size_y)
+    positions = []
+    for offset in range(0, len(data), width):
+        index = int.from_bytes(data[offset:offset + width], "big")
+        positions.append((index % size_x, index // size_x))
+    return positions
+
+
+def pack_clicks(clicks: list[tuple[int, int, int]], size_x: int, size_y: int) -> bytes:
+    """
+    Упаковывает поток нажатий: для каждого нажатия - интервал после предыдущего в миллисекундах
+    (целое переменной длины, по 7 бит на байт) и номер клетки (как в pack_cells).
+    Интервалы короче 128 мс занимают один байт.
+
+    :param clicks: Нажатия (мс от начала уровня, x, y) в порядке времени.
+    :param size_x: Ширина поля.
+    :param size_y: Высота поля.
+    :return: Упакованный поток.
+    """
+    width = cell_width(size_x, size_y)
+    data = bytearray()
+    previous = 0
+    for time_ms, x, y in clicks:
+        delta = max(0, int(time_ms) - previous)
+        previous += delta
+        while delta >= 0x80:
+            data.append(delta & 0x7F | 0x80)
+            delta >>= 7
+        data.append(delta)
+        data += (y * size_x + x).to_bytes(width, "big")
+    return bytes(data)
+
+
+def unpack_clicks(data: bytes, size_x: int, size_y: int) -> list[tuple[int, int, int]]:
+    """
+    Распаковывает поток нажатий, упакованный функцией pack_clicks.
+
+    :param data: Упакованный поток.
+    :param size_x: Ширина поля.
+    :param size_y: Высота поля.
+    :return: Список нажатий (мс от начала уровня, x, y).
+    """
+    width = cell_width(size_x, size_y)
+    clicks = []
+    time_ms = 0
+    offset = 0
+    while offset < len(data):
+        delta, shift = 0, 0
+        while True:
+            byte = data[offset]
+            offset += 1
+            delta |= (byte & 0x7F) << shift
+            shift += 7
+            if byte < 0x80:
+                break
+        time_ms += delta
+        index = int.from_bytes(data[offset:offset + width], "big")
+        offset += width
+        clicks.append((time_ms, index % size_x, index // size_x))
+    return clicks
+
+
+def parse_grid_size(grid_size: str) -> tuple[int, int]:
+    """
+    Разбирает размер поля вида "3x4".
+
+    :param grid_size: Размер поля.
+    :return: Ширина и высота поля.
+    """
+    size_x, size_y = grid_size.split("x")
+    return int(size_x), int(size_y)
+
+
+# --- Запись истории ---
+class HistoryRecord:
+    """
+    Запись об одном сыгранном уровне. Кружки хранятся битовой маской поля, выбранные клетки -
+    упакованными номерами клеток в порядке выбора; в позиции (x, y) они раскодируются
+    только при обращении к circles и selected. Для воспроизведения уровня сохраняются
+    начальное значение его генератора, поток нажатий со временем (см. pack_clicks) и длительность
+    показа кружков, от которой отсчитываются нажатия; в записях, сделанных до их появления,
+    seed и show_ms равны None.
+    """
+
+    __slots__ = (
+        "datetime",
+        "grid_size",
+        "num_circles",
+        "circles_mask",
+        "selected_cells",
+        "score",
+        "streak",
+        "result",
+        "seed",
+        "clicks",
+        "show_ms",
+    )
+
+    def __init__(
+        self,
+        datetime: str,
+        grid_size: str,
+        num_circles: int,
+        circles_mask: int,
+        selected_cells: bytes,
+        score: int,
+        streak: int,
+        result: str,
+        seed: int | None = None,
+        clicks: bytes = b"",
+        show_ms: int | None = None,
+    ) -> None:
+        """
+        Инициализирует запись.
+
+        :param datetime: Дата и время игры.
+        :param grid_size: Размер поля вида "3x3".
+        :param num_circles: Количество кружков.
+        :param circles_mask: Битовая маска кружков (см. encode_mask).
+        :param selected_cells: Упакованные выбранные клетки (см. pack_cells).
+        :param score: Количество побед.
+        :param streak: Серия побед.
+        :param result: Результат уровня ("win" или "loss").
+        :param seed: Начальное значение генератора уровня или None, если оно неизвестно.
+        :param clicks: Упакованный поток нажатий (см. pack_clicks).
+        :param show_ms: Длительность показа кружков в миллисекундах или None, если она неизвестна.
+        """
+        self.datetime = datetime
+        self.grid_size = grid_size
+        self.num_circles = num_circles
+        self.circles_mask = circles_mask
+        self.selected_cells = selected_cells
+        self.score = score
+        self.streak = streak
+        self.result = result
+        self.seed = seed
+        self.clicks = clicks
+        self.show_ms = show_ms
+
+    @classmethod
+    def create(
+        cls,
+        datetime: str,
+        size_x: int,
+        size_y: int,
+        num_circles: int,
+        circles: list[tuple[int, int]],
+        selected: list[tuple[int, int]],
+        score: int,
+        streak: int,
+        result: str,
+        seed: int | None = None,
+        clicks: list[tuple[int, int, int]] = (),
+        show_ms: int | None = None,
+    ) -> "HistoryRecord":
+        """
+        Создает запись из позиций клеток.
+
+        :param datetime: Дата и время игры.
+        :param size_x: Ширина поля.
+        :param size_y: Высота поля.
+        :param num_circles: Количество кружков.
+        :param circles: Позиции кружков.
+        :param selected: Позиции выбранных клеток в порядке выбора.
+        :param score: Количество побед.
+        :param streak: Серия побед.
+        :param result: Результат уровня.
+        :param seed: Начальное значение генератора уровня.
+        :param clicks: Нажатия (мс от начала уровня, x, y) в порядке времени.
+        :param show_ms: Длительность показа кружков в миллисекундах.
+        :return: Новая запись.
+        """
+        return cls(
+            datetime,
+            f"{size_x}x{size_y}",
+            num_circles,
+            encode_mask(circles, size_x),
+            pack_cells(selected, size_x, size_y),
+            score,
+            streak,
+            result,
+            seed,
+            pack_clicks(clicks, size_x, size_y),
+            show_ms,
+        )
+
+    @property
+    def size(self) -> tuple[int, int]:
+        """
+        Размер поля.
+
+        :return: Ширина и высота поля.
+        """
+        return parse_grid_size(self.grid_size)
+
+    @property
+    def circles(self) -> list[tuple[int, int]]:
+        """
+        Позиции кружков, раскодированные из битовой маски.
+
+        :return: Список позиций (x, y).
+        """
+        return decode_mask(self.circles_mask, self.size[0])
+
+    @property
+    def selected(self) -> list[tuple[int, int]]:
+        """
+        Выбранные клетки в порядке выбора.
+
+        :return: Список позиций (x, y).
+        """
+        return unpack_cells(self.selected_cells, *self.size)
+
+    @property
+    def click_stream(self) -> list[tuple[int, int, int]]:
+        """
+        Нажатия уровня со временем.
+
+        :return: Список нажатий (мс от начала уровня, x, y); пустой для старых записей.
+        """
+        return unpack_clicks(self.clicks, *self.size)
+
+    def to_dict(self) -> dict:
+        """
+        Преобразует запись в словарь для сохранения в JSON: кружки и выбранные клетки
+        сохраняются упакованными номерами клеток в строке base64. Для кружков это короче
+        маски, на больших полях - во много раз. Поток нажатий тоже сохраняется в base64;
+        у старых записей без seed и без длительности показа этих полей нет.
+
+        :return: Словарь с полями записи.
+        """
+        size_x, size_y = self.size
+        circles = pack_cells(decode_mask(self.circles_mask, size_x), size_x, size_y)
+        data = {
+            "datetime": self.datetime,
+            "grid_size": self.grid_size,
+            "num_circles": self.num_circles,
+            "circles": base64.b64encode(circles).decode("ascii"),
+            "selected": base64.b64encode(self.selected_cells).decode("ascii"),
+            "score": self.score,
+            "streak": self.streak,
+            "result": self.result,
+        }
+        if self.seed is not None:
+            data["seed"] = self.seed
+            data["clicks"] = base64.b64encode(self.clicks).decode("ascii")
+        if self.show_ms is not None:
+            data["show_ms"] = self.show_ms
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "HistoryRecord":
+        """
+        Восстанавливает запись из словаря. Поддерживает и компактный формат to_dict,
+        и старый формат со списками пар [x, y].
+
+        :param data: Словарь с полями записи.
+        :return: Запись истории.
+        """
+        size_x, size_y = parse_grid_size(data["grid_size"])
+        circles = data["circles"]
+        selected = data["selected"]
+        if isinstance(circles, str):
+            circles = unpack_cells(base64.b64decode(circles), size_x, size_y)
+        return cls(
+            data["datetime"],
+            data["grid_size"],
+            data["num_circles"],
+            encode_mask(circles, size_x),
+            base64.b64decode(selected) if isinstance(selected, str) else pack_cells(selected, size_x, size_y),
+            data["score"],
+            data.get("streak", 0),
+            data["result"],
+            data.get("seed"),
+            base64.b64decode(data.get("clicks") or ""),
+            data.get("show_ms"),
+        )
@@ -0,0 +1,143 @@
+import functools
+import pygame
+from src import consts
+
+
+@functools.lru_cache(maxsize=4)
+def grid_surface(size_x: int, size_y: int, width: int, height: int) -> pygame.Surface:
+    """
+    Возвращает заранее отрисованное поле: фон и сетку. Поверхность строится один раз для
+    каждого сочетания размера поля и окна и не должна изменяться вызывающим кодом.
+    Сетка рисуется линиями, поэтому стоимость растет с числом строк и столбцов, а не клеток.
+
+    :param size_x: Ширина поля в клетках.
+    :param size_y: Высота поля в клетках.
+    :param width: Ширина окна в пикселях.
+    :param height: Высота окна в пикселях.
+    :return: Поверхность с отрисованной сеткой.
+    """
+    cell_width = width / size_x
+    cell_height = height / size_y
+    surface = pygame.Surface((width, height))
+    surface.fill(consts.GUIConsts.BACKGROUND)
+    for x in range(size_x + 1):
+        left = min(int(x * cell_width), width - 1)
+        pygame.draw.line(surface, consts.GUIConsts.GRID_COLOR, (left, 0), (left, height - 1))
+    for y in range(size_y + 1):
+        top = min(int(y * cell_height), height - 1)
+        pygame.draw.line(surface, consts.GUIConsts.GRID_COLOR, (0, top), (width - 1, top))
+    return surface
+
+
+@functools.lru_cache(maxsize=32)
+def circle_sprite(radius: int, color: tuple[int, int, int]) -> pygame.Surface:
+    """
+    Возвращает заранее отрисованный кружок заданного радиуса и цвета на прозрачном фоне.
+
+    :param radius: Радиус кружка в пикселях.
+    :param color: Цвет кружка.
+    :return: Поверхность размером 2 * radius с кружком в центре.
+    """
+    surface = pygame.Surface((2 * radius, 2 * radius), pygame.SRCALPHA)
+    pygame.draw.circle(surface, color, (radius, radius), radius)
+    return surface
+
+
+def heatmap_surface(values, cell_size: int, color: tuple[int, int, int]) -> pygame.Surface:
+    """
+    Рисует тепловую карту поля: чем больше значение в клетке, тем ближе ее цвет к color.
+
+    :param values: Массив NumPy (size_y, size_x) с неотрицательными значениями.
+    :param cell_size: Размер клетки в пикселях.
+    :param color: Цвет клетки с максимальным значением.
+    :return: Поверхность с картой и сеткой.
+    """
+    peak = values.max()
+    intensity = values / peak if peak > 0 else values * 0.0
+    background = consts.GUIConsts.BACKGROUND
+    size_y, size_x = values.shape
+    # Массив пикселей (x, y, RGB): одна точка на клетку, затем масштабирование до cell_size
+    rgb = intensity.T[:, :, None] * [c - b for c, b in zip(color, background)] + background
+    width, height = size_x * cell_size, size_y * cell_size
+    surface = pygame.transform.scale(pygame.surfarray.make_surface(rgb.astype("uint8")), (width, height))
+    # На экспертных полях клетки мелкие, и сетка закрыла бы карту
+    if cell_size < 6:
+        return surface
+    for x in range(size_x + 1):
+        pygame.draw.line(surface, consts.GUIConsts.GRID_COLOR, (x * cell_size, 0), (x * cell_size, height))
+    for y in range(size_y + 1):
+        pygame.draw.line(surface, consts.GUIConsts.GRID_COLOR, (0, y * cell_size), (width, y * cell_size))
+    return surface
+
+
+# --- Отрисовка игрового поля ---
+class GridRenderer:
+    """
+    Отрисовка игрового поля из кэшированных поверхностей: сетка рисуется один раз,
+    кружки копируются из готовых спрайтов, а на экран выводятся только изменившиеся области.
+    Слой поля рисуется в собственных координатах и выводится в прямоугольник rect окна.
+    """
+
+    def __init__(self, size_x: int, size_y: int, rect: pygame.Rect) -> None:
+        """
+        Инициализирует отрисовку поля.
+
+        :param size_x: Ширина поля в клетках.
+        :param size_y: Высота поля в клетках.
+        :param rect: Область окна, которую занимает поле.
+        """
+        self.size_x = size_x
+        self.size_y = size_y
+        self.rect = pygame.Rect(rect)
+        self.cell_width = self.rect.width / size_x
+        self.cell_height = self.rect.height / size_y
+        self.circle_radius = max(1, int(min(self.cell_width, self.cell_height) / 3))
+        self.grid = grid_surface(size_x, size_y, self.rect.width, self.rect.height)
+
+    def new_board(self) -> pygame.Surface:
+        """
+        Создает слой поля без кружков, на который затем наносятся выбранные клетки.
+
+        :return: Копия кэшированной сетки.
+        """
+        return self.grid.copy()
+
+    def cell_at(self, pos: tuple[int, int]) -> tuple[int, int]:
+        """
+        Возвращает клетку поля, в которую попадает точка экрана.
+
+        :param pos: Координаты точки на экране.
+        :return: Координаты клетки (x, y) или None, если точка вне поля.
+        """
+        if not self.rect.collidepoint(pos):
+            return None
+        x = min(int((pos[0] - self.rect.x) // self.cell_width), self.size_x - 1)
+        y = min(int((pos[1] - self.rect.y) // self.cell_height), self.size_y - 1)
+        return x, y
+
+    def cell_center(self, x: int, y: int) -> tuple[int, int]:
+        """
+        Возвращает центр клетки в координатах экрана.
+
+        :param x: Столбец клетки.
+        :param y: Строка клетки.
+        :return: Координаты точки на экране.
+        """
+        return int(self.rect.x + (x + 0.5) * self.cell_width), int(self.rect.y + (y + 0.5) * self.cell_height)
+
+    def draw_circle(
+        self, surface: pygame.Surface, x: int, y: int, color: tuple[int, int, int]
+    ) -> pygame.Rect:
+        """
+        Рисует кружок в центре клетки (x, y).
+
+        :param surface: Слой поля для рисования.
+        :param x: Столбец клетки.
+        :param y: Строка клетки.
+        :param color: Цвет кружка.
+        :return: Прямоугольник слоя поля, занятый кружком.
+        """
+        center_x = int(x * self.cell_width + self.cell_width / 2)
+        center_y = int(y * self.cell_height + self.cell_height / 2)
+        sprite = circle_sprite(self.circle_radius, color)
+        return surface.blit(sprite, (center_x - self.circle_radius, center_y - self.circle_radius))
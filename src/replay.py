@@ -0,0 +1,182 @@
+import itertools
+import time
+
+from src import engine, records, statistic, storage
+
+
+def load_session(path: str, levels: int | None = None) -> list[records.HistoryRecord]:
+    """
+    Загружает последние уровни истории, которые можно воспроизвести (с сохраненным seed),
+    в порядке, в котором они были сыграны.
+
+    :param path: Путь к файлу истории (хранилище выбирается по расширению).
+    :param levels: Количество последних уровней или None, чтобы загрузить все.
+    :return: Список записей от старых к новым.
+    """
+    history_storage = storage.open_history(path)
+    try:
+        replayable = (record for record in history_storage.iter_newest() if record.seed is not None)
+        session = list(itertools.islice(replayable, levels))
+    finally:
+        history_storage.close()
+    session.reverse()
+    return session
+
+
+def replay_level(record: records.HistoryRecord) -> engine.Level:
+    """
+    Воспроизводит уровень записи: расставляет кружки с ее seed и повторяет ее нажатия.
+
+    :param record: Запись истории с seed.
+    :return: Модель уровня после всех нажатий.
+    """
+    size_x, size_y = record.size
+    level = engine.Level(size_x, size_y, record.circles_mask.bit_count(), record.seed)
+    for time_ms, x, y in record.click_stream:
+        level.click(x, y, time_ms)
+    return level
+
+
+def matches_record(level: engine.Level, record: records.HistoryRecord) -> bool:
+    """
+    Проверяет, что воспроизведенный уровень совпал с записью.
+
+    :param level: Воспроизведенный уровень.
+    :param record: Исходная запись.
+    :return: True, если совпали и расстановка кружков, и результат.
+    """
+    return level.circle_mask == record.circles_mask and level.result == record.result
+
+
+def replay_headless(
+    session: list[records.HistoryRecord], stats: statistic.StatsManager | None = None, repeat: int = 1
+) -> dict:
+    """
+    Проигрывает уровни без окна и без пауз между нажатиями, с максимальной скоростью.
+
+    :param session: Воспроизводимые записи (см. load_session).
+    :param stats: Если задан, воспроизведенные уровни записываются в его историю:
+        так воспроизведение служит генератором нагрузки на хранилище.
+    :param repeat: Сколько раз проиграть сеанс.
+    :return: Словарь: количество уровней, нажатий и несовпадений с записями, время в секундах
+        и скорость в уровнях в секунду.
+    """
+    levels = clicks = mismatches = 0
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for record in session:
+            level = replay_level(record)
+            levels += 1
+            clicks += len(level.clicks)
+            mismatches += not matches_record(level, record)
+            if stats is not None:
+                stats.record(
+                    level.size_x,
+                    level.size_y,
+                    record.num_circles,
+                    level.circles,
+                    level.selected_positions,
+                    record.score,
+                    record.streak,
+                    level.result or record.result,
+                    seed=level.seed,
+                    clicks=level.clicks,
+                    show_ms=record.show_ms,
+                )
+    elapsed = time.perf_counter() - start
+    return {
+        "levels": levels,
+        "clicks": clicks,
+        "mismatches": mismatches,
+        "elapsed_s": elapsed,
+        "levels_per_second": levels / elapsed if elapsed else 0.0,
+    }
+
+
+# --- Воспроизведение в окне игры ---
+class Replayer:
+    """
+    Очередь воспроизводимых уровней для окна игры. Уровни проигрываются в реальном времени
+    через обычную сцену уровня, поэтому воспроизводятся и задержки отрисовки, на которые
+    жаловался игрок; вместе с --trace это дает трассировку того же сеанса.
+    """
+
+    def __init__(self, session: list[records.HistoryRecord]) -> None:
+        """
+        Инициализирует очередь.
+
+        :param session: Воспроизводимые записи (см. load_session).
+        """
+        self.session = session
+        self.position = 0  # Номер следующей записи
+        self.played = 0
+        self.mismatches = 0
+
+    def next_record(self) -> records.HistoryRecord | None:
+        """
+        Возвращает следующую запись сеанса.
+
+        :return: Запись или None, если сеанс закончился.
+        """
+        if self.position >= len(self.session):
+            return None
+        record = self.session[self.position]
+        self.position += 1
+        return record
+
+    @staticmethod
+    def create_engine(record: records.HistoryRecord) -> engine.GameEngine:
+        """
+        Создает игру в состоянии перед уровнем записи: размер поля, количество кружков, счет и серию.
+
+        :param record: Воспроизводимая запись.
+        :return: Объект GameEngine.
+        """
+        size_x, size_y = record.size
+        streak = record.streak - 1 if record.result == "win" else 0
+        return engine.GameEngine(size_x, size_y, record.circles_mask.bit_count(), record.score, 0, max(0, streak))
+
+    def check(self, level: engine.Level, record: records.HistoryRecord) -> None:
+        """
+        Сравнивает уровень с записью. Незавершенный уровень не совпадает с ней.
+
+        :param level: Воспроизведенный уровень.
+        :param record: Воспроизводимая запись.
+        """
+        self.played += 1
+        self.mismatches += not matches_record(level, record)
+
+    def summary(self) -> str:
+        """
+        Итог воспроизведения.
+
+        :return: Строка с количеством уровней и несовпадений.
+        """
+        return f"Воспроизведено уровней: {self.played} из {len(self.session)}, несовпадений: {self.mismatches}"
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Воспроизведение сыгранных уровней без окна.")
+    parser.add_argument("history_path", help="Файл истории (.json, .jsonl или .db).")
+    parser.add_argument("--levels", type=int, help="Количество последних уровней (по умолчанию все).")
+    parser.add_argument("--repeat", type=int, default=1, help="Сколько раз проиграть сеанс.")
+    parser.add_argument(
+        "--record-to",
+        metavar="PATH",
+        help="Записывать воспроизведенные уровни в эту историю (генератор нагрузки на хранилище).",
+    )
+    args = parser.parse_args()
+
+    levels_session = load_session(args.history_path, args.levels)
+    target = statistic.StatsManager(args.record_to) if args.record_to else None
+    try:
+        result = replay_headless(levels_session, target, args.repeat)
+    finally:
+        if target is not None:
+            target.close()
+    print(
+        f"Уровней: {result['levels']}, нажатий: {result['clicks']}, несовпадений: {result['mismatches']},"
+        f" {result['elapsed_s']:.2f} с ({result['levels_per_second']:.0f} уровней/с)"
+    )
@@ -0,0 +1,687 @@
+import pygame
+import pygame_gui
+from src import consts, engine, records, render
+
+
+# --- Базовый класс сцены ---
+class Scene:
+    """
+    Базовый класс экрана игры. Сцена не содержит собственного цикла: главный цикл
+    Game.run передает ей события, вызывает обновление и отрисовку.
+    """
+
+    def __init__(self, game) -> None:
+        """
+        Инициализирует сцену.
+
+        :param game: Объект игры, которому принадлежит сцена.
+        """
+        self.game = game
+        self.screen = game.screen
+        self.ui_manager = game.ui_manager
+        self.widgets = {}  # Элементы интерфейса сцены: имя атрибута -> элемент
+
+    def enter(self) -> None:
+        """
+        Вызывается при переходе на сцену: показ элементов интерфейса.
+        """
+        self.show_widgets()
+
+    def exit(self) -> None:
+        """
+        Вызывается при уходе со сцены: элементы интерфейса скрываются, но не удаляются.
+        """
+        self.hide_widgets()
+
+    def create_widgets(self) -> dict:
+        """
+        Создание элементов интерфейса сцены. Вызывается один раз за игру для каждого класса
+        сцены; при следующих переходах на сцену те же элементы показываются снова.
+
+        :return: Словарь {имя атрибута: элемент pygame_gui}.
+        """
+        return {}
+
+    def show_widgets(self) -> None:
+        """
+        Показ элементов интерфейса сцены. При первом переходе на сцену этого класса они создаются,
+        дальше берутся из Game.widget_sets и доступны как атрибуты сцены.
+        """
+        widgets = self.game.widget_sets.get(type(self))
+        if widgets is None:
+            widgets = self.game.widget_sets[type(self)] = self.create_widgets()
+        self.widgets = widgets
+        for name, element in widgets.items():
+            setattr(self, name, element)
+            element.show()
+
+    def hide_widgets(self) -> None:
+        """
+        Скрытие элементов интерфейса сцены.
+        """
+        for element in self.widgets.values():
+            element.hide()
+
+    def handle_events(self, events: list[pygame.event.Event]) -> None:
+        """
+        Обработка событий, накопленных за кадр.
+
+        :param events: Список событий pygame.
+        """
+
+    def is_animating(self) -> bool:
+        """
+        Нужна ли сцене перерисовка без входящих событий. Если нет, главный цикл
+        в режиме ожидания блокируется до следующего события.
+
+        :return: True, если на сцене что-то меняется само по себе.
+        """
+        return False
+
+    def invalidate(self) -> None:
+        """
+        Требует перерисовать весь экран в следующем кадре (например, после скрытия оверлея).
+        Сцены без частичной перерисовки и так перерисовывают экран каждый кадр.
+        """
+
+    def update(self, time_delta: float) -> None:
+        """
+        Обновление состояния сцены.
+
+        :param time_delta: Время с предыдущего кадра в секундах.
+        """
+        self.ui_manager.update(time_delta)
+
+    def draw(self) -> list[pygame.Rect] | None:
+        """
+        Отрисовка сцены на экране.
+
+        :return: Список обновленных областей экрана или None, если нужно обновить весь экран.
+        """
+        self.screen.fill(consts.GUIConsts.BACKGROUND)
+        self.ui_manager.draw_ui(self.screen)
+
+    def _create_exit_button(self) -> pygame_gui.elements.UIButton:
+        """
+        Создание кнопки для выхода на приветственный экран.
+        """
+        return pygame_gui.elements.UIButton(
+            relative_rect=pygame.Rect(consts.GUIConsts.EXIT_BUTTON_RECT),
+            text="X",
+            manager=self.ui_manager,
+        )
+
+
+
+# --- Приветственный экран ---
+class WelcomeScene(Scene):
+    """
+    Приветственный экран с кнопками 'Новая игра' и 'Статистика'.
+    """
+
+    def create_widgets(self) -> dict:
+        """
+        Создание кнопок для новой игры и статистики.
+        """
+        return {
+            "new_game_button": pygame_gui.elements.UIButton(
+                relative_rect=pygame.Rect(
+                    (consts.GUIConsts.WIDTH // 2 - 100, consts.GUIConsts.HEIGHT // 2 - 50), (200, 50)
+                ),
+                text="Новая игра",
+                manager=self.ui_manager,
+            ),
+            "stats_button": pygame_gui.elements.UIButton(
+                relative_rect=pygame.Rect(
+                    (consts.GUIConsts.WIDTH // 2 - 100, consts.GUIConsts.HEIGHT // 2 + 20), (200, 50)
+                ),
+                text="Статистика",
+                manager=self.ui_manager,
+            ),
+        }
+
+    def handle_events(self, events: list[pygame.event.Event]) -> None:
+        for event in events:
+            self.ui_manager.process_events(event)
+
+            # Обработка нажатий на кнопки
+            if event.type == pygame.USEREVENT:
+                if event.user_type == pygame_gui.UI_BUTTON_PRESSED:
+                    if event.ui_element == self.new_game_button:
+                        self.game.select_grid_size()
+                        return
+                    elif event.ui_element == self.stats_button:
+                        self.game.show_statistics()
+                        return
+
+
+# --- Экран выбора размера поля ---
+class GridSizeScene(Scene):
+    """
+    Экран выбора размера поля для игры. Ползунки сохраняют выбранный размер между посещениями.
+    """
+
+    def create_widgets(self) -> dict:
+        """
+        Создание ползунков, подписей и кнопок.
+        """
+        return {
+            # Кнопка выхода
+            "exit_button": self._create_exit_button(),
+            # Ползунки для выбора ширины и высоты поля
+            "slider_width": pygame_gui.elements.UIHorizontalSlider(
+                relative_rect=pygame.Rect(
+                    (consts.GUIConsts.WIDTH // 2 - 125, consts.GUIConsts.HEIGHT // 2 - 90), (260, 33)
+                ),
+                start_value=consts.GridConsts.DEFAULT_SIZE,
+                value_range=(consts.GridConsts.MIN_SIZE, consts.GridConsts.MAX_SIZE),
+                manager=self.ui_manager,
+            ),
+            "slider_height": pygame_gui.elements.UIHorizontalSlider(
+                relative_rect=pygame.Rect(
+                    (consts.GUIConsts.WIDTH // 2 - 125, consts.GUIConsts.HEIGHT // 2), (260, 33)
+                ),
+                start_value=consts.GridConsts.DEFAULT_SIZE,
+                value_range=(consts.GridConsts.MIN_SIZE, consts.GridConsts.MAX_SIZE),
+                manager=self.ui_manager,
+            ),
+            # Лейблы для отображения текущего значения ползунков
+            "label_width": pygame_gui.elements.UILabel(
+                relative_rect=pygame.Rect(
+                    (consts.GUIConsts.WIDTH // 2 - 150, consts.GUIConsts.HEIGHT // 2 - 130), (300, 25)
+                ),
+                text=self._size_text("Ширина поля", consts.GridConsts.DEFAULT_SIZE),
+                manager=self.ui_manager,
+            ),
+            "label_height": pygame_gui.elements.UILabel(
+                relative_rect=pygame.Rect(
+                    (consts.GUIConsts.WIDTH // 2 - 150, consts.GUIConsts.HEIGHT // 2 - 40), (300, 25)
+                ),
+                text=self._size_text("Высота поля", consts.GridConsts.DEFAULT_SIZE),
+                manager=self.ui_manager,
+            ),
+            # Кнопка для начала игры
+            "start_button": pygame_gui.elements.UIButton(
+                relative_rect=pygame.Rect(
+                    (consts.GUIConsts.WIDTH // 2 - 100, consts.GUIConsts.HEIGHT // 2 + 70), (200, 50)
+                ),
+                text="Начать",
+                manager=self.ui_manager,
+            ),
+        }
+
+    def handle_events(self, events: list[pygame.event.Event]) -> None:
+        for event in events:
+            self.ui_manager.process_events(event)
+            if event.type == pygame.USEREVENT:
+                if event.user_type == pygame_gui.UI_HORIZONTAL_SLIDER_MOVED:
+                    if event.ui_element == self.slider_width:
+                        self.label_width.set_text(
+                            self._size_text("Ширина поля", int(self.slider_width.get_current_value()))
+                        )
+                    elif event.ui_element == self.slider_height:
+                        self.label_height.set_text(
+                            self._size_text("Высота поля", int(self.slider_height.get_current_value()))
+                        )
+                if event.user_type == pygame_gui.UI_BUTTON_PRESSED:
+                    if event.ui_element == self.start_button:
+                        size_x = int(self.slider_width.get_current_value())
+                        size_y = int(self.slider_height.get_current_value())
+                        self.game.start_game(size_x, size_y, num_circles=1, wins=0, errors=0, streak=0)
+                        return
+                    elif event.ui_element == self.exit_button:
+                        self.game.welcome_screen()
+                        return
+
+    @staticmethod
+    def _size_text(title: str, size: int) -> str:
+        """
+        Текст подписи ползунка; экспертные размеры поля отмечаются.
+
+        :param title: Название размера.
+        :param size: Текущее значение ползунка.
+        :return: Текст подписи.
+        """
+        if size >= consts.GridConsts.EXPERT_SIZE:
+            return f"{title}: {size} (эксперт)"
+        return f"{title}: {size}"
+
+
+# --- Экран статистики ---
+class StatisticsScene(Scene):
+    """
+    Отображение статистики игры через pygame_menu.
+    """
+
+    def enter(self) -> None:
+        """
+        Построение меню статистики.
+        """
+        self.menu = self.build_menu()
+
+    def handle_events(self, events: list[pygame.event.Event]) -> None:
+        # Выход из игры обрабатывает главный цикл: pygame_menu при QUIT завершил бы процесс сам
+        if self.menu.is_enabled():
+            self.menu.update(
+                [event for event in events if event.type not in (pygame.QUIT, pygame.WINDOWCLOSE)]
+            )
+        # Меню закрыто (Esc) - возвращаемся на приветственный экран
+        if not self.menu.is_enabled():
+            self.game.welcome_screen()
+
+    def update(self, time_delta: float) -> None:
+        pass
+
+    def draw(self) -> None:
+        if self.menu.is_enabled():
+            self.menu.draw(self.screen)
+
+    def build_menu(self) -> "pygame_menu.Menu":
+        """
+        Построение меню статистики. Записи показываются постранично: виджеты создаются
+        один раз на страницу из GUIConsts.STATS_PAGE_SIZE записей и переиспользуются при
+        перелистывании, поэтому время открытия и память не зависят от размера истории.
+        """
+        # pygame_menu нужен только этому экрану: импортируется при первом открытии статистики
+        import pygame_menu
+
+        custom_theme = self._create_theme()
+        menu = pygame_menu.Menu(
+            title="",
+            width=consts.GUIConsts.WIDTH,
+            height=consts.GUIConsts.HEIGHT,
+            theme=custom_theme,
+            onclose=pygame_menu.events.CLOSE,
+        )
+
+        stats = self.game.stats
+        total = stats.count_games()
+        if not total:
+            menu.add.label("Нет данных", font_size=30)
+            return menu
+
+        page_size = consts.GUIConsts.STATS_PAGE_SIZE
+        page_count = (total - 1) // page_size + 1
+        current_page = 0
+
+        # Страница аналитики заполняется только при первом переходе на нее
+        menu.add.button("Тепловые карты и серии", self.create_analytics_menu(custom_theme))
+
+        # Панель навигации по страницам
+        navigation = menu.add.frame_h(
+            width=consts.GUIConsts.WIDTH - 80,
+            height=60,
+            background_color=consts.GUIConsts.BACKGROUND,
+            padding=0,
+        )
+        previous_button = menu.add.button("<", lambda: show_page(current_page - 1))
+        page_label = menu.add.label("", font_size=20)
+        next_button = menu.add.button(">", lambda: show_page(current_page + 1))
+        navigation.pack(previous_button, align=pygame_menu.locals.ALIGN_LEFT)
+        navigation.pack(page_label, align=pygame_menu.locals.ALIGN_CENTER)
+        navigation.pack(next_button, align=pygame_menu.locals.ALIGN_RIGHT)
+
+        # Рамки для записей одной страницы: создаются один раз и переиспользуются
+        entry_frames = []
+        entry_labels = []
+        for _ in range(min(page_size, total)):
+            game_frame = menu.add.frame_v(
+                width=consts.GUIConsts.WIDTH - 80,
+                height=140,
+                background_color=consts.GUIConsts.WIDGET_BACKGROUND,
+                padding=10,
+            )
+            game_frame._relax = True
+            entry_label = menu.add.label("", font_size=20, wordwrap=True)
+            game_frame.pack(entry_label, align=pygame_menu.locals.ALIGN_LEFT)
+            entry_frames.append(game_frame)
+            entry_labels.append(entry_label)
+
+        def show_page(page: int) -> None:
+            """
+            Заполнение рамок записями страницы page (от новых игр к старым). Записи страницы
+            читаются из окна последних игр или из хранилища; вся история в память не загружается.
+            """
+            nonlocal current_page
+            current_page = max(0, min(page, page_count - 1))
+            start = current_page * page_size
+            entries = stats.get_page(current_page, page_size)
+            for i, (game_frame, entry_label) in enumerate(zip(entry_frames, entry_labels)):
+                if i >= len(entries):
+                    game_frame.hide()
+                    continue
+                entry = entries[i]
+                entry_label.set_title(
+                    f"Игра {total - start - i} | {entry.datetime} | Результат: {entry.result}\n"
+                    f"Размер поля: {entry.grid_size} | Кружков: {entry.num_circles}\n"
+                    f"Счет: {entry.score} | Серия: {entry.streak}\n"
+                    f"Выбранные клетки: {entry.selected}"
+                )
+                game_frame.show()
+            page_label.set_title(f"Страница {current_page + 1} / {page_count}")
+            menu.scroll_to_widget(navigation)
+
+        show_page(0)
+        return menu
+
+    def create_analytics_menu(self, theme) -> "pygame_menu.Menu":
+        """
+        Создание пустой страницы аналитики: виджеты добавляются при первом переходе на нее,
+        поэтому открытие статистики не строит аналитику и не зависит от числа размеров поля.
+
+        :param theme: Тема меню статистики.
+        """
+        import pygame_menu
+
+        menu = pygame_menu.Menu(
+            title="", width=consts.GUIConsts.WIDTH, height=consts.GUIConsts.HEIGHT, theme=theme
+        )
+
+        def fill(_, analytics_menu: "pygame_menu.Menu") -> None:
+            analytics_menu.set_onbeforeopen(None)
+            self.fill_analytics_menu(analytics_menu)
+
+        menu.set_onbeforeopen(fill)
+        return menu
+
+    def fill_analytics_menu(self, menu: "pygame_menu.Menu") -> None:
+        """
+        Заполнение страницы аналитики: распределение серий побед по дням и тепловые карты
+        одного размера поля (появления кружков, ошибочные нажатия, доля найденных кружков).
+        Размеры поля перелистываются: три карты создаются один раз и перерисовываются,
+        поэтому число виджетов не зависит от числа размеров поля в истории.
+
+        :param menu: Пустая страница аналитики (см. create_analytics_menu).
+        """
+        import pygame_menu
+
+        menu.add.button("Назад", pygame_menu.events.BACK)
+        try:
+            analytics = self.game.stats.analytics
+        except ImportError:
+            menu.add.label("Для аналитики нужен NumPy", font_size=24)
+            return
+
+        menu.add.label("Серии побед по дням", font_size=24)
+        for day in analytics.streak_summary():
+            menu.add.label(
+                f"{day['day']}: уровней {day['games']}, средняя серия {day['mean']:.1f},"
+                f" 90% - не больше {day['p90']}, максимум {day['max']}",
+                font_size=16,
+            )
+
+        grid_sizes = sorted(analytics.grids, key=records.parse_grid_size)
+        if not grid_sizes:
+            return
+        current_page = 0
+
+        # Панель перелистывания размеров поля
+        navigation = menu.add.frame_h(
+            width=consts.GUIConsts.WIDTH - 80,
+            height=60,
+            background_color=consts.GUIConsts.BACKGROUND,
+            padding=0,
+        )
+        previous_button = menu.add.button("<", lambda: show_grid(current_page - 1))
+        grid_label = menu.add.label("", font_size=24)
+        next_button = menu.add.button(">", lambda: show_grid(current_page + 1))
+        navigation.pack(previous_button, align=pygame_menu.locals.ALIGN_LEFT)
+        navigation.pack(grid_label, align=pygame_menu.locals.ALIGN_CENTER)
+        navigation.pack(next_button, align=pygame_menu.locals.ALIGN_RIGHT)
+        menu.add.label("Кружки | Ошибки | Доля найденных", font_size=16)
+
+        # Карты одной страницы: виджеты создаются один раз, при перелистывании меняются их поверхности
+        heatmap_size = consts.GUIConsts.HEATMAP_SIZE
+        maps = menu.add.frame_h(
+            width=consts.GUIConsts.WIDTH - 80,
+            height=heatmap_size + 30,
+            background_color=consts.GUIConsts.BACKGROUND,
+            padding=0,
+        )
+        map_widgets = [menu.add.surface(pygame.Surface((1, 1))) for _ in range(3)]
+        for map_widget in map_widgets:
+            maps.pack(map_widget)
+
+        def show_grid(page: int) -> None:
+            """
+            Отрисовка тепловых карт размера поля с номером page.
+            """
+            nonlocal current_page
+            current_page = max(0, min(page, len(grid_sizes) - 1))
+            grid = analytics.grids[grid_sizes[current_page]]
+            grid_label.set_title(
+                f"Поле {grid_sizes[current_page]} ({current_page + 1} / {len(grid_sizes)}): уровней {grid.games}"
+            )
+            cell_size = max(1, heatmap_size // max(grid.size_x, grid.size_y))
+            for map_widget, (values, color) in zip(
+                map_widgets,
+                (
+                    (grid.circles, consts.GUIConsts.BLUE),
+                    (grid.wrong_clicks, consts.GUIConsts.RED),
+                    (grid.hit_rate, consts.GUIConsts.WIDGET_BACKGROUND),
+                ),
+            ):
+                map_widget.set_surface(render.heatmap_surface(values, cell_size, color))
+
+        show_grid(0)
+
+    def _create_theme(self) -> "pygame_menu.themes.Theme":
+        """
+        Создание темы меню статистики.
+        """
+        import pygame_menu
+
+        return pygame_menu.themes.Theme(
+            background_color=consts.GUIConsts.BACKGROUND,
+            title_background_color=consts.GUIConsts.BACKGROUND,
+            widget_font=self.game.font,
+            widget_font_color=consts.GUIConsts.WHITE,
+            widget_background_color=consts.GUIConsts.WIDGET_BACKGROUND,
+            widget_selection_effect=pygame_menu.widgets.HighlightSelection(),
+            widget_padding=10,
+        )
+
+
+# --- Экран уровня ---
+class LevelScene(Scene):
+    """
+    Основной игровой процесс. Отображение сетки, появление кружков, обработка выбора.
+    Переход на следующий уровень создает новую сцену вместо рекурсивного вызова.
+
+    Уровень проходит фазы: показ кружков, ввод игрока и показ результата. Длительности
+    фаз отсчитываются таймерами главного цикла, поэтому окно все это время отзывчиво.
+    При воспроизведении (replay_record) кружки расставляются с seed записи и показываются
+    столько же, сколько при записи, а ее нажатия подаются в очередь событий pygame в те же
+    моменты от начала уровня. Нажатия, пришедшие до окончания показа, откладываются до начала
+    ввода; уровень, не завершившийся нажатиями записи, считается несовпадением.
+    """
+
+    # Фазы уровня
+    SHOWING = "showing"  # Показ кружков, клики по полю игнорируются
+    INPUT = "input"  # Игрок выбирает клетки
+    FEEDBACK = "feedback"  # Показ результата перед следующим уровнем, клики по полю игнорируются
+
+    def __init__(self, game, game_engine: engine.GameEngine, replay_record=None) -> None:
+        """
+        Инициализирует уровень.
+
+        :param game: Объект игры.
+        :param game_engine: Правила и состояние текущей игры.
+        :param replay_record: Воспроизводимая запись истории (records.HistoryRecord) или None.
+        """
+        super().__init__(game)
+        self.engine = game_engine
+        self.replay_record = replay_record
+        self.started_ms = 0  # Время входа на уровень по pygame.time.get_ticks()
+        # Поле занимает окно под полосой подписей и кнопки выхода
+        self.renderer = render.GridRenderer(
+            game_engine.size_x, game_engine.size_y, pygame.Rect(consts.GUIConsts.BOARD_RECT)
+        )
+        self.board = self.renderer.new_board()  # Слой поля с выбранными клетками
+        self.dirty_rects = []  # Области поля, изменившиеся с прошлого кадра
+        self.full_redraw = True  # Нужна ли перерисовка всего экрана
+        self.level = None
+        self.timings = consts.TimingConsts.DIFFICULTY_TIMINGS[consts.TimingConsts.DIFFICULTY]
+        if replay_record is not None and replay_record.show_ms is not None:
+            # Нажатия записи отсчитаны от начала ее показа, поэтому показ длится столько же
+            self.timings = {**self.timings, "show": replay_record.show_ms}
+        self.phase = self.SHOWING
+        self.pending_replay_clicks = []  # Нажатия записи, пришедшие во время показа кружков
+        self.replay_timer = None  # Таймер, завершающий воспроизводимый уровень по истечении времени
+
+    def enter(self) -> None:
+        """
+        Генерация кружков, начало их показа игроку и показ элементов интерфейса.
+        """
+        # Генерация случайных позиций для кружков (при воспроизведении - с seed записи)
+        self.level = self.engine.start_level(None if self.replay_record is None else self.replay_record.seed)
+        self.started_ms = pygame.time.get_ticks()
+
+        # Слой поля с кружками на время показа
+        self.preview = self.renderer.new_board()
+        for cx, cy in self.level.circles:
+            self.renderer.draw_circle(self.preview, cx, cy, consts.GUIConsts.BLUE)
+        self.game.scheduler.schedule(self.timings["show"], self._start_input)
+        if self.replay_record is not None:
+            click_stream = self.replay_record.click_stream
+            for time_ms, x, y in click_stream:
+                self.game.scheduler.schedule(time_ms, lambda x=x, y=y: self._post_replay_click(x, y))
+            last_click_ms = max((time_ms for time_ms, _, _ in click_stream), default=0)
+            last_ms = max(self.timings["show"], last_click_ms)
+            self.replay_timer = self.game.scheduler.schedule(
+                last_ms + consts.ReplayConsts.LEVEL_TIMEOUT_MS, self._replay_timeout
+            )
+
+        # Элементы интерфейса общие для всех уровней: обновляется только их текст
+        self.show_widgets()
+        self.score_label.set_text(f"Выиграно: {self.engine.wins}")
+        self.record_label.set_text(f"Рекорд: {self.game.stats.get_record()}")
+
+    def create_widgets(self) -> dict:
+        """
+        Создание подписей счета и рекорда и кнопки выхода.
+        """
+        return {
+            "score_label": pygame_gui.elements.UILabel(
+                relative_rect=pygame.Rect(consts.GUIConsts.SCORE_LABEL_RECT),
+                text="",
+                manager=self.ui_manager,
+            ),
+            "record_label": pygame_gui.elements.UILabel(
+                relative_rect=pygame.Rect(consts.GUIConsts.RECORD_LABEL_RECT),
+                text="",
+                manager=self.ui_manager,
+            ),
+            "exit_button": self._create_exit_button(),
+        }
+
+    def draw(self) -> list[pygame.Rect] | None:
+        """
+        Отрисовка уровня. Слой поля копируется на экран целиком только при входе на уровень,
+        дальше - только изменившиеся клетки и области элементов интерфейса.
+
+        :return: Список обновленных областей экрана или None, если обновлен весь экран.
+        """
+        ui_rects = [
+            element.get_abs_rect().clip(self.screen.get_rect())
+            for element in (self.score_label, self.record_label, self.exit_button)
+        ]
+        board = self.preview if self.phase == self.SHOWING else self.board
+        if self.full_redraw:
+            self.full_redraw = False
+            self.dirty_rects = []
+            self.screen.fill(consts.GUIConsts.BACKGROUND)
+            self.screen.blit(board, self.renderer.rect)
+            self.ui_manager.draw_ui(self.screen)
+            return None
+        # Области слоя поля переводятся в координаты экрана; элементы интерфейса лежат на фоне полосы
+        screen_rects = [rect.move(self.renderer.rect.topleft) for rect in self.dirty_rects]
+        for rect, screen_rect in zip(self.dirty_rects, screen_rects):
+            self.screen.blit(board, screen_rect, rect)
+        self.dirty_rects = []
+        for rect in ui_rects:
+            self.screen.fill(consts.GUIConsts.BACKGROUND, rect)
+        self.ui_manager.draw_ui(self.screen)
+        return screen_rects + ui_rects
+
+    def handle_events(self, events: list[pygame.event.Event]) -> None:
+        for event in events:
+            if event.type != pygame.MOUSEBUTTONDOWN:
+                continue
+            if self.exit_button.get_abs_rect().collidepoint(event.pos):
+                self.game.welcome_screen()
+                return
+            # Во время показа кружков и результата клики по полю не накапливаются, а отбрасываются.
+            # Исключение - нажатия воспроизводимой записи во время показа (например, у записей
+            # симуляции без времени нажатий): они подаются заново с началом ввода
+            if self.phase != self.INPUT:
+                if self.phase == self.SHOWING and getattr(event, "replay", False):
+                    self.pending_replay_clicks.append(event)
+                continue
+            # При воспроизведении поле принимает только нажатия из записи
+            if self.replay_record is not None and not getattr(event, "replay", False):
+                continue
+            cell = self.renderer.cell_at(event.pos)
+            # Нажатия на полосу над полем не относятся к клеткам
+            if cell is None:
+                continue
+            x, y = cell
+            outcome = self.engine.click(x, y, pygame.time.get_ticks() - self.started_ms)
+            color = consts.GUIConsts.BLUE if self.level.is_circle(x, y) else consts.GUIConsts.RED
+            self.dirty_rects.append(self.renderer.draw_circle(self.board, x, y, color))
+            self.game.profiler.feedback_drawn()
+
+            # Обработка ошибок и выигрыша
+            if outcome in (engine.Outcome.MISS, engine.Outcome.WIN):
+                if self.replay_record is not None:
+                    self.game.replayer.check(self.level, self.replay_record)
+                else:
+                    with self.game.profiler.section("stats_record"):
+                        self.game.stats.record(**self.engine.last_record, show_ms=self.timings["show"])
+                delay_ms = self.timings["miss" if outcome == engine.Outcome.MISS else "win"]
+                self._finish_level(delay_ms)
+                return
+
+    def invalidate(self) -> None:
+        self.full_redraw = True
+
+    def _start_input(self) -> None:
+        """
+        Окончание показа кружков: поле очищается, игрок может выбирать клетки.
+        """
+        self.phase = self.INPUT
+        self.full_redraw = True
+        for event in self.pending_replay_clicks:
+            pygame.event.post(event)
+        self.pending_replay_clicks = []
+
+    def _finish_level(self, delay_ms: int) -> None:
+        """
+        Переход в фазу показа результата и планирование следующего уровня.
+
+        :param delay_ms: Длительность показа результата в миллисекундах.
+        """
+        self.phase = self.FEEDBACK
+        if self.replay_timer is not None:
+            # Уровень завершился: срок ожидания нажатий записи больше не нужен
+            self.game.scheduler.cancel(self.replay_timer)
+        self.game.scheduler.schedule(delay_ms, lambda: self.game.next_level(self.engine))
+
+    def _replay_timeout(self) -> None:
+        """
+        Уровень записи не завершился за отведенное время после ее последнего нажатия:
+        он считается несовпадением, и воспроизведение переходит к следующей записи.
+        """
+        self.game.replayer.check(self.level, self.replay_record)
+        self._finish_level(0)
+
+    def _post_replay_click(self, x: int, y: int) -> None:
+        """
+        Подача нажатия из воспроизводимой записи в очередь событий: оно проходит тот же путь,
+        что и нажатие игрока, включая замер задержки профилировщиком.
+
+        :param x: Столбец клетки.
+        :param y: Строка клетки.
+        """
+        pos = self.renderer.cell_center(x, y)
+        pygame.event.post(pygame.event.Event(pygame.MOUSEBUTTONDOWN, button=1, pos=pos, replay=True))
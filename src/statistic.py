@@ -1,43 +1,420 @@
+import collections
 import datetime
+import itertools
 import json
+from typing import Iterable, Iterator
+
+from src import records, storage
+
+
+# --- Класс для накопительной статистики ---
+class HistoryAggregates:
+    """
+    Накопительная статистика по истории игры: итоги, рекорд и показатели по размерам поля.
+    Обновляется по одной записи, поэтому запросы к ней не требуют просмотра истории.
+    """
+
+    def __init__(self) -> None:
+        """
+        Инициализирует пустую статистику.
+        """
+        self.games = 0  # Всего сыграно уровней
+        self.wins = 0  # Всего побед
+        self.losses = 0  # Всего поражений
+        self.circles = 0  # Сумма количества кружков по всем уровням
+        self.best_streak = 0  # Максимальная серия побед
+        self.grid_sizes = {}  # Показатели по каждому размеру поля
+
+    @property
+    def average_circles(self) -> float:
+        """
+        Среднее количество кружков на уровне.
+
+        :return: Среднее количество кружков или 0, если история пуста.
+        """
+        return self.circles / self.games if self.games else 0.0
+
+    def update(self, record: records.HistoryRecord) -> None:
+        """
+        Учитывает одну новую запись истории.
+
+        :param record: Запись истории игры.
+        """
+        streak = record.streak
+        is_win = record.result == "win"
+        self.games += 1
+        self.wins += is_win
+        self.losses += not is_win
+        self.circles += record.num_circles
+        self.best_streak = max(self.best_streak, streak)
+
+        grid = self.grid_sizes.setdefault(
+            record.grid_size, {"games": 0, "wins": 0, "losses": 0, "circles": 0, "best_streak": 0}
+        )
+        grid["games"] += 1
+        grid["wins"] += is_win
+        grid["losses"] += not is_win
+        grid["circles"] += record.num_circles
+        grid["best_streak"] = max(grid["best_streak"], streak)
+
+    @classmethod
+    def from_history(cls, history: Iterable[records.HistoryRecord]) -> "HistoryAggregates":
+        """
+        Строит статистику полным просмотром истории.
+
+        :param history: Записи истории игры (список или итератор).
+        :return: Заполненный объект HistoryAggregates.
+        """
+        aggregates = cls()
+        for record in history:
+            aggregates.update(record)
+        return aggregates
+
+    @classmethod
+    def from_grid_sizes(cls, grid_sizes: dict[str, dict]) -> "HistoryAggregates":
+        """
+        Строит статистику из готовых показателей по размерам поля.
+
+        :param grid_sizes: Словарь показателей по размерам поля.
+        :return: Заполненный объект HistoryAggregates.
+        """
+        aggregates = cls()
+        aggregates.grid_sizes = {grid_size: dict(stats) for grid_size, stats in grid_sizes.items()}
+        for stats in grid_sizes.values():
+            aggregates.games += stats["games"]
+            aggregates.wins += stats["wins"]
+            aggregates.losses += stats["losses"]
+            aggregates.circles += stats["circles"]
+            aggregates.best_streak = max(aggregates.best_streak, stats["best_streak"])
+        return aggregates
+
+    def to_dict(self) -> dict:
+        """
+        Преобразует статистику в словарь для сохранения в JSON.
+
+        :return: Словарь со статистикой.
+        """
+        return {
+            "games": self.games,
+            "wins": self.wins,
+            "losses": self.losses,
+            "circles": self.circles,
+            "best_streak": self.best_streak,
+            "grid_sizes": {grid_size: dict(stats) for grid_size, stats in self.grid_sizes.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "HistoryAggregates":
+        """
+        Восстанавливает статистику из словаря, сохраненного методом to_dict.
+
+        :param data: Словарь со статистикой.
+        :return: Объект HistoryAggregates.
+        """
+        aggregates = cls()
+        aggregates.games = data["games"]
+        aggregates.wins = data["wins"]
+        aggregates.losses = data["losses"]
+        aggregates.circles = data["circles"]
+        aggregates.best_streak = data["best_streak"]
+        aggregates.grid_sizes = data["grid_sizes"]
+        return aggregates
 
 # --- Класс для работы со статистикой ---
 class StatsManager:
     """
     Класс для работы с историей статистики игры. Загружает, сохраняет и записывает статистику.
+    В памяти держится только окно из последних recent_limit игр; более старые читаются
+    из хранилища потоком по мере необходимости. Если в ту же историю пишут другие процессы игры,
+    их записи добавляются к статистике методом merge_changes.
     """
 
-    def __init__(self, history_file: str) -> None:
+    def __init__(
+        self, history_file: str, history_storage: storage.HistoryStorage | None = None, recent_limit: int = 100
+    ) -> None:
         """
         Инициализирует объект StatsManager.
 
         :param history_file: Путь к файлу, в котором хранится история игры.
+        :param history_storage: Хранилище истории. Если не задано, выбирается по расширению файла
+            с политикой fsync из настроек игры (см. storage.open_history).
+        :param recent_limit: Количество последних игр, которые держатся в памяти.
         """
         self.history_file = history_file
-        # Загружаем историю, если файл существует.
-        self.history = self.load_history()
+        if history_storage is None:
+            history_storage = storage.open_history(history_file)
+        self.storage = history_storage
+        self.recent_limit = recent_limit
+        # Окно последних игр загружается при первом обращении к self.recent
+        self._recent = None
+        # Аналитика восстанавливается из файла (restore_analytics) или строится при первом обращении
+        self._analytics = None
+        self._analytics_changed = False  # Аналитика изменилась после последнего сохранения
+        # Накопительная статистика и аналитика хранятся рядом с историей
+        self.aggregates_file = history_file + ".stats.json"
+        self.analytics_file = history_file + ".analytics.json"
+        # Метка хранилища, до которой в статистике учтены записи других процессов
+        self._token = None
+        self.aggregates = self.load_aggregates()
+
+    @property
+    def recent(self) -> collections.deque:
+        """
+        Последние recent_limit игр в порядке от старых к новым. Загружаются из хранилища
+        при первом обращении и дополняются методом record.
 
-    def load_history(self) -> list[dict]:
+        :return: Очередь записей истории игры.
         """
-        Загружает историю из файла. Если файл не найден, возвращает пустой список.
+        if self._recent is None:
+            newest = list(itertools.islice(self.storage.iter_newest(), self.recent_limit))
+            self._recent = collections.deque(reversed(newest), maxlen=self.recent_limit)
+        return self._recent
+
+    @property
+    def analytics(self):
+        """
+        Тепловые карты и распределение серий (см. analytics.HistoryAnalytics). Если они не были
+        восстановлены из файла, строятся проходом по истории при первом обращении; дальше
+        дополняются методами record и merge_changes. Требует NumPy: без него обращение вызывает ImportError.
+
+        :return: Объект HistoryAnalytics.
+        """
+        self.merge_changes()
+        if self._analytics is None:
+            self.rebuild_analytics()
+        return self._analytics
+
+    def iter_history(
+        self, grid_size: str | None = None, result: str | None = None, offset: int = 0
+    ) -> Iterator[records.HistoryRecord]:
+        """
+        Перебирает историю от новых игр к старым, не загружая ее целиком.
+
+        :param grid_size: Фильтр по размеру поля вида "3x3".
+        :param result: Фильтр по результату уровня ("win" или "loss").
+        :param offset: Количество пропускаемых подходящих записей.
+        :return: Итератор по записям.
+        """
+        return self.storage.iter_newest(grid_size=grid_size, result=result, offset=offset)
+
+    def get_page(
+        self, page: int, page_size: int, grid_size: str | None = None, result: str | None = None
+    ) -> list[records.HistoryRecord]:
+        """
+        Возвращает страницу истории от новых игр к старым. Страницы, попадающие в окно
+        последних игр, берутся из памяти, остальные читаются из хранилища.
+
+        :param page: Номер страницы, начиная с 0.
+        :param page_size: Количество записей на странице.
+        :param grid_size: Фильтр по размеру поля вида "3x3".
+        :param result: Фильтр по результату уровня ("win" или "loss").
+        :return: Список записей страницы.
+        """
+        self.merge_changes()
+        start = page * page_size
+        if grid_size is None and result is None and start + page_size <= len(self.recent):
+            return [self.recent[-1 - i] for i in range(start, start + page_size)]
+        return list(itertools.islice(self.iter_history(grid_size, result, offset=start), page_size))
+
+    def count_games(self, grid_size: str | None = None, result: str | None = None) -> int:
+        """
+        Возвращает количество игр, подходящих под фильтр, по накопительной статистике.
+
+        :param grid_size: Фильтр по размеру поля вида "3x3".
+        :param result: Фильтр по результату уровня ("win" или "loss").
+        :return: Количество игр.
+        """
+        self.merge_changes()
+        if grid_size is None:
+            stats = {"games": self.aggregates.games, "wins": self.aggregates.wins, "losses": self.aggregates.losses}
+        else:
+            stats = self.aggregates.grid_sizes.get(grid_size, {"games": 0, "wins": 0, "losses": 0})
+        if result is None:
+            return stats["games"]
+        return stats["wins"] if result == "win" else stats["losses"]
+
+    def load_history(self) -> list[records.HistoryRecord]:
+        """
+        Загружает всю историю из файла. Если файл не найден, возвращает пустой список.
+        Для просмотра истории используйте iter_history и get_page: они не держат ее в памяти.
 
         :return: Список записей истории игры.
         """
-        try:
-            with open(self.history_file) as f:
-                return json.load(f)
-        except FileNotFoundError:
-            # Если файл не найден, возвращаем пустой список
-            return []
+        return self.storage.load()
 
     def save_history(self) -> None:
         """
-        Сохраняет текущую историю в файл.
+        Компактирует историю: файл перезаписывается своим текущим содержимым под межпроцессной
+        блокировкой, поэтому записи, добавленные другими процессами, сохраняются.
+        Статистика после этого пересчитывается.
 
         :return: None
         """
-        with open(self.history_file, "w") as f:
-            json.dump(self.history, f, indent=4)
+        self.storage.compact()
+        self.rebuild_aggregates()
+
+    def merge_changes(self) -> int:
+        """
+        Добавляет к статистике записи, сохраненные в историю другими процессами игры.
+        Проверка стоит одного обращения к файлу, если ничего не изменилось.
+
+        :return: Количество добавленных записей (после полного пересчета - количество всех игр).
+        """
+        count = self._apply_changes()
+        if count:
+            self.save_aggregates()
+        return count
+
+    def _apply_changes(self) -> int:
+        """
+        Учитывает записи других процессов в памяти, не сохраняя статистику.
+
+        :return: Количество добавленных записей (после полного пересчета - количество всех игр).
+        """
+        changes, token = self.storage.changes_since(self._token)
+        if changes is None:
+            # Другой процесс перезаписал историю: метка больше не указывает на конец учтенных записей
+            self.rebuild_aggregates()
+            return self.aggregates.games
+        self._token = token
+        for record in changes:
+            self.aggregates.update(record)
+            if self._analytics is not None:
+                self._analytics.update(record)
+                self._analytics_changed = True
+        if changes:
+            # Окно последних игр перечитывается: чужие записи могут оказаться между своими
+            self._recent = None
+        return len(changes)
+
+    def rebuild_aggregates(self) -> None:
+        """
+        Пересчитывает накопительную статистику по всей истории и сбрасывает окно последних игр
+        и аналитику. Чтение выполняется под межпроцессной блокировкой вместе с получением метки.
+
+        :return: None
+        """
+
+        def build(history_storage: storage.HistoryStorage) -> HistoryAggregates:
+            return HistoryAggregates.from_grid_sizes(history_storage.grid_size_stats())
+
+        self.aggregates, self._token = self.storage.snapshot(build)
+        self._recent = None
+        self._analytics = None
+        self.save_aggregates()
+
+    def rebuild_analytics(self) -> None:
+        """
+        Строит аналитику по всей истории и сохраняет ее. Накопительная статистика пересчитывается
+        тем же проходом, чтобы обе соответствовали одной метке хранилища.
+
+        :return: None
+        """
+        from src import analytics
+
+        def build(history_storage) -> tuple:
+            aggregates = HistoryAggregates()
+
+            def counted() -> Iterator[records.HistoryRecord]:
+                for record in history_storage.iter_newest():
+                    aggregates.update(record)
+                    yield record
+
+            return aggregates, analytics.HistoryAnalytics.from_records(counted())
+
+        (self.aggregates, self._analytics), self._token = self.storage.snapshot(build)
+        self._recent = None
+        self._analytics_changed = True
+        self.save_aggregates()
+        self.save_analytics()
+
+    def restore_analytics(self) -> bool:
+        """
+        Восстанавливает аналитику из файла, если она сохранена при той же метке хранилища,
+        что и накопительная статистика. Историю не читает.
+
+        :return: True, если аналитика восстановлена.
+        """
+        if self._analytics is not None:
+            return True
+        try:
+            with open(self.analytics_file) as f:
+                data = json.load(f)
+            if data["token"] != self._token:
+                return False
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            return False
+        from src import analytics
+
+        self._analytics = analytics.HistoryAnalytics.from_dict(data)
+        return True
+
+    def save_analytics(self) -> None:
+        """
+        Сохраняет аналитику, если она изменилась после последнего сохранения, с той же проверкой
+        меткой хранилища, что и накопительная статистика (см. _write_cache).
+
+        :return: None
+        """
+        if self._analytics is None or not self._analytics_changed:
+            return
+        self._analytics_changed = False
+        data = self._analytics.to_dict()
+        token = self._token
+        self.storage.submit(lambda: self._write_cache(self.analytics_file, data, token), key="analytics")
+
+    def load_aggregates(self) -> HistoryAggregates:
+        """
+        Загружает накопительную статистику из файла. Если файла нет или он не соответствует
+        текущему состоянию хранилища, статистика пересчитывается и сохраняется заново.
+
+        :return: Накопительная статистика.
+        """
+        try:
+            with open(self.aggregates_file) as f:
+                data = json.load(f)
+            if data["fingerprint"] == self.storage.fingerprint():
+                self._token = data["token"]
+                return HistoryAggregates.from_dict(data)
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            pass
+        self.rebuild_aggregates()
+        return self.aggregates
+
+    def save_aggregates(self) -> None:
+        """
+        Сохраняет накопительную статистику вместе с отпечатком состояния хранилища.
+        При отложенной записи сохранение выполняет фоновый поток после уже поставленных записей.
+
+        :return: None
+        """
+        data = self.aggregates.to_dict()
+        token = self._token
+        self.storage.submit(lambda: self._write_cache(self.aggregates_file, data, token), key="aggregates")
+
+    def _write_cache(self, path: str, data: dict, token) -> None:
+        """
+        Записывает снимок статистики в файл. Файл общий для всех процессов игры,
+        поэтому снимок сохраняется, только если после метки token в историю не писал никто другой:
+        иначе отпечаток хранилища не соответствовал бы статистике.
+
+        :param path: Путь к файлу снимка.
+        :param data: Статистика в виде словаря (см. HistoryAggregates.to_dict, HistoryAnalytics.to_dict).
+        :param token: Метка хранилища, до которой в статистике учтены записи других процессов.
+        """
+        # Предварительная проверка без блокировки: при активной записи других процессов снимок
+        # обычно устарел, и захватывать общую блокировку ради него незачем
+        changes, _ = self.storage.changes_since(token)
+        if changes is None or changes:
+            return
+        with self.storage.lock:
+            changes, _ = self.storage.changes_since(token)
+            if changes is None or changes:
+                return
+            data["fingerprint"] = self.storage.fingerprint()
+            data["token"] = self.storage.end_token()
+            # Статистику всегда можно пересчитать по истории, поэтому fsync для нее не нужен
+            storage.atomic_write(path, lambda f: json.dump(data, f), sync=False)
 
     def record(
         self,
@@ -49,6 +426,9 @@ class StatsManager:
         wins: int,
         streak: int,
         level_result: str,
+        seed: int | None = None,
+        clicks: list[tuple[int, int, int]] = (),
+        show_ms: int | None = None,
     ) -> None:
         """
         Добавляет новую запись в историю игры.
@@ -61,21 +441,37 @@ class StatsManager:
         :param wins: Количество побед.
         :param streak: Текущая серия побед.
         :param level_result: Результат игры ("win" или "loss").
+        :param seed: Начальное значение генератора уровня (для воспроизведения).
+        :param clicks: Нажатия уровня (мс от начала уровня, x, y).
+        :param show_ms: Длительность показа кружков (для воспроизведения).
         """
-        record = {
-            "datetime": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),  # Текущая дата и время
-            "grid_size": f"{size_x}x{size_y}",  # Размер поля
-            "num_circles": num_circles,  # Количество кружков
-            "circles": circles,  # Позиции кружков
-            "selected": selected_positions,  # Позиции выбранных клеток
-            "score": wins,  # Количество побед
-            "streak": streak,  # Серия побед
-            "result": level_result,  # Результат игры
-        }
-        # Добавляем запись в историю
-        self.history.append(record)
-        # Сохраняем обновленную историю
-        self.save_history()
+        record = records.HistoryRecord.create(
+            datetime=datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),  # Текущая дата и время
+            size_x=size_x,
+            size_y=size_y,
+            num_circles=num_circles,
+            circles=circles,  # Кодируются битовой маской поля
+            selected=selected_positions,  # Упаковываются в порядке выбора
+            score=wins,
+            streak=streak,
+            result=level_result,
+            seed=seed,
+            clicks=clicks,  # Интервалы между нажатиями и клетки, см. records.pack_clicks
+            show_ms=show_ms,
+        )
+        # Учитываем записи других процессов, чтобы снимок статистики ниже соответствовал хранилищу
+        self._apply_changes()
+        # Добавляем запись в окно последних игр, если оно уже загружено
+        if self._recent is not None:
+            self._recent.append(record)
+        # Сохраняем новую запись
+        self.storage.append(record)
+        # Обновляем накопительную статистику и аналитику, если она уже построена
+        self.aggregates.update(record)
+        if self._analytics is not None:
+            self._analytics.update(record)
+            self._analytics_changed = True
+        self.save_aggregates()
 
     def get_record(self) -> int:
         """
@@ -83,4 +479,24 @@ class StatsManager:
 
         :return: Максимальная серия побед.
         """
-        return max((record.get("streak", 0) for record in self.history), default=0)
+        self.merge_changes()
+        return self.aggregates.best_streak
+
+    def get_grid_size_stats(self) -> dict[str, dict]:
+        """
+        Возвращает статистику по каждому размеру поля.
+
+        :return: Словарь вида {"3x3": {"games": ..., "wins": ..., "losses": ..., "circles": ..., "best_streak": ...}}.
+        """
+        self.merge_changes()
+        return self.aggregates.grid_sizes
+
+    def close(self) -> None:
+        """
+        Завершает работу с хранилищем: сохраняет аналитику, чтобы следующий запуск восстановил ее
+        без прохода по истории, дожидается записи отложенных данных и освобождает ресурсы.
+
+        :return: None
+        """
+        self.save_analytics()
+        self.storage.close()
@@ -0,0 +1,1421 @@
+import abc
+import atexit
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import Callable, Iterator
+
+from src import consts
+from src.records import HistoryRecord
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+# --- Политики синхронизации журнала с диском ---
+class FsyncPolicy:
+    """
+    Класс для хранения допустимых политик вызова os.fsync при записи журнала.
+    """
+    ALWAYS = "always"  # fsync после каждой записи: запись переживает сбой питания
+    INTERVAL = "interval"  # fsync не чаще, чем раз в заданный интервал
+    NEVER = "never"  # только flush: синхронизацию выполняет операционная система
+
+    ALL = (ALWAYS, INTERVAL, NEVER)
+
+
+def matches(record: HistoryRecord, grid_size: str | None = None, result: str | None = None) -> bool:
+    """
+    Проверяет, подходит ли запись под фильтр по размеру поля и результату.
+
+    :param record: Запись истории игры.
+    :param grid_size: Размер поля вида "3x3" или None, если не фильтровать.
+    :param result: Результат уровня ("win" или "loss") или None, если не фильтровать.
+    :return: True, если запись подходит.
+    """
+    return (grid_size is None or record.grid_size == grid_size) and (result is None or record.result == result)
+
+
+def atomic_write(path: str, write: Callable, sync: bool = True, replace_attempts: int = 50) -> None:
+    """
+    Атомарно заменяет файл: содержимое пишется во временный файл рядом с ним, сбрасывается
+    на диск и подменяет исходный файл через os.replace. Читатели видят либо старую, либо новую
+    версию файла целиком. Имя временного файла уникально для процесса и потока.
+
+    :param path: Путь к заменяемому файлу.
+    :param write: Функция, записывающая содержимое в открытый текстовый файл.
+    :param sync: Сбрасывать временный файл на диск (os.fsync) перед заменой.
+    :param replace_attempts: Количество попыток замены. В Windows замена не удается,
+        пока файл открыт другим процессом для чтения, поэтому она повторяется.
+    """
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            write(f)
+            f.flush()
+            if sync:
+                os.fsync(f.fileno())
+        for attempt in range(replace_attempts):
+            try:
+                os.replace(tmp_path, path)
+                return
+            except PermissionError:
+                if attempt == replace_attempts - 1:
+                    raise
+                time.sleep(0.01)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+# --- Межпроцессная блокировка файла истории ---
+class FileLock:
+    """
+    Рекомендательная блокировка файла истории для нескольких процессов игры (fcntl.flock в POSIX,
+    msvcrt.locking в Windows). Блокируется отдельный файл <path>.lock, поэтому сам файл истории
+    можно атомарно подменять. Блокировка повторно входима в пределах потока и накапливает
+    показатели ожидания: так видна цена конкуренции между процессами.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Инициализирует блокировку.
+
+        :param path: Путь к защищаемому файлу.
+        """
+        self.path = path + ".lock"
+        self._thread_lock = threading.RLock()  # Потоки одного процесса ждут друг друга без системных вызовов
+        self._metrics_lock = threading.Lock()  # Показатели читаются, не дожидаясь освобождения блокировки
+        self._depth = 0
+        self._file = None
+        self._acquisitions = 0
+        self._contended = 0  # Захватов, при которых блокировку держал другой процесс
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def __enter__(self) -> "FileLock":
+        """
+        Захватывает блокировку, дожидаясь ее освобождения другими процессами.
+
+        :return: Сама блокировка.
+        """
+        self._thread_lock.acquire()
+        if self._depth == 0:
+            start = time.perf_counter()
+            try:
+                self._file = open(self.path, "a+b")
+                contended = not self._lock_file(blocking=False)
+                if contended:
+                    self._lock_file(blocking=True)
+            except BaseException:
+                if self._file is not None:
+                    self._file.close()
+                    self._file = None
+                self._thread_lock.release()
+                raise
+            wait = time.perf_counter() - start
+            with self._metrics_lock:
+                self._acquisitions += 1
+                self._contended += contended
+                self._wait_total += wait
+                self._wait_max = max(self._wait_max, wait)
+        self._depth += 1
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """
+        Освобождает блокировку.
+        """
+        self._depth -= 1
+        if self._depth == 0:
+            try:
+                if fcntl is not None:
+                    fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+                else:
+                    self._file.seek(0)
+                    msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+            finally:
+                self._file.close()
+                self._file = None
+        self._thread_lock.release()
+
+    def _lock_file(self, blocking: bool) -> bool:
+        """
+        Блокирует файл блокировки системным вызовом.
+
+        :param blocking: Ждать освобождения блокировки другим процессом.
+        :return: True, если блокировка захвачена; False, если она занята и blocking ложно.
+        """
+        if fcntl is not None:
+            try:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            except BlockingIOError:
+                return False
+            return True
+        while True:
+            self._file.seek(0)
+            try:
+                # LK_LOCK сам повторяет попытки около 10 секунд, после чего вызывает OSError
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK if blocking else msvcrt.LK_NBLCK, 1)
+                return True
+            except OSError:
+                if not blocking:
+                    return False
+
+    def metrics(self) -> dict:
+        """
+        Возвращает показатели конкуренции за блокировку.
+
+        :return: Словарь: количество захватов, из них с ожиданием другого процесса,
+            суммарное и максимальное время ожидания в миллисекундах.
+        """
+        with self._metrics_lock:
+            return {
+                "acquisitions": self._acquisitions,
+                "contended": self._contended,
+                "wait_total_ms": self._wait_total * 1000,
+                "wait_max_ms": self._wait_max * 1000,
+            }
+
+
+_file_locks = {}  # Абсолютный путь -> FileLock
+_file_locks_guard = threading.Lock()
+
+
+def file_lock(path: str) -> FileLock:
+    """
+    Возвращает общую для процесса блокировку файла. Системная блокировка привязана к открытому
+    файлу, поэтому два объекта FileLock одного пути в одном процессе блокировали бы друг друга.
+
+    :param path: Путь к защищаемому файлу.
+    :return: Блокировка файла.
+    """
+    key = os.path.abspath(path)
+    with _file_locks_guard:
+        if key not in _file_locks:
+            _file_locks[key] = FileLock(path)
+        return _file_locks[key]
+
+
+# --- Общий контракт хранилищ истории ---
+class HistoryStorage(abc.ABC):
+    """
+    Базовый класс хранилищ истории. Несколько процессов игры могут вести одну историю:
+    изменения файла выполняются под общей межпроцессной блокировкой self.lock, метка end_token
+    указывает на конец истории, changes_since по ней возвращает записи других процессов,
+    а snapshot читает историю вместе с меткой. Наследники реализуют абстрактные методы
+    для своего формата файла.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Инициализирует хранилище.
+
+        :param path: Путь к файлу истории.
+        """
+        self.path = path
+        self.lock = file_lock(path)
+
+    def append(self, record: HistoryRecord) -> None:
+        """
+        Добавляет одну запись (см. append_many).
+
+        :param record: Новая запись.
+        """
+        self.append_many([record])
+
+    @abc.abstractmethod
+    def load(self) -> list[HistoryRecord]:
+        """
+        Загружает всю историю. Если файла нет, возвращает пустой список.
+
+        :return: Список записей истории игры.
+        """
+
+    @abc.abstractmethod
+    def iter_newest(
+        self, grid_size: str | None = None, result: str | None = None, offset: int = 0
+    ) -> Iterator[HistoryRecord]:
+        """
+        Перебирает записи от новых к старым.
+
+        :param grid_size: Фильтр по размеру поля.
+        :param result: Фильтр по результату уровня.
+        :param offset: Количество пропускаемых подходящих записей.
+        :return: Итератор по записям.
+        """
+
+    @abc.abstractmethod
+    def append_many(self, records: list[HistoryRecord]) -> None:
+        """
+        Добавляет пачку записей под блокировкой и запоминает их как свои: changes_since их не возвращает.
+
+        :param records: Новые записи.
+        """
+
+    @abc.abstractmethod
+    def rewrite(self, history: list[HistoryRecord]) -> None:
+        """
+        Полностью заменяет историю переданными записями.
+
+        :param history: Список записей истории игры.
+        """
+
+    @abc.abstractmethod
+    def compact(self) -> int:
+        """
+        Компактирует хранилище под блокировкой, не теряя записи других процессов.
+
+        :return: Количество записей в хранилище.
+        """
+
+    @abc.abstractmethod
+    def end_token(self):
+        """
+        Возвращает метку конца истории для changes_since. Метка сохраняется в JSON
+        вместе со снимком статистики, поэтому состоит из чисел.
+
+        :return: Метка конца истории.
+        """
+
+    def snapshot(self, build: Callable) -> tuple:
+        """
+        Выполняет чтение истории так, чтобы другие процессы не изменили ее до получения метки.
+
+        :param build: Функция, принимающая хранилище и возвращающая результат чтения.
+        :return: Результат build и метка конца истории (см. end_token).
+        """
+        with self.lock:
+            return build(self), self.end_token()
+
+    @abc.abstractmethod
+    def changes_since(self, token) -> tuple:
+        """
+        Возвращает записи, добавленные другими процессами после метки token.
+
+        :param token: Метка, полученная от end_token или предыдущего вызова changes_since.
+        :return: Новые чужие записи и новая метка; (None, None), если история была перезаписана
+            так, что метка потеряла смысл, и ее нужно перечитать целиком.
+        """
+
+    def fingerprint(self) -> list | None:
+        """
+        Возвращает отпечаток состояния файла: меняется при любой записи в него.
+
+        :return: Размер, время изменения и индексный дескриптор файла (меняется при атомарной
+            замене) или None, если файла нет.
+        """
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return [stat.st_size, stat.st_mtime_ns, stat.st_ino]
+
+    def grid_size_stats(self) -> dict[str, dict]:
+        """
+        Возвращает статистику по каждому размеру поля проходом по истории.
+
+        :return: Словарь вида {"3x3": {"games": ..., "wins": ..., "losses": ..., "circles": ..., "best_streak": ...}}.
+        """
+        stats = {}
+        for record in self.iter_newest():
+            is_win = record.result == "win"
+            grid = stats.setdefault(
+                record.grid_size, {"games": 0, "wins": 0, "losses": 0, "circles": 0, "best_streak": 0}
+            )
+            grid["games"] += 1
+            grid["wins"] += is_win
+            grid["losses"] += not is_win
+            grid["circles"] += record.num_circles
+            grid["best_streak"] = max(grid["best_streak"], record.streak)
+        return stats
+
+    def submit(self, task: Callable[[], None], key: str | None = None) -> None:
+        """
+        Выполняет операцию после всех ранее добавленных записей. Запись здесь синхронная,
+        поэтому операция выполняется сразу.
+
+        :param task: Функция без аргументов.
+        :param key: Ключ операции (используется хранилищами с отложенной записью).
+        """
+        task()
+
+    def close(self) -> None:
+        """
+        Освобождает ресурсы хранилища. Файл открывается только на время операции, поэтому ничего не делает.
+        """
+
+
+# --- Хранилище истории в одном JSON-файле ---
+class JsonHistoryStorage(HistoryStorage):
+    """
+    Хранит историю игры одним JSON-списком. При каждой новой записи файл перезаписывается целиком:
+    под межпроцессной блокировкой он перечитывается (так сохраняются записи других процессов)
+    и атомарно подменяется новой версией.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Инициализирует хранилище.
+
+        :param path: Путь к JSON-файлу с историей.
+        """
+        super().__init__(path)
+        self._own = []  # Диапазоны номеров записей [начало, конец), добавленных этим объектом
+        self._seen = None  # Отпечаток файла и количество записей при последнем changes_since
+
+    def load(self) -> list[HistoryRecord]:
+        """
+        Загружает историю из файла. Если файл не найден, возвращает пустой список.
+
+        :return: Список записей истории игры.
+        """
+        try:
+            with open(self.path) as f:
+                return [HistoryRecord.from_dict(data) for data in json.load(f)]
+        except FileNotFoundError:
+            return []
+
+    def iter_newest(
+        self, grid_size: str | None = None, result: str | None = None, offset: int = 0
+    ) -> Iterator[HistoryRecord]:
+        """
+        Перебирает записи от новых к старым. Один JSON-список нельзя читать по частям,
+        поэтому файл загружается целиком.
+
+        :param grid_size: Фильтр по размеру поля.
+        :param result: Фильтр по результату уровня.
+        :param offset: Количество пропускаемых подходящих записей.
+        :return: Итератор по записям.
+        """
+        records = [record for record in reversed(self.load()) if matches(record, grid_size, result)]
+        return iter(records[offset:])
+
+    def append_many(self, records: list[HistoryRecord]) -> None:
+        """
+        Сохраняет пачку новых записей одной перезаписью файла. Файл перечитывается
+        под блокировкой, поэтому записи, добавленные другими процессами, не теряются.
+
+        :param records: Новые записи.
+        """
+        with self.lock:
+            history = self.load() + records
+            self._own.append((len(history) - len(records), len(history)))
+            self._write(history)
+            self._seen = [self.fingerprint(), len(history)]
+
+    def rewrite(self, history: list[HistoryRecord]) -> None:
+        """
+        Полностью и атомарно перезаписывает файл истории.
+
+        :param history: Список записей истории игры.
+        """
+        with self.lock:
+            self._own = []
+            self._write(history)
+
+    def compact(self) -> int:
+        """
+        Перезаписывает файл его текущим содержимым под блокировкой.
+
+        :return: Количество записей в файле.
+        """
+        with self.lock:
+            history = self.load()
+            self.rewrite(history)
+            return len(history)
+
+    def end_token(self) -> int:
+        """
+        Возвращает метку конца истории для changes_since.
+
+        :return: Количество записей в файле.
+        """
+        fingerprint = self.fingerprint()
+        if self._seen is None or self._seen[0] != fingerprint:
+            self._seen = [fingerprint, len(self.load())]
+        return self._seen[1]
+
+    def changes_since(self, token: int | None) -> tuple[list[HistoryRecord] | None, int | None]:
+        """
+        Возвращает записи, добавленные другими процессами после метки token.
+
+        :param token: Метка, полученная от end_token или предыдущего вызова changes_since.
+        :return: Новые чужие записи и новая метка; (None, None), если файл был перезаписан
+            так, что метка потеряла смысл, и историю нужно перечитать целиком.
+        """
+        fingerprint = self.fingerprint()
+        if token is not None and self._seen is not None and self._seen[0] == fingerprint:
+            # Файл не менялся с последнего чтения: перечитывать его нужно, только если после метки есть чужие записи
+            length = self._seen[1]
+            if length >= token and all(
+                any(start <= index < end for start, end in self._own) for index in range(token, length)
+            ):
+                return [], length
+        history = self.load()
+        if token is None or len(history) < token:
+            return None, None
+        self._seen = [fingerprint, len(history)]
+        changes = [
+            record
+            for index, record in enumerate(history[token:], token)
+            if not any(start <= index < end for start, end in self._own)
+        ]
+        self._own = [(start, end) for start, end in self._own if end > token]
+        return changes, len(history)
+
+    def _write(self, history: list[HistoryRecord]) -> None:
+        """
+        Атомарно записывает историю в файл.
+
+        :param history: Список записей истории игры.
+        """
+        atomic_write(self.path, lambda f: json.dump([record.to_dict() for record in history], f, indent=4))
+
+
+# --- Журнал истории в формате JSON Lines ---
+class JournalHistoryStorage(HistoryStorage):
+    """
+    Хранит историю игры в журнале JSON Lines: одна запись на строку.
+    Новая запись дописывается в конец файла, поэтому стоимость записи не зависит от размера истории.
+    Дозапись и компактирование выполняются под межпроцессной блокировкой, так что несколько
+    процессов игры могут вести один журнал; записи других процессов читаются методом changes_since.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        fsync_policy: str = FsyncPolicy.ALWAYS,
+        fsync_interval: float = 1.0,
+    ) -> None:
+        """
+        Инициализирует журнал.
+
+        :param path: Путь к файлу журнала.
+        :param fsync_policy: Политика синхронизации с диском (см. FsyncPolicy).
+        :param fsync_interval: Минимальный интервал между fsync в секундах для политики "interval".
+        """
+        if fsync_policy not in FsyncPolicy.ALL:
+            raise ValueError(f"Неизвестная политика fsync: {fsync_policy}")
+        super().__init__(path)
+        self.fsync_policy = fsync_policy
+        self.fsync_interval = fsync_interval
+        self._last_fsync = 0.0
+        self._sync_owed = False  # Политика "interval" отложила fsync дописанных данных
+        self._own = []  # Диапазоны байт [начало, конец), дописанные этим объектом
+
+    def load(self) -> list[HistoryRecord]:
+        """
+        Загружает историю из журнала. Если файл не найден, возвращает пустой список.
+        Недописанная последняя строка (например, после сбоя во время записи) пропускается.
+
+        :return: Список записей истории игры.
+        """
+        history = []
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        history.append(HistoryRecord.from_dict(json.loads(line)))
+                    except json.JSONDecodeError:
+                        # Оборванная запись: всё, что было до неё, остаётся целым
+                        continue
+        except FileNotFoundError:
+            return []
+        return history
+
+    def iter_newest(
+        self, grid_size: str | None = None, result: str | None = None, offset: int = 0
+    ) -> Iterator[HistoryRecord]:
+        """
+        Перебирает записи от новых к старым, читая журнал блоками с конца файла.
+        Строки без искомых полей и строки, пропускаемые по offset, не декодируются из JSON.
+        Записи, дописанные после начала перебора, не учитываются.
+
+        :param grid_size: Фильтр по размеру поля.
+        :param result: Фильтр по результату уровня.
+        :param offset: Количество пропускаемых подходящих записей.
+        :return: Итератор по записям.
+        """
+        # Журнал пишется без пробелов между ключом и значением, поэтому поля ищутся подстрокой
+        needles = []
+        if grid_size is not None:
+            needles.append(f'"grid_size":"{grid_size}"'.encode())
+        if result is not None:
+            needles.append(f'"result":"{result}"'.encode())
+        for line in self._iter_lines_reversed():
+            line = line.strip()
+            if not line or any(needle not in line for needle in needles):
+                continue
+            if offset and line.endswith(b"}"):
+                offset -= 1
+                continue
+            try:
+                record = HistoryRecord.from_dict(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+            if matches(record, grid_size, result):
+                yield record
+
+    def _iter_lines_reversed(self, block_size: int = 65536) -> Iterator[bytes]:
+        """
+        Возвращает строки журнала в обратном порядке, читая файл блоками с конца.
+
+        :param block_size: Размер читаемого блока в байтах.
+        :return: Итератор по строкам (без символа перевода строки).
+        """
+        try:
+            f = open(self.path, "rb")
+        except FileNotFoundError:
+            return
+        with f:
+            position = f.seek(0, os.SEEK_END)
+            tail = b""
+            while position > 0:
+                size = min(block_size, position)
+                position -= size
+                f.seek(position)
+                lines = (f.read(size) + tail).split(b"\n")
+                # Первая строка блока может продолжаться в предыдущем блоке
+                tail = lines.pop(0)
+                yield from reversed(lines)
+            yield tail
+
+    def append_many(self, records: list[HistoryRecord]) -> None:
+        """
+        Дописывает пачку записей в конец журнала одной операцией записи и одним fsync.
+
+        :param records: Новые записи.
+        """
+        lines = "".join(
+            json.dumps(record.to_dict(), ensure_ascii=False, separators=(",", ":")) + "\n" for record in records
+        ).encode("utf-8")
+        with self.lock, open(self.path, "a+b") as f:
+            start = f.seek(0, os.SEEK_END)
+            if start:
+                # Оборванная строка после сбоя не должна склеиться с новой записью
+                f.seek(start - 1)
+                if f.read(1) != b"\n":
+                    lines = b"\n" + lines
+            f.write(lines)
+            f.flush()
+            self._sync(f)
+            self._own.append((start, start + len(lines)))
+
+    def rewrite(self, history: list[HistoryRecord]) -> None:
+        """
+        Компактирует журнал: атомарно записывает всю историю во временный файл и подменяет им журнал.
+
+        :param history: Список записей истории игры.
+        """
+
+        def write(f) -> None:
+            for record in history:
+                f.write(json.dumps(record.to_dict(), ensure_ascii=False, separators=(",", ":")) + "\n")
+
+        with self.lock:
+            atomic_write(self.path, write)
+            self._own = []
+
+    def compact(self) -> int:
+        """
+        Компактирует журнал его текущим содержимым под блокировкой: записи, которые другие
+        процессы успели дописать, не теряются.
+
+        :return: Количество записей в журнале.
+        """
+        with self.lock:
+            history = self.load()
+            self.rewrite(history)
+            return len(history)
+
+    def end_token(self) -> list[int]:
+        """
+        Возвращает метку конца журнала для changes_since.
+
+        :return: Номер индексного дескриптора файла и его размер (нули, если файла нет).
+        """
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return [0, 0]
+        return [stat.st_ino, stat.st_size]
+
+    def changes_since(self, token: list[int] | None) -> tuple[list[HistoryRecord] | None, list[int] | None]:
+        """
+        Возвращает записи, дописанные другими процессами после метки token. Читаются только
+        новые байты журнала и только целые строки; блокировка не нужна, так как строки
+        дописываются в конец, а компактирование подменяет файл атомарно.
+
+        :param token: Метка, полученная от end_token или предыдущего вызова changes_since.
+        :return: Новые чужие записи и новая метка; (None, None), если журнал был компактирован
+            и историю нужно перечитать целиком.
+        """
+        if token is None:
+            return None, None
+        inode, offset = token
+        try:
+            f = open(self.path, "rb")
+        except FileNotFoundError:
+            return ([], token) if offset == 0 else (None, None)
+        with f:
+            # Размер и индексный дескриптор берутся у открытого файла: журнал могут подменить в любой момент
+            stat = os.fstat(f.fileno())
+            if stat.st_size < offset or (offset and stat.st_ino != inode):
+                return None, None
+            # Свои дописанные строки не читаются: конец журнала часто состоит только из них.
+            # Диапазоны отбрасываются только до исходной метки: ее же может передать другой поток
+            self._own = [(start, end) for start, end in self._own if end > offset]
+            for own_start, own_end in sorted(self._own):
+                if own_start <= offset < own_end:
+                    offset = own_end
+            if stat.st_size == offset:
+                return [], [stat.st_ino, offset]
+            f.seek(offset)
+            data = f.read(stat.st_size - offset)
+        complete = data.rfind(b"\n") + 1
+        changes = []
+        position = offset
+        for line in data[:complete].split(b"\n")[:-1]:
+            start = position
+            position += len(line) + 1
+            line = line.strip()
+            if not line or any(own_start <= start < own_end for own_start, own_end in self._own):
+                continue
+            try:
+                changes.append(HistoryRecord.from_dict(json.loads(line)))
+            except json.JSONDecodeError:
+                continue
+        return changes, [stat.st_ino, offset + complete]
+
+    def sync(self) -> None:
+        """
+        Сбрасывает на диск дописанные записи, fsync которых отложила политика "interval".
+        """
+        if not self._sync_owed:
+            return
+        try:
+            with open(self.path, "ab") as f:
+                os.fsync(f.fileno())
+        except FileNotFoundError:
+            pass
+        self._sync_owed = False
+        self._last_fsync = time.monotonic()
+
+    def close(self) -> None:
+        """
+        Освобождает ресурсы хранилища. Файл открывается только на время операции, поэтому
+        остается только выполнить отложенный fsync.
+        """
+        self.sync()
+
+    def _sync(self, f) -> None:
+        """
+        Вызывает os.fsync в соответствии с выбранной политикой. Если политика "interval"
+        откладывает fsync, это запоминается до следующей записи или close().
+
+        :param f: Открытый файл журнала.
+        """
+        if self.fsync_policy == FsyncPolicy.NEVER:
+            return
+        now = time.monotonic()
+        if self.fsync_policy == FsyncPolicy.INTERVAL and now - self._last_fsync < self.fsync_interval:
+            self._sync_owed = True
+            return
+        os.fsync(f.fileno())
+        self._last_fsync = now
+        self._sync_owed = False
+
+
+# --- Хранилище истории в базе SQLite ---
+class SQLiteHistoryStorage(HistoryStorage):
+    """
+    Хранит историю игры в локальной базе SQLite с индексами по дате, размеру поля и результату.
+    Статистика по размерам поля вычисляется запросом к индексу, без загрузки всей истории.
+    Целостность при нескольких процессах обеспечивает сама SQLite; межпроцессная блокировка
+    нужна только для согласованных меток changes_since и снимков статистики.
+    """
+
+    # Соответствие политик fsync режимам синхронизации SQLite
+    SYNCHRONOUS = {
+        FsyncPolicy.ALWAYS: "FULL",
+        FsyncPolicy.INTERVAL: "NORMAL",
+        FsyncPolicy.NEVER: "OFF",
+    }
+
+    # Столбцы, читаемые из таблицы games
+    COLUMNS = "id, datetime, grid_size, num_circles, circles, selected, score, streak, result, seed, clicks, show_ms"
+
+    def __init__(self, path: str, fsync_policy: str = FsyncPolicy.ALWAYS) -> None:
+        """
+        Инициализирует хранилище и создает таблицу с индексами, если их еще нет.
+
+        :param path: Путь к файлу базы данных.
+        :param fsync_policy: Политика синхронизации с диском (см. FsyncPolicy).
+        """
+        if fsync_policy not in FsyncPolicy.ALL:
+            raise ValueError(f"Неизвестная политика fsync: {fsync_policy}")
+        super().__init__(path)
+        self._own = set()  # Идентификаторы записей, добавленных этим объектом
+        # Соединение может использоваться фоновым потоком WriteBehindStorage (под его блокировкой)
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute(f"PRAGMA synchronous={self.SYNCHRONOUS[fsync_policy]}")
+        # Переключение в WAL и создание схемы не ждут занятую базу, поэтому процессы выполняют их по очереди
+        with self.lock, self.connection:
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS games (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    datetime TEXT NOT NULL,
+                    grid_size TEXT NOT NULL,
+                    num_circles INTEGER NOT NULL,
+                    circles TEXT NOT NULL,
+                    selected TEXT NOT NULL,
+                    score INTEGER NOT NULL,
+                    streak INTEGER NOT NULL,
+                    result TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS games_datetime ON games (datetime);
+                CREATE INDEX IF NOT EXISTS games_grid_size ON games (grid_size, result);
+                CREATE INDEX IF NOT EXISTS games_result ON games (result);
+                -- Рекорд берется из накопительной статистики: индекс по серии в старых базах только замедлял вставку
+                DROP INDEX IF EXISTS games_streak;
+                """
+            )
+            # Базы, созданные до записи seed, потока нажатий и длительности показа, дополняются новыми столбцами
+            columns = {row[1] for row in self.connection.execute("PRAGMA table_info(games)")}
+            if "seed" not in columns:
+                self.connection.execute("ALTER TABLE games ADD COLUMN seed INTEGER")
+                self.connection.execute("ALTER TABLE games ADD COLUMN clicks TEXT")
+            if "show_ms" not in columns:
+                self.connection.execute("ALTER TABLE games ADD COLUMN show_ms INTEGER")
+
+    def load(self) -> list[HistoryRecord]:
+        """
+        Загружает всю историю из базы в порядке добавления.
+
+        :return: Список записей истории игры.
+        """
+        rows = self.connection.execute(f"SELECT {self.COLUMNS} FROM games ORDER BY id")
+        return [self._to_record(row[1:]) for row in rows]
+
+    def iter_newest(
+        self, grid_size: str | None = None, result: str | None = None, offset: int = 0, chunk_size: int = 256
+    ) -> Iterator[HistoryRecord]:
+        """
+        Перебирает записи от новых к старым порциями по chunk_size (запрос по индексам
+        games_grid_size и games_result). Следующая порция выбирается по идентификатору
+        последней записи, поэтому уже просмотренные записи повторно не читаются.
+
+        :param grid_size: Фильтр по размеру поля.
+        :param result: Фильтр по результату уровня.
+        :param offset: Количество пропускаемых подходящих записей.
+        :param chunk_size: Количество записей, читаемых одним запросом.
+        :return: Итератор по записям.
+        """
+        conditions, params = [], []
+        if grid_size is not None:
+            conditions.append("grid_size = ?")
+            params.append(grid_size)
+        if result is not None:
+            conditions.append("result = ?")
+            params.append(result)
+        last_id = None
+        while True:
+            where = conditions + ([] if last_id is None else ["id < ?"])
+            query = f"SELECT {self.COLUMNS} FROM games"
+            if where:
+                query += " WHERE " + " AND ".join(where)
+            query += " ORDER BY id DESC LIMIT ? OFFSET ?"
+            rows = self.connection.execute(
+                query, params + ([] if last_id is None else [last_id]) + [chunk_size, offset]
+            ).fetchall()
+            if not rows:
+                return
+            offset = 0
+            for row in rows:
+                yield self._to_record(row[1:])
+            last_id = rows[-1][0]
+
+    def append_many(self, records: list[HistoryRecord]) -> None:
+        """
+        Добавляет пачку записей в базу одной транзакцией.
+
+        :param records: Новые записи.
+        """
+        with self.lock, self.connection:
+            self._own.update(self._insert(records))
+
+    def rewrite(self, history: list[HistoryRecord]) -> None:
+        """
+        Полностью заменяет содержимое базы переданной историей в одной транзакции.
+
+        :param history: Список записей истории игры.
+        """
+        with self.lock, self.connection:
+            self.connection.execute("DELETE FROM games")
+            self._insert(history, track_ids=False)
+            self._own = set()
+
+    def compact(self) -> int:
+        """
+        Сжимает файл базы (VACUUM). Записи не переписываются, поэтому записи других процессов не теряются.
+
+        :return: Количество записей в базе.
+        """
+        with self.lock:
+            self.connection.execute("VACUUM")
+            return self.connection.execute("SELECT COUNT(*) FROM games").fetchone()[0]
+
+    def end_token(self) -> list[int]:
+        """
+        Возвращает метку конца истории для changes_since.
+
+        :return: Наименьший и наибольший идентификатор записи (нули, если база пуста).
+        """
+        # Отдельные подзапросы: MIN и MAX в одном запросе SQLite вычисляет полным просмотром таблицы
+        row = self.connection.execute(
+            "SELECT COALESCE((SELECT MIN(id) FROM games), 0), COALESCE((SELECT MAX(id) FROM games), 0)"
+        ).fetchone()
+        return list(row)
+
+    def changes_since(self, token: list[int] | None) -> tuple[list[HistoryRecord] | None, list[int] | None]:
+        """
+        Возвращает записи, добавленные другими процессами после метки token.
+
+        :param token: Метка, полученная от end_token или предыдущего вызова changes_since.
+        :return: Новые чужие записи и новая метка; (None, None), если история была перезаписана
+            и ее нужно перечитать целиком.
+        """
+        if token is None:
+            return None, None
+        first_id, last_id = token
+        current_first, current_last = self.end_token()
+        # После перезаписи старые идентификаторы исчезают, а новые продолжают счетчик AUTOINCREMENT
+        if current_last < last_id or (last_id and current_first != first_id):
+            return None, None
+        self._own = {row_id for row_id in self._own if row_id > last_id}
+        # Свои записи подряд после метки не читаются
+        while last_id + 1 in self._own and last_id < current_last:
+            last_id += 1
+        if current_last == last_id:
+            return [], [current_first, current_last]
+        rows = self.connection.execute(
+            f"SELECT {self.COLUMNS} FROM games WHERE id > ? AND id <= ? ORDER BY id", (last_id, current_last)
+        ).fetchall()
+        changes = [self._to_record(row[1:]) for row in rows if row[0] not in self._own]
+        return changes, [current_first, current_last]
+
+    def fingerprint(self) -> list:
+        """
+        Возвращает отпечаток состояния базы: последний идентификатор записи и счетчик AUTOINCREMENT.
+
+        :return: Список из двух значений.
+        """
+        row = self.connection.execute(
+            "SELECT (SELECT MAX(id) FROM games), (SELECT seq FROM sqlite_sequence WHERE name = 'games')"
+        ).fetchone()
+        return list(row)
+
+    def grid_size_stats(self) -> dict[str, dict]:
+        """
+        Возвращает статистику по каждому размеру поля одним запросом по индексу games_grid_size.
+
+        :return: Словарь вида {"3x3": {"games": ..., "wins": ..., "losses": ..., "circles": ..., "best_streak": ...}}.
+        """
+        rows = self.connection.execute(
+            "SELECT grid_size, COUNT(*),"
+            " SUM(result = 'win'), SUM(result != 'win'), SUM(num_circles), MAX(streak)"
+            " FROM games GROUP BY grid_size"
+        )
+        return {
+            grid_size: {
+                "games": games,
+                "wins": wins,
+                "losses": losses,
+                "circles": circles,
+                "best_streak": best_streak,
+            }
+            for grid_size, games, wins, losses, circles, best_streak in rows
+        }
+
+    def close(self) -> None:
+        """
+        Закрывает соединение с базой.
+        """
+        self.connection.close()
+
+    @staticmethod
+    def _to_record(row: tuple) -> HistoryRecord:
+        """
+        Преобразует строку таблицы games (без идентификатора) в запись истории.
+
+        :param row: Значения столбцов COLUMNS без id.
+        :return: Запись истории игры.
+        """
+        # Базы, созданные до компактного формата, хранят позиции JSON-списками
+        return HistoryRecord.from_dict(
+            {
+                "datetime": row[0],
+                "grid_size": row[1],
+                "num_circles": row[2],
+                "circles": json.loads(row[3]) if row[3].startswith("[") else row[3],
+                "selected": json.loads(row[4]) if row[4].startswith("[") else row[4],
+                "score": row[5],
+                "streak": row[6],
+                "result": row[7],
+                "seed": row[8],
+                "clicks": row[9],
+                "show_ms": row[10],
+            }
+        )
+
+    def _insert(self, records: list[HistoryRecord], track_ids: bool = True) -> list[int]:
+        """
+        Вставляет записи в таблицу games.
+
+        :param records: Список записей истории игры.
+        :param track_ids: Вставлять по одной записи, чтобы узнать их идентификаторы.
+            Иначе все записи вставляются одним executemany.
+        :return: Идентификаторы вставленных записей (пустой список, если track_ids ложно).
+        """
+        query = (
+            "INSERT INTO games (datetime, grid_size, num_circles, circles, selected, score, streak, result, seed, clicks, show_ms)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+        )
+        rows = [
+            (
+                data["datetime"],
+                data["grid_size"],
+                data["num_circles"],
+                data["circles"],
+                data["selected"],
+                data["score"],
+                data["streak"],
+                data["result"],
+                data.get("seed"),
+                data.get("clicks"),
+                data.get("show_ms"),
+            )
+            for data in (record.to_dict() for record in records)
+        ]
+        if not track_ids:
+            self.connection.executemany(query, rows)
+            return []
+        return [self.connection.execute(query, row).lastrowid for row in rows]
+
+
+# --- Отложенная запись истории в фоновом потоке ---
+class HistoryWriteError(OSError):
+    """
+    Записи истории не удалось сохранить и после повторных попыток.
+    """
+
+
+class WriteBehindStorage(HistoryStorage):
+    """
+    Обертка над хранилищем, которая записывает новые записи в фоновом потоке.
+    append() только ставит запись в очередь и сразу возвращается; поток собирает записи
+    в пачки и сохраняет их одной операцией. Чтение и перезапись сначала дожидаются очереди.
+    Пачка, которую не удалось записать, остается в очереди и повторяется со следующей пачкой
+    и при закрытии; пока она не сохранена, операции submit откладываются, чтобы снимки
+    статистики не учитывали записи, которых нет в хранилище.
+    """
+
+    _FLUSH = object()  # Маркер: записать накопленную пачку немедленно
+    _STOP = object()  # Маркер: завершить фоновый поток
+
+    def __init__(self, inner: HistoryStorage, flush_interval: float = 0.25, max_batch: int = 256) -> None:
+        """
+        Инициализирует обертку и запускает фоновый поток.
+
+        :param inner: Хранилище, в которое выполняется запись.
+        :param flush_interval: Сколько секунд поток ждет новые записи, прежде чем сохранить пачку.
+        :param max_batch: Максимальное количество записей в одной пачке.
+        """
+        super().__init__(inner.path)
+        self.inner = inner
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+        self._lock = threading.RLock()  # Сериализует обращения к inner из разных потоков
+        self._metrics_lock = threading.Lock()  # Защищает счетчики показателей
+        self._pending = 0  # Записей в очереди
+        self._max_pending = 0
+        self._flushed = 0  # Всего сохранено записей
+        self._batches = 0  # Всего сохранено пачек
+        self._last_latency = 0.0  # Задержка от постановки в очередь до записи на диск, с
+        self._max_latency = 0.0
+        self._errors = 0
+        self._last_error = None
+        self._unsaved = []  # Записи неудавшихся пачек: (запись, время постановки в очередь)
+        self._deferred = {}  # Операции submit, ожидающие сохранения self._unsaved
+        # Вызывается фоновым потоком после каждой операции записи: on_write(начало, конец) по time.perf_counter()
+        self.on_write = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._worker, name="history-writer", daemon=True)
+        self._thread.start()
+        # Гарантированная запись очереди при завершении интерпретатора
+        atexit.register(self.close)
+
+    def load(self) -> list[HistoryRecord]:
+        """
+        Загружает историю, предварительно дождавшись записи очереди.
+
+        :return: Список записей истории игры.
+        """
+        self.flush()
+        with self._lock:
+            return self.inner.load()
+
+    def iter_newest(
+        self, grid_size: str | None = None, result: str | None = None, offset: int = 0
+    ) -> Iterator[HistoryRecord]:
+        """
+        Перебирает записи от новых к старым, предварительно дождавшись записи очереди.
+
+        :param grid_size: Фильтр по размеру поля.
+        :param result: Фильтр по результату уровня.
+        :param offset: Количество пропускаемых подходящих записей.
+        :return: Итератор по записям.
+        """
+        self.flush()
+        return self.inner.iter_newest(grid_size=grid_size, result=result, offset=offset)
+
+    def append_many(self, records: list[HistoryRecord]) -> None:
+        """
+        Ставит записи в очередь на сохранение и сразу возвращается.
+
+        :param records: Новые записи.
+        """
+        with self._metrics_lock:
+            self._pending += len(records)
+            self._max_pending = max(self._max_pending, self._pending)
+        enqueued = time.monotonic()
+        for record in records:
+            self._queue.put((record, enqueued))
+
+    def submit(self, task: Callable[[], None], key: str | None = None) -> None:
+        """
+        Ставит в очередь произвольную операцию; она выполнится в фоновом потоке
+        после всех ранее поставленных записей.
+
+        :param task: Функция без аргументов.
+        :param key: Если задан, из нескольких операций с одним ключом в пачке выполняется только последняя.
+        """
+        self._queue.put(((task, key), time.monotonic()))
+
+    def rewrite(self, history: list[HistoryRecord]) -> None:
+        """
+        Полностью перезаписывает историю после записи очереди.
+
+        :param history: Список записей истории игры.
+        """
+        self.flush()
+        with self._lock:
+            self.inner.rewrite(history)
+
+    def compact(self) -> int:
+        """
+        Компактирует хранилище после записи очереди (см. compact у обернутого хранилища).
+
+        :return: Количество записей в хранилище.
+        """
+        self.flush()
+        with self._lock:
+            return self.inner.compact()
+
+    def end_token(self):
+        """
+        Возвращает метку конца истории. Вне фонового потока сначала дожидается очереди.
+
+        :return: Метка обернутого хранилища.
+        """
+        if threading.current_thread() is not self._thread:
+            self.flush()
+        with self._lock:
+            return self.inner.end_token()
+
+    def snapshot(self, build: Callable) -> tuple:
+        """
+        Выполняет согласованное чтение после записи очереди; build получает обернутое хранилище.
+
+        :param build: Функция, принимающая хранилище и возвращающая результат чтения.
+        :return: Результат build и метка конца истории.
+        """
+        self.flush()
+        with self._lock:
+            return self.inner.snapshot(build)
+
+    def changes_since(self, token) -> tuple:
+        """
+        Возвращает записи других процессов после метки token, не дожидаясь очереди: свои записи
+        обернутое хранилище не возвращает. Если фоновый поток сейчас пишет, проверка откладывается.
+
+        :param token: Метка, полученная от end_token или предыдущего вызова changes_since.
+        :return: Новые чужие записи и новая метка (см. changes_since у обернутого хранилища).
+        """
+        if not self._lock.acquire(blocking=False):
+            return [], token
+        try:
+            return self.inner.changes_since(token)
+        finally:
+            self._lock.release()
+
+    def fingerprint(self) -> list | None:
+        """
+        Возвращает отпечаток состояния хранилища. Вне фонового потока сначала дожидается очереди.
+
+        :return: Отпечаток состояния хранилища.
+        """
+        if threading.current_thread() is not self._thread:
+            self.flush()
+        with self._lock:
+            return self.inner.fingerprint()
+
+    def grid_size_stats(self) -> dict[str, dict]:
+        """
+        Возвращает статистику по каждому размеру поля после записи очереди.
+
+        :return: Статистика обернутого хранилища (см. HistoryStorage.grid_size_stats).
+        """
+        self.flush()
+        with self._lock:
+            return self.inner.grid_size_stats()
+
+    def flush(self) -> None:
+        """
+        Блокируется, пока все поставленные в очередь записи не будут сохранены.
+        """
+        if self._closed:
+            return
+        self._queue.put(self._FLUSH)
+        self._queue.join()
+
+    def close(self) -> None:
+        """
+        Сохраняет очередь (с последней попыткой записать неудавшиеся пачки), останавливает
+        фоновый поток и закрывает хранилище. Повторный вызов ничего не делает.
+
+        :raises HistoryWriteError: Если часть записей так и не удалось сохранить.
+        """
+        if self._closed:
+            return
+        self._queue.put(self._STOP)
+        self._thread.join()
+        self._closed = True
+        self.inner.close()
+        atexit.unregister(self.close)
+        if self._unsaved:
+            raise HistoryWriteError(f"Не сохранено записей истории: {len(self._unsaved)} ({self._last_error})")
+
+    def metrics(self) -> dict:
+        """
+        Возвращает показатели очереди записи.
+
+        :return: Словарь: глубина очереди, ее максимум, количество сохраненных записей и пачек,
+            последняя и максимальная задержка записи в миллисекундах, количество ошибок
+            и записей, ожидающих повторной попытки.
+        """
+        with self._metrics_lock:
+            return {
+                "queue_depth": self._pending,
+                "max_queue_depth": self._max_pending,
+                "flushed_records": self._flushed,
+                "batches": self._batches,
+                "last_flush_latency_ms": self._last_latency * 1000,
+                "max_flush_latency_ms": self._max_latency * 1000,
+                "errors": self._errors,
+                "last_error": self._last_error,
+                "unsaved_records": len(self._unsaved),
+            }
+
+    def _worker(self) -> None:
+        """
+        Цикл фонового потока: собирает элементы очереди в пачки и сохраняет их.
+        """
+        running = True
+        while running:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            # Собираем пачку, пока не истек интервал или не пришел маркер
+            while batch[-1] is not self._FLUSH and batch[-1] is not self._STOP and len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            running = batch[-1] is not self._STOP
+            self._write_batch([item for item in batch if item is not self._FLUSH and item is not self._STOP])
+            for _ in batch:
+                self._queue.task_done()
+
+    def _write_batch(self, batch: list[tuple]) -> None:
+        """
+        Сохраняет пачку: подряд идущие записи - одной операцией, операции submit - по порядку.
+        Из операций с одинаковым ключом остается только последняя, поэтому записи между ними
+        тоже сохраняются одной операцией.
+
+        :param batch: Элементы очереди (запись или операция с ключом, время постановки в очередь).
+        """
+        last_by_key = {}
+        for index, (item, _) in enumerate(batch):
+            if not isinstance(item, HistoryRecord) and item[1] is not None:
+                last_by_key[item[1]] = index
+        records = []
+        for index, (item, enqueued) in enumerate(batch):
+            if isinstance(item, HistoryRecord):
+                records.append((item, enqueued))
+                continue
+            task, key = item
+            if key is not None and last_by_key[key] != index:
+                continue
+            self._write_records(records)
+            records = []
+            if self._unsaved:
+                # Снимок учитывает несохраненные записи: он выполнится после их сохранения
+                self._deferred[key if key is not None else object()] = task
+            else:
+                self._run(task)
+        self._write_records(records)
+
+    def _write_records(self, records: list[tuple[HistoryRecord, float]]) -> None:
+        """
+        Сохраняет записи в хранилище одной операцией вместе с записями неудавшихся пачек
+        и обновляет показатели. При ошибке записи остаются в очереди до следующей попытки;
+        после успешной записи выполняются отложенные операции submit.
+
+        :param records: Пары (запись, время постановки в очередь).
+        """
+        records = self._unsaved + records
+        if not records:
+            return
+        if not self._run(lambda: self.inner.append_many([record for record, _ in records])):
+            self._unsaved = records
+            return
+        self._unsaved = []
+        latency = time.monotonic() - records[0][1]
+        with self._metrics_lock:
+            self._last_latency = latency
+            self._max_latency = max(self._max_latency, latency)
+            self._flushed += len(records)
+            self._batches += 1
+            self._pending -= len(records)
+        deferred, self._deferred = self._deferred, {}
+        for task in deferred.values():
+            self._run(task)
+
+    def _run(self, task) -> bool:
+        """
+        Выполняет операцию под блокировкой; ошибка сохраняется в показателях и не останавливает поток.
+
+        :param task: Функция без аргументов.
+        :return: True, если операция выполнена без ошибки.
+        """
+        start = time.perf_counter()
+        try:
+            with self._lock:
+                task()
+            succeeded = True
+        except Exception as error:
+            succeeded = False
+            with self._metrics_lock:
+                self._errors += 1
+                self._last_error = repr(error)
+        if self.on_write is not None:
+            self.on_write(start, time.perf_counter())
+        return succeeded
+
+
+def open_history(
+    path: str,
+    fsync_policy: str = consts.HistoryConsts.FSYNC_POLICY,
+    fsync_interval: float = consts.HistoryConsts.FSYNC_INTERVAL,
+) -> HistoryStorage:
+    """
+    Открывает хранилище истории, выбирая его по расширению файла: ".jsonl" - журнал JSON Lines,
+    ".db"/".sqlite" - база SQLite, иначе - один JSON-файл.
+
+    :param path: Путь к файлу истории.
+    :param fsync_policy: Политика синхронизации с диском (см. FsyncPolicy); по умолчанию - из настроек игры.
+    :param fsync_interval: Минимальный интервал между fsync журнала в секундах для политики "interval".
+    :return: Хранилище истории.
+    """
+    extension = os.path.splitext(path)[1]
+    if extension == ".jsonl":
+        return JournalHistoryStorage(path, fsync_policy=fsync_policy, fsync_interval=fsync_interval)
+    if extension in (".db", ".sqlite", ".sqlite3"):
+        return SQLiteHistoryStorage(path, fsync_policy=fsync_policy)
+    return JsonHistoryStorage(path)
+
+
+def migrate_json_to_journal(json_path: str, journal_path: str) -> int:
+    """
+    Переносит историю из старого формата history.json в журнал JSON Lines.
+
+    :param json_path: Путь к файлу истории в формате JSON.
+    :param journal_path: Путь к создаваемому журналу.
+    :return: Количество перенесенных записей.
+    """
+    history = JsonHistoryStorage(json_path).load()
+    JournalHistoryStorage(journal_path).rewrite(history)
+    return len(history)
+
+
+def import_history_to_sqlite(source_path: str, db_path: str) -> int:
+    """
+    Импортирует историю из history.json (или журнала .jsonl) в базу SQLite.
+    Существующее содержимое базы заменяется.
+
+    :param source_path: Путь к файлу истории в формате JSON или JSON Lines.
+    :param db_path: Путь к базе данных.
+    :return: Количество импортированных записей.
+    """
+    if os.path.splitext(source_path)[1] == ".jsonl":
+        history = JournalHistoryStorage(source_path).load()
+    else:
+        history = JsonHistoryStorage(source_path).load()
+    database = SQLiteHistoryStorage(db_path)
+    try:
+        database.rewrite(history)
+    finally:
+        database.close()
+    return len(history)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Обслуживание файлов истории игры.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    migrate_parser = commands.add_parser("migrate", help="Перенести history.json в журнал JSON Lines.")
+    migrate_parser.add_argument("json_path")
+    migrate_parser.add_argument("journal_path")
+
+    compact_parser = commands.add_parser("compact", help="Компактировать журнал JSON Lines.")
+    compact_parser.add_argument("journal_path")
+
+    import_parser = commands.add_parser("import", help="Импортировать history.json или журнал в SQLite.")
+    import_parser.add_argument("source_path")
+    import_parser.add_argument("db_path")
+
+    args = parser.parse_args()
+    if args.command == "migrate":
+        count = migrate_json_to_journal(args.json_path, args.journal_path)
+        print(f"Перенесено записей: {count}")
+    elif args.command == "import":
+        count = import_history_to_sqlite(args.source_path, args.db_path)
+        print(f"Импортировано записей: {count}")
+    else:
+        count = JournalHistoryStorage(args.journal_path).compact()
+        print(f"Записей в журнале: {count}")
@@ -0,0 +1,87 @@
+import heapq
+import itertools
+from typing import Callable
+
+import pygame
+
+
+# --- Отложенный вызов ---
+class Timer:
+    """
+    Отложенный вызов функции, запланированный в Scheduler.
+    """
+
+    def __init__(self, due: int, callback: Callable[[], None]) -> None:
+        """
+        Инициализирует таймер.
+
+        :param due: Время срабатывания в миллисекундах (по pygame.time.get_ticks()).
+        :param callback: Функция, вызываемая при срабатывании.
+        """
+        self.due = due
+        self.callback = callback
+        self.cancelled = False
+
+
+# --- Планировщик таймеров главного цикла ---
+class Scheduler:
+    """
+    Планировщик отложенных вызовов. Не блокирует процесс: главный цикл вызывает update()
+    каждый кадр, и сработавшие таймеры выполняются между обработкой событий и отрисовкой.
+    """
+
+    def __init__(self) -> None:
+        """
+        Инициализирует пустой планировщик.
+        """
+        self._queue = []  # Куча из (время срабатывания, порядковый номер, таймер)
+        self._counter = itertools.count()
+
+    def schedule(self, delay_ms: int, callback: Callable[[], None]) -> Timer:
+        """
+        Планирует вызов функции через delay_ms миллисекунд.
+
+        :param delay_ms: Задержка в миллисекундах.
+        :param callback: Вызываемая функция.
+        :return: Таймер, который можно отменить методом cancel.
+        """
+        timer = Timer(pygame.time.get_ticks() + delay_ms, callback)
+        heapq.heappush(self._queue, (timer.due, next(self._counter), timer))
+        return timer
+
+    @staticmethod
+    def cancel(timer: Timer) -> None:
+        """
+        Отменяет таймер.
+
+        :param timer: Таймер, возвращенный методом schedule.
+        """
+        timer.cancelled = True
+
+    def clear(self) -> None:
+        """
+        Отменяет все запланированные таймеры.
+        """
+        self._queue.clear()
+
+    def update(self) -> None:
+        """
+        Выполняет все таймеры, время срабатывания которых наступило.
+        """
+        now = pygame.time.get_ticks()
+        while self._queue and self._queue[0][0] <= now:
+            _, _, timer = heapq.heappop(self._queue)
+            if not timer.cancelled:
+                timer.callback()
+
+    def time_until_next(self) -> int | None:
+        """
+        Возвращает время до срабатывания ближайшего таймера.
+
+        :return: Количество миллисекунд (не меньше 0) или None, если таймеров нет.
+        """
+        while self._queue and self._queue[0][2].cancelled:
+            heapq.heappop(self._queue)
+        if not self._queue:
+            return None
+        return max(0, self._queue[0][0] - pygame.time.get_ticks())
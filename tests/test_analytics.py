@@ -0,0 +1,203 @@
+import collections
+import json
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src import analytics, storage  # noqa: E402
+from src.analytics import HistoryAnalytics  # noqa: E402
+from src.records import HistoryRecord  # noqa: E402
+from src.statistic import StatsManager  # noqa: E402
+
+
+def random_history(size_x: int, size_y: int, count: int, seed: int) -> list[HistoryRecord]:
+    """
+    Создает случайную историю одного размера поля за несколько дней.
+
+    :param size_x: Ширина поля.
+    :param size_y: Высота поля.
+    :param count: Количество записей.
+    :param seed: Начальное значение генератора.
+    :return: Список записей.
+    """
+    rng = random.Random(seed)
+    cells = [(x, y) for y in range(size_y) for x in range(size_x)]
+    history = []
+    for index in range(count):
+        circles = rng.sample(cells, rng.randint(1, min(12, len(cells))))
+        selected = rng.sample(cells, rng.randint(0, min(15, len(cells))))
+        history.append(
+            HistoryRecord.create(
+                f"2026-03-{1 + index % 9:02d} 10:00:00",
+                size_x,
+                size_y,
+                len(circles),
+                circles,
+                selected,
+                score=index,
+                streak=rng.choice([0, 0, 1, 2, 3, 5, 8, 13]),
+                result=rng.choice(["win", "loss"]),
+            )
+        )
+    return history
+
+
+def reference(history: list[HistoryRecord]) -> tuple[dict, dict]:
+    """
+    Считает тепловые карты и серии по дням простым циклом по записям.
+
+    :param history: Записи истории.
+    :return: Карты {размер поля: (кружки, найденные, ошибки)} списками строк и счетчики серий по дням.
+    """
+    maps = {}
+    streaks = collections.defaultdict(collections.Counter)
+    for record in history:
+        size_x, size_y = record.size
+        circles, hits, wrong = maps.setdefault(
+            record.grid_size, tuple([[0] * size_x for _ in range(size_y)] for _ in range(3))
+        )
+        positions = set(record.circles)
+        for x, y in positions:
+            circles[y][x] += 1
+        for x, y in record.selected:
+            if (x, y) in positions:
+                hits[y][x] += 1
+            else:
+                wrong[y][x] += 1
+        streaks[record.datetime[:10]][record.streak] += 1
+    return maps, streaks
+
+
+def reference_summary(streaks: dict, days: int = 7) -> list[dict]:
+    """
+    Сводка серий по дням простым перебором (см. HistoryAnalytics.streak_summary).
+
+    :param streaks: Счетчики серий по дням.
+    :param days: Количество последних дней.
+    :return: Список словарей от новых дней к старым.
+    """
+    summary = []
+    for day in sorted(streaks, reverse=True)[:days]:
+        values = sorted(streaks[day].elements())
+        games = len(values)
+        p90 = next(value for index, value in enumerate(values, 1) if index >= 0.9 * games)
+        summary.append(
+            {"day": day, "games": games, "mean": sum(values) / games, "p90": p90, "max": values[-1]}
+        )
+    return summary
+
+
+def assert_matches(result: HistoryAnalytics, history: list[HistoryRecord]) -> None:
+    """
+    Сравнивает аналитику с подсчетом простым циклом.
+
+    :param result: Проверяемая аналитика.
+    :param history: Записи, по которым она построена.
+    """
+    maps, streaks = reference(history)
+    assert set(result.grids) == set(maps)
+    for grid_size, (circles, hits, wrong) in maps.items():
+        grid = result.grids[grid_size]
+        assert grid.games == sum(record.grid_size == grid_size for record in history)
+        assert grid.circles.tolist() == circles
+        assert grid.hits.tolist() == hits
+        assert grid.wrong_clicks.tolist() == wrong
+    summary = result.streak_summary(days=len(streaks))
+    expected = reference_summary(streaks, days=len(streaks))
+    assert [{**row, "mean": pytest.approx(row["mean"])} for row in expected] == summary
+
+
+@pytest.mark.parametrize("size_x, size_y, count", [(17, 5, 300), (64, 64, 200), (3, 3, 100)])
+def test_batch_matches_per_record_loop(size_x, size_y, count):
+    history = random_history(size_x, size_y, count, seed=size_x * size_y)
+    assert_matches(HistoryAnalytics.from_records(history), history)
+
+
+def test_chunked_build_matches_per_record_loop(monkeypatch):
+    # Маленькие пачки: карты и серии собираются из многих частичных пачек
+    monkeypatch.setattr(analytics, "CHUNK_CELLS", 200)
+    monkeypatch.setattr(analytics, "CHUNK_RECORDS", 7)
+    history = random_history(17, 5, 120, seed=1) + random_history(64, 64, 30, seed=2)
+    random.Random(3).shuffle(history)
+    assert_matches(HistoryAnalytics.from_records(history), history)
+
+
+def test_update_matches_batch_build():
+    history = random_history(17, 5, 80, seed=4) + random_history(4, 6, 40, seed=5)
+    incremental = HistoryAnalytics.from_records(history[:50])
+    for record in history[50:]:
+        incremental.update(record)
+    assert_matches(incremental, history)
+
+
+def test_dict_round_trip():
+    history = random_history(17, 5, 60, seed=6) + random_history(64, 64, 10, seed=7)
+    original = HistoryAnalytics.from_records(history)
+    restored = HistoryAnalytics.from_dict(json.loads(json.dumps(original.to_dict())))
+    assert restored.to_dict() == original.to_dict()
+    assert_matches(restored, history)
+
+
+def test_empty_history():
+    empty = HistoryAnalytics.from_records([])
+    assert empty.grids == {}
+    assert empty.streak_summary() == []
+
+
+# --- Сохранение рядом с историей ---
+def record_all(stats: StatsManager, history: list[HistoryRecord]) -> None:
+    """
+    Записывает уровни истории через менеджер статистики.
+
+    :param stats: Менеджер статистики.
+    :param history: Записи истории.
+    """
+    for record in history:
+        size_x, size_y = record.size
+        stats.record(
+            size_x,
+            size_y,
+            record.num_circles,
+            record.circles,
+            record.selected,
+            record.score,
+            record.streak,
+            record.result,
+        )
+
+
+@pytest.mark.parametrize("backend", ["history.jsonl", "history.db"])
+def test_analytics_restored_after_restart(tmp_path, backend):
+    path = str(tmp_path / backend)
+    stats = StatsManager(path)
+    history = random_history(17, 5, 30, seed=8)
+    record_all(stats, history[:20])
+    stats.analytics  # Построение по истории
+    record_all(stats, history[20:])
+    expected = stats.analytics.to_dict()
+    stats.close()
+
+    restarted = StatsManager(path)
+    assert restarted.restore_analytics()
+    assert restarted.analytics.to_dict() == expected
+    restarted.rebuild_analytics()
+    assert restarted.analytics.to_dict() == expected
+    restarted.close()
+
+
+def test_stale_analytics_are_not_restored(tmp_path):
+    path = str(tmp_path / "history.jsonl")
+    stats = StatsManager(path)
+    record_all(stats, random_history(17, 5, 10, seed=9))
+    stats.analytics
+    stats.close()
+    # Запись другого процесса после сохранения: сохраненная аналитика ее не учитывает
+    other = storage.open_history(path)
+    other.append(random_history(17, 5, 1, seed=10)[0])
+    other.close()
+    restarted = StatsManager(path)
+    assert not restarted.restore_analytics()
+    assert_matches(restarted.analytics, restarted.load_history())
+    restarted.close()
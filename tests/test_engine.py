@@ -0,0 +1,110 @@
+import random
+
+from src import engine
+from src.engine import GameEngine, Level, Outcome
+
+
+def empty_cell(level: Level) -> tuple[int, int]:
+    """
+    Возвращает первую клетку уровня без кружка.
+
+    :param level: Уровень.
+    :return: Координаты клетки (x, y).
+    """
+    for y in range(level.size_y):
+        for x in range(level.size_x):
+            if not level.is_circle(x, y):
+                return x, y
+    raise AssertionError("На поле нет пустых клеток")
+
+
+def test_miss_resets_streak():
+    game = GameEngine(3, 3, num_circles=1, streak=4, rng=random.Random(1))
+    level = game.start_level()
+    assert game.click(*empty_cell(level)) == Outcome.MISS
+    assert game.streak == 0
+    assert game.errors == 1
+    assert game.last_record["level_result"] == "loss"
+
+
+def test_two_errors_decrease_circles():
+    game = GameEngine(3, 3, num_circles=3, rng=random.Random(2))
+    game.click(*empty_cell(game.start_level()))
+    assert game.num_circles == 3
+    game.click(*empty_cell(game.start_level()))
+    assert game.num_circles == 2
+
+
+def test_circles_never_drop_below_one():
+    game = GameEngine(3, 3, num_circles=1, errors=5, rng=random.Random(3))
+    game.click(*empty_cell(game.start_level()))
+    assert game.num_circles == 1
+
+
+def test_win_increments_circles_and_resets_errors():
+    game = GameEngine(3, 3, num_circles=2, errors=1, streak=2, rng=random.Random(4))
+    level = game.start_level()
+    outcomes = [game.click(x, y) for x, y in level.circles]
+    assert outcomes == [Outcome.HIT, Outcome.WIN]
+    assert game.num_circles == 3
+    assert game.errors == 0
+    assert game.streak == 3
+    assert game.wins == 1
+
+
+def test_win_caps_circles_at_cell_count():
+    game = GameEngine(2, 1, num_circles=2, rng=random.Random(5))
+    level = game.start_level()
+    for x, y in level.circles:
+        game.click(x, y)
+    assert level.result == "win"
+    assert game.num_circles == 2
+
+
+def test_repeated_hit_is_counted_once():
+    game = GameEngine(3, 3, num_circles=2, rng=random.Random(6))
+    level = game.start_level()
+    first, second = level.circles
+    assert game.click(*first, time_ms=10) == Outcome.HIT
+    assert game.click(*first, time_ms=20) == Outcome.HIT
+    assert level.result is None
+    assert game.click(*second, time_ms=30) == Outcome.WIN
+    assert level.selected_positions == [first, second]
+    assert level.clicks == [(10, *first), (20, *first), (30, *second)]
+
+
+def test_clicks_after_result_are_ignored():
+    game = GameEngine(3, 3, num_circles=1, rng=random.Random(7))
+    level = game.start_level()
+    game.click(*level.circles[0])
+    state = (game.wins, game.streak, game.num_circles, game.errors)
+    assert game.click(*empty_cell(level)) == Outcome.IGNORED
+    assert game.click(*level.circles[0]) == Outcome.IGNORED
+    assert (game.wins, game.streak, game.num_circles, game.errors) == state
+    assert len(level.clicks) == 1
+
+
+def test_same_seed_gives_same_placement():
+    assert Level(64, 64, 40, seed=12345).circles == Level(64, 64, 40, seed=12345).circles
+    assert Level(64, 64, 40, seed=12345).circles != Level(64, 64, 40, seed=54321).circles
+    first = GameEngine(8, 8, num_circles=5).start_level(seed=99)
+    second = GameEngine(8, 8, num_circles=5).start_level(seed=99)
+    assert first.circles == second.circles
+    assert first.circle_mask == second.circle_mask
+
+
+def test_engine_seeds_are_reproducible():
+    first = GameEngine(5, 5, num_circles=3, rng=random.Random(8))
+    second = GameEngine(5, 5, num_circles=3, rng=random.Random(8))
+    for _ in range(10):
+        assert first.start_level().seed == second.start_level().seed
+        assert first.level.circles == second.level.circles
+        assert 0 <= first.level.seed < 1 << engine.SEED_BITS
+
+
+def test_simulate_produces_record_per_level():
+    game = GameEngine(4, 4, rng=random.Random(9))
+    records = engine.simulate(game, engine.perfect_player, 20)
+    assert len(records) == 20
+    assert all(record["level_result"] == "win" for record in records)
+    assert game.num_circles == 16
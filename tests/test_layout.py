@@ -0,0 +1,40 @@
+import pygame
+import pytest
+
+from src import consts, render
+
+HUD_RECTS = (
+    consts.GUIConsts.EXIT_BUTTON_RECT,
+    consts.GUIConsts.SCORE_LABEL_RECT,
+    consts.GUIConsts.RECORD_LABEL_RECT,
+)
+SIZES = (consts.GridConsts.MIN_SIZE, consts.GridConsts.EXPERT_SIZE, consts.GridConsts.MAX_SIZE)
+
+
+def test_hud_does_not_overlap_board():
+    window = pygame.Rect(0, 0, consts.GUIConsts.WIDTH, consts.GUIConsts.HEIGHT)
+    board = pygame.Rect(consts.GUIConsts.BOARD_RECT)
+    assert window.contains(board)
+    for rect in HUD_RECTS:
+        assert window.contains(rect)
+        assert not board.colliderect(rect)
+
+
+@pytest.mark.parametrize("size_x", SIZES)
+@pytest.mark.parametrize("size_y", SIZES)
+def test_no_cell_is_covered(size_x, size_y):
+    renderer = render.GridRenderer(size_x, size_y, pygame.Rect(consts.GUIConsts.BOARD_RECT))
+    hud = [pygame.Rect(rect) for rect in HUD_RECTS]
+    for y in range(size_y):
+        for x in range(size_x):
+            pos = renderer.cell_center(x, y)
+            assert renderer.cell_at(pos) == (x, y)
+            assert not any(rect.collidepoint(pos) for rect in hud)
+
+
+def test_clicks_on_hud_are_outside_board():
+    renderer = render.GridRenderer(
+        consts.GridConsts.MAX_SIZE, consts.GridConsts.MAX_SIZE, pygame.Rect(consts.GUIConsts.BOARD_RECT)
+    )
+    for rect in HUD_RECTS:
+        assert renderer.cell_at(pygame.Rect(rect).center) is None
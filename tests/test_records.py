@@ -0,0 +1,82 @@
+from src import records
+from src.records import HistoryRecord
+
+LEGACY = {
+    "datetime": "2025-04-15 12:08:35",
+    "grid_size": "3x3",
+    "num_circles": 2,
+    "circles": [[0, 1], [2, 2]],
+    "selected": [[2, 2], [0, 1]],
+    "score": 1,
+    "streak": 2,
+    "result": "win",
+}
+
+
+def fields(record: HistoryRecord) -> tuple:
+    """
+    Возвращает значения всех полей записи.
+
+    :param record: Запись истории игры.
+    :return: Кортеж значений в порядке __slots__.
+    """
+    return tuple(getattr(record, name) for name in HistoryRecord.__slots__)
+
+
+def test_clicks_round_trip():
+    clicks = [(0, 0, 0), (127, 2, 1), (127, 2, 1), (128, 1, 2), (70_000, 0, 2)]
+    data = records.pack_clicks(clicks, 3, 3)
+    assert records.unpack_clicks(data, 3, 3) == clicks
+
+
+def test_clicks_round_trip_on_large_grid():
+    clicks = [(5, 63, 63), (300, 0, 63), (2_000_000, 63, 0)]
+    data = records.pack_clicks(clicks, 64, 64)
+    assert records.unpack_clicks(data, 64, 64) == clicks
+
+
+def test_short_click_takes_two_bytes():
+    assert len(records.pack_clicks([(100, 1, 1)], 3, 3)) == 2
+    assert records.pack_clicks([], 3, 3) == b""
+    assert records.unpack_clicks(b"", 3, 3) == []
+
+
+def test_record_round_trip():
+    record = HistoryRecord.create(
+        "2026-01-02 03:04:05",
+        10,
+        7,
+        3,
+        [(9, 6), (0, 0), (4, 3)],
+        [(4, 3), (9, 6), (1, 1)],
+        score=5,
+        streak=0,
+        result="loss",
+        seed=2**32 - 1,
+        clicks=[(400, 4, 3), (900, 9, 6), (901, 9, 6), (1500, 1, 1)],
+        show_ms=500,
+    )
+    restored = HistoryRecord.from_dict(record.to_dict())
+    assert fields(restored) == fields(record)
+    assert restored.selected == [(4, 3), (9, 6), (1, 1)]
+    assert sorted(restored.circles) == [(0, 0), (4, 3), (9, 6)]
+    assert restored.click_stream == [(400, 4, 3), (900, 9, 6), (901, 9, 6), (1500, 1, 1)]
+    assert restored.show_ms == 500
+
+
+def test_legacy_list_format():
+    record = HistoryRecord.from_dict(LEGACY)
+    assert sorted(record.circles) == [(0, 1), (2, 2)]
+    assert record.selected == [(2, 2), (0, 1)]
+    assert record.seed is None
+    assert record.click_stream == []
+    assert record.show_ms is None
+    data = record.to_dict()
+    assert "seed" not in data and "clicks" not in data and "show_ms" not in data
+    assert fields(HistoryRecord.from_dict(data)) == fields(record)
+
+
+def test_legacy_record_without_streak():
+    data = dict(LEGACY)
+    del data["streak"]
+    assert HistoryRecord.from_dict(data).streak == 0
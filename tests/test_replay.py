@@ -0,0 +1,138 @@
+import random
+
+from src import engine, replay, storage
+from src.records import HistoryRecord
+from src.statistic import StatsManager
+
+LEGACY = {
+    "datetime": "2025-04-15 12:08:35",
+    "grid_size": "3x3",
+    "num_circles": 2,
+    "circles": [[0, 1], [2, 2]],
+    "selected": [[2, 2], [0, 1]],
+    "score": 1,
+    "streak": 2,
+    "result": "win",
+}
+
+
+def play_level(size_x: int, size_y: int, num_circles: int, seed: int, miss: bool) -> engine.Level:
+    """
+    Играет уровень: находит кружки по порядку, а при miss ошибается после первого из них.
+
+    :param size_x: Ширина поля.
+    :param size_y: Высота поля.
+    :param num_circles: Количество кружков.
+    :param seed: Начальное значение генератора уровня.
+    :param miss: Завершить уровень ошибкой.
+    :return: Завершенный уровень.
+    """
+    level = engine.Level(size_x, size_y, num_circles, seed)
+    clicks = list(level.circles)
+    if miss:
+        empty = next((x, y) for y in range(size_y) for x in range(size_x) if not level.is_circle(x, y))
+        clicks = clicks[:1] + [clicks[0], empty]
+    for index, (x, y) in enumerate(clicks):
+        level.click(x, y, 900 + 150 * index)
+    assert level.result == ("loss" if miss else "win")
+    return level
+
+
+def to_record(level: engine.Level, show_ms: int | None = 800) -> HistoryRecord:
+    """
+    Создает запись истории завершенного уровня, как ее сохраняет игра.
+
+    :param level: Завершенный уровень.
+    :param show_ms: Длительность показа кружков.
+    :return: Запись истории.
+    """
+    return HistoryRecord.create(
+        "2026-02-01 10:00:00",
+        level.size_x,
+        level.size_y,
+        len(level.circles),
+        level.circles,
+        level.selected_positions,
+        score=0,
+        streak=0,
+        result=level.result,
+        seed=level.seed,
+        clicks=level.clicks,
+        show_ms=show_ms,
+    )
+
+
+def make_session() -> list[HistoryRecord]:
+    """
+    Записывает несколько уровней разных размеров с выигрышами и проигрышами.
+
+    :return: Список записей.
+    """
+    rng = random.Random(11)
+    sizes = [(3, 3, 1), (4, 4, 3), (17, 5, 6), (64, 64, 20), (5, 7, 4)]
+    return [
+        to_record(play_level(size_x, size_y, circles, rng.getrandbits(32), miss=index % 2 == 1))
+        for index, (size_x, size_y, circles) in enumerate(sizes)
+    ]
+
+
+def test_replay_reproduces_recorded_levels():
+    session = make_session()
+    result = replay.replay_headless(session, repeat=2)
+    assert result["levels"] == 10
+    assert result["mismatches"] == 0
+    assert result["clicks"] == 2 * sum(len(record.click_stream) for record in session)
+    for record in session:
+        level = replay.replay_level(record)
+        assert level.circle_mask == record.circles_mask
+        assert level.selected_positions == record.selected
+
+
+def test_replay_detects_changed_level():
+    record = make_session()[1]
+    record.seed += 1
+    assert replay.replay_headless([record])["mismatches"] == 1
+
+
+def test_replay_writes_records_with_show_time(tmp_path):
+    path = str(tmp_path / "history.jsonl")
+    session = make_session()
+    stats = StatsManager(path)
+    replay.replay_headless(session, stats)
+    stats.close()
+    replayed = replay.load_session(path)
+    assert [record.show_ms for record in replayed] == [800] * len(session)
+    assert replay.replay_headless(replayed)["mismatches"] == 0
+
+
+def test_session_skips_old_records_and_replays_without_show_time(tmp_path):
+    path = str(tmp_path / "history.jsonl")
+    session = make_session()
+    # Запись без длительности показа, как до ее появления в истории
+    data = to_record(play_level(6, 6, 5, 7, miss=False)).to_dict()
+    del data["show_ms"]
+    without_show = HistoryRecord.from_dict(data)
+    assert without_show.show_ms is None
+    history_storage = storage.open_history(path)
+    legacy = HistoryRecord.from_dict(LEGACY)
+    history_storage.append_many([legacy, session[0], without_show, legacy])
+    history_storage.close()
+    loaded = replay.load_session(path)
+    assert [record.seed for record in loaded] == [session[0].seed, without_show.seed]
+    assert replay.replay_headless(loaded)["mismatches"] == 0
+    assert [record.seed for record in replay.load_session(path, levels=1)] == [without_show.seed]
+
+
+def test_replayer_counts_unfinished_level_as_mismatch():
+    session = make_session()
+    replayer = replay.Replayer(session)
+    record = replayer.next_record()
+    replayer.check(replay.replay_level(record), record)
+    record = replayer.next_record()
+    game = replayer.create_engine(record)
+    unfinished = game.start_level(record.seed)
+    time_ms, x, y = record.click_stream[0]
+    unfinished.click(x, y, time_ms)
+    replayer.check(unfinished, record)
+    assert (replayer.played, replayer.mismatches) == (2, 1)
+    assert replayer.summary() == f"Воспроизведено уровней: 2 из {len(session)}, несовпадений: 1"
@@ -0,0 +1,175 @@
+import json
+import os
+
+import pytest
+
+from src import storage
+from src.records import HistoryRecord
+from src.statistic import HistoryAggregates, StatsManager
+
+BACKENDS = ["history.json", "history.jsonl", "history.db"]
+
+
+def play(stats: StatsManager, count: int, start: int = 0) -> None:
+    """
+    Записывает count уровней с разными размерами поля, результатами и сериями.
+
+    :param stats: Менеджер статистики.
+    :param count: Количество уровней.
+    :param start: Номер первого уровня.
+    """
+    for index in range(start, start + count):
+        size_x, size_y = (3, 3) if index % 2 else (5, 4)
+        circles = [(index % size_x, 0), (0, 1 + index % (size_y - 1))]
+        result = "loss" if index % 3 == 0 else "win"
+        stats.record(size_x, size_y, len(circles), circles, circles, index, index % 7, result)
+
+
+def rebuilt(stats: StatsManager) -> dict:
+    """
+    Пересчитывает статистику полным просмотром истории.
+
+    :param stats: Менеджер статистики.
+    :return: Статистика в виде словаря (см. HistoryAggregates.to_dict).
+    """
+    return HistoryAggregates.from_history(stats.load_history()).to_dict()
+
+
+def cached(stats: StatsManager) -> dict:
+    """
+    Возвращает накопительную статистику менеджера после учета записей других процессов.
+
+    :param stats: Менеджер статистики.
+    :return: Статистика в виде словаря.
+    """
+    stats.merge_changes()
+    return stats.aggregates.to_dict()
+
+
+@pytest.fixture(params=BACKENDS)
+def history_path(request, tmp_path) -> str:
+    return str(tmp_path / request.param)
+
+
+def test_aggregates_follow_appends(history_path):
+    stats = StatsManager(history_path)
+    play(stats, 20)
+    assert cached(stats) == rebuilt(stats)
+    assert stats.get_record() == 6
+    assert stats.count_games(result="loss") == 7
+    assert stats.get_grid_size_stats()["3x3"]["games"] == 10
+    stats.close()
+
+
+def test_cache_is_trusted_on_restart(history_path, monkeypatch):
+    stats = StatsManager(history_path)
+    play(stats, 10)
+    stats.close()
+
+    def rebuild(self) -> None:
+        raise AssertionError("статистика пересчитана, хотя файл снимка актуален")
+
+    monkeypatch.setattr(StatsManager, "rebuild_aggregates", rebuild)
+    restarted = StatsManager(history_path)
+    assert cached(restarted) == rebuilt(restarted)
+    restarted.close()
+
+
+def test_aggregates_merge_other_process(history_path):
+    ours = StatsManager(history_path)
+    theirs = StatsManager(history_path)
+    play(ours, 5)
+    play(theirs, 7, start=5)
+    play(ours, 3, start=12)
+    assert cached(ours) == rebuilt(ours)
+    assert cached(theirs) == rebuilt(theirs)
+    assert ours.count_games() == 15
+    theirs.close()
+    ours.close()
+    restarted = StatsManager(history_path)
+    assert cached(restarted) == rebuilt(restarted)
+    restarted.close()
+
+
+def test_aggregates_rebuilt_after_other_process_rewrites(history_path):
+    ours = StatsManager(history_path)
+    play(ours, 6)
+    other = storage.open_history(history_path)
+    other.rewrite(other.load()[:2])
+    other.close()
+    assert ours.merge_changes() == 2
+    assert cached(ours) == rebuilt(ours)
+    ours.close()
+
+
+def test_aggregates_rebuilt_when_cache_deleted(history_path):
+    stats = StatsManager(history_path)
+    play(stats, 8)
+    stats.close()
+    os.remove(history_path + ".stats.json")
+    restarted = StatsManager(history_path)
+    assert restarted.count_games() == 8
+    assert cached(restarted) == rebuilt(restarted)
+    restarted.close()
+
+
+def test_stale_cache_is_rejected(history_path):
+    stats = StatsManager(history_path)
+    play(stats, 4)
+    stats.close()
+    # Запись мимо StatsManager (например, старой версией игры) меняет отпечаток хранилища
+    other = storage.open_history(history_path)
+    other.append(other.load()[0])
+    other.close()
+    with open(history_path + ".stats.json") as f:
+        data = json.load(f)
+    data["games"] = 999
+    with open(history_path + ".stats.json", "w") as f:
+        json.dump(data, f)
+    restarted = StatsManager(history_path)
+    assert restarted.count_games() == 5
+    assert cached(restarted) == rebuilt(restarted)
+    restarted.close()
+
+
+def test_corrupt_cache_is_rebuilt(history_path):
+    stats = StatsManager(history_path)
+    play(stats, 4)
+    stats.close()
+    with open(history_path + ".stats.json", "w") as f:
+        f.write('{"games": ')
+    restarted = StatsManager(history_path)
+    assert cached(restarted) == rebuilt(restarted)
+    restarted.close()
+
+
+def test_write_behind_aggregates_match_history(tmp_path):
+    path = str(tmp_path / "history.jsonl")
+    ours = StatsManager(path, storage.WriteBehindStorage(storage.JournalHistoryStorage(path), flush_interval=0.01))
+    theirs = StatsManager(path)
+    play(ours, 10)
+    play(theirs, 4, start=10)
+    play(ours, 3, start=14)
+    ours.storage.flush()
+    assert cached(ours) == rebuilt(ours)
+    ours.close()
+    restarted = StatsManager(path)
+    assert cached(restarted) == rebuilt(restarted)
+    assert restarted.count_games() == 17
+
+
+def test_save_history_compacts_and_rebuilds(history_path):
+    stats = StatsManager(history_path)
+    play(stats, 5)
+    stats.save_history()
+    assert cached(stats) == rebuilt(stats)
+    assert len(stats.load_history()) == 5
+    stats.close()
+
+
+def test_aggregates_from_grid_sizes_match_full_pass():
+    stats = HistoryAggregates()
+    for games, result in enumerate(["win", "loss", "win"], start=1):
+        stats.update(HistoryRecord.create("2026-01-01 00:00:00", 3, 3, 1, [(0, 0)], [], games, games, result))
+    assert HistoryAggregates.from_grid_sizes(stats.grid_sizes).to_dict() == stats.to_dict()
+    assert stats.average_circles == 1.0
@@ -0,0 +1,393 @@
+import json
+import os
+
+import pytest
+
+from src import statistic, storage
+from src.records import HistoryRecord
+
+BACKENDS = ["history.json", "history.jsonl", "history.db"]
+
+
+def make_record(index: int) -> HistoryRecord:
+    """
+    Создает запись истории, поля которой зависят от номера: размер поля, результат и серия чередуются.
+
+    :param index: Номер записи.
+    :return: Запись истории игры.
+    """
+    size_x, size_y = (3, 3) if index % 2 else (4, 5)
+    circles = [(index % size_x, 0), (0, 1 + index % (size_y - 1))]
+    return HistoryRecord.create(
+        f"2026-01-{1 + index % 28:02d} 12:00:00",
+        size_x,
+        size_y,
+        len(circles),
+        circles,
+        circles[::-1],
+        score=index,
+        streak=index % 5,
+        result="loss" if index % 3 == 0 else "win",
+        seed=index,
+        clicks=[(100 + index, *circles[1]), (250 + index, *circles[0])],
+        show_ms=800,
+    )
+
+
+def dicts(history) -> list[dict]:
+    """
+    Преобразует записи в словари для сравнения.
+
+    :param history: Записи истории игры.
+    :return: Список словарей (см. HistoryRecord.to_dict).
+    """
+    return [record.to_dict() for record in history]
+
+
+@pytest.fixture(params=BACKENDS)
+def history_path(request, tmp_path) -> str:
+    return str(tmp_path / request.param)
+
+
+@pytest.fixture
+def opened(history_path):
+    """
+    Открывает хранилища истории по одному пути и закрывает их после теста.
+    """
+    storages = []
+
+    def open_storage() -> storage.HistoryStorage:
+        history_storage = storage.open_history(history_path)
+        storages.append(history_storage)
+        return history_storage
+
+    yield open_storage
+    for history_storage in storages:
+        history_storage.close()
+
+
+# --- Чтение и запись ---
+def test_round_trip(opened):
+    history = [make_record(i) for i in range(5)]
+    writer = opened()
+    writer.append_many(history[:4])
+    writer.append(history[4])
+    assert dicts(opened().load()) == dicts(history)
+
+
+def test_missing_file_is_empty_history(opened):
+    history_storage = opened()
+    assert history_storage.load() == []
+    assert list(history_storage.iter_newest()) == []
+    assert history_storage.grid_size_stats() == {}
+
+
+def test_rewrite_replaces_history(opened):
+    history_storage = opened()
+    history_storage.append_many([make_record(i) for i in range(5)])
+    history_storage.rewrite([make_record(7)])
+    assert dicts(opened().load()) == dicts([make_record(7)])
+
+
+def test_iter_newest_filters_and_skips(opened):
+    history = [make_record(i) for i in range(40)]
+    history_storage = opened()
+    history_storage.append_many(history)
+    newest = history[::-1]
+    assert dicts(history_storage.iter_newest()) == dicts(newest)
+    expected = [record for record in newest if record.grid_size == "4x5" and record.result == "win"]
+    assert dicts(history_storage.iter_newest(grid_size="4x5", result="win", offset=3)) == dicts(expected[3:])
+    assert list(history_storage.iter_newest(grid_size="9x9")) == []
+
+
+def test_sqlite_iter_newest_reads_by_chunks(tmp_path):
+    history = [make_record(i) for i in range(10)]
+    database = storage.SQLiteHistoryStorage(str(tmp_path / "history.db"))
+    database.append_many(history)
+    expected = [record for record in history[::-1] if record.result == "loss"]
+    assert dicts(database.iter_newest(result="loss", offset=1, chunk_size=2)) == dicts(expected[1:])
+    database.close()
+
+
+def test_grid_size_stats_match_full_pass(opened):
+    history_storage = opened()
+    history_storage.append_many([make_record(i) for i in range(30)])
+    # Базовая реализация проходит по истории; SQLite считает то же самое запросом
+    assert history_storage.grid_size_stats() == storage.HistoryStorage.grid_size_stats(history_storage)
+    assert sum(stats["games"] for stats in history_storage.grid_size_stats().values()) == 30
+
+
+def test_fingerprint_changes_on_append(opened):
+    history_storage = opened()
+    history_storage.append(make_record(0))
+    before = history_storage.fingerprint()
+    history_storage.append(make_record(1))
+    assert history_storage.fingerprint() != before
+
+
+# --- Журнал ---
+def test_journal_skips_torn_line(tmp_path):
+    path = str(tmp_path / "history.jsonl")
+    journal = storage.JournalHistoryStorage(path)
+    journal.append_many([make_record(0), make_record(1)])
+    with open(path, "ab") as f:
+        f.write(b'{"datetime":"2026-01-0')
+    assert dicts(journal.load()) == dicts([make_record(0), make_record(1)])
+    assert dicts(journal.iter_newest()) == dicts([make_record(1), make_record(0)])
+    # Новая запись не склеивается с оборванной строкой
+    journal.append(make_record(2))
+    assert dicts(journal.load()) == dicts([make_record(0), make_record(1), make_record(2)])
+
+
+def test_journal_compact_drops_torn_line(tmp_path):
+    path = str(tmp_path / "history.jsonl")
+    journal = storage.JournalHistoryStorage(path)
+    journal.append_many([make_record(i) for i in range(3)])
+    with open(path, "ab") as f:
+        f.write(b'{"datetime"')
+    assert journal.compact() == 3
+    with open(path, encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    assert [json.loads(line) for line in lines] == dicts(make_record(i) for i in range(3))
+
+
+def test_compact_keeps_records(opened):
+    history = [make_record(i) for i in range(6)]
+    history_storage = opened()
+    history_storage.append_many(history)
+    assert history_storage.compact() == 6
+    assert dicts(opened().load()) == dicts(history)
+
+
+def test_journal_interval_policy_syncs_on_close(tmp_path, monkeypatch):
+    synced = []
+    monkeypatch.setattr(os, "fsync", lambda fd: synced.append(fd))
+    journal = storage.JournalHistoryStorage(str(tmp_path / "history.jsonl"), storage.FsyncPolicy.INTERVAL, 3600)
+    journal.append(make_record(0))
+    journal.append(make_record(1))
+    assert len(synced) == 1
+    journal.close()
+    assert len(synced) == 2
+
+
+def test_unknown_fsync_policy(tmp_path):
+    with pytest.raises(ValueError):
+        storage.JournalHistoryStorage(str(tmp_path / "history.jsonl"), fsync_policy="sometimes")
+
+
+# --- Перенос между форматами ---
+def test_migrate_json_to_journal(tmp_path):
+    history = [make_record(i) for i in range(5)]
+    json_path = str(tmp_path / "history.json")
+    storage.JsonHistoryStorage(json_path).rewrite(history)
+    journal_path = str(tmp_path / "history.jsonl")
+    assert storage.migrate_json_to_journal(json_path, journal_path) == 5
+    assert dicts(storage.JournalHistoryStorage(journal_path).load()) == dicts(history)
+
+
+@pytest.mark.parametrize("source", ["history.json", "history.jsonl"])
+def test_import_history_to_sqlite(tmp_path, source):
+    history = [make_record(i) for i in range(5)]
+    source_path = str(tmp_path / source)
+    storage.open_history(source_path).rewrite(history)
+    db_path = str(tmp_path / "history.db")
+    assert storage.import_history_to_sqlite(source_path, db_path) == 5
+    database = storage.SQLiteHistoryStorage(db_path)
+    assert dicts(database.load()) == dicts(history)
+    database.close()
+
+
+def test_sqlite_reads_legacy_list_positions(tmp_path):
+    database = storage.SQLiteHistoryStorage(str(tmp_path / "history.db"))
+    with database.connection:
+        database.connection.execute(
+            "INSERT INTO games (datetime, grid_size, num_circles, circles, selected, score, streak, result)"
+            " VALUES ('2025-04-15 12:08:35', '3x3', 2, '[[0, 1], [2, 2]]', '[[2, 2]]', 1, 2, 'win')"
+        )
+    record = database.load()[0]
+    assert sorted(record.circles) == [(0, 1), (2, 2)]
+    assert record.selected == [(2, 2)]
+    assert record.seed is None and record.show_ms is None
+    database.close()
+
+
+# --- Записи других процессов ---
+def test_changes_since_returns_only_foreign_records(opened):
+    ours, theirs = opened(), opened()
+    ours.append(make_record(0))
+    token = ours.end_token()
+    their_token = theirs.end_token()
+    ours.append(make_record(1))
+    theirs.append_many([make_record(2), make_record(3)])
+    ours.append(make_record(4))
+    changes, token = ours.changes_since(token)
+    assert dicts(changes) == dicts([make_record(2), make_record(3)])
+    assert ours.changes_since(token) == ([], token)
+    changes, _ = theirs.changes_since(their_token)
+    assert dicts(changes) == dicts([make_record(1), make_record(4)])
+
+
+def test_changes_since_after_rewrite_requests_reload(opened):
+    ours, theirs = opened(), opened()
+    ours.append_many([make_record(i) for i in range(3)])
+    token = ours.end_token()
+    theirs.rewrite([make_record(9)])
+    assert ours.changes_since(token) == (None, None)
+    assert ours.changes_since(None) == (None, None)
+
+
+def test_snapshot_returns_token_of_read_state(opened):
+    history_storage = opened()
+    history_storage.append_many([make_record(i) for i in range(3)])
+    count, token = history_storage.snapshot(lambda s: len(s.load()))
+    assert count == 3
+    opened().append(make_record(3))
+    changes, _ = history_storage.changes_since(token)
+    assert dicts(changes) == dicts([make_record(3)])
+
+
+# --- Атомарная запись и блокировка ---
+def test_atomic_write_replaces_file(tmp_path):
+    path = str(tmp_path / "data.json")
+    storage.atomic_write(path, lambda f: f.write("old"))
+    storage.atomic_write(path, lambda f: f.write("new"), sync=False)
+    with open(path) as f:
+        assert f.read() == "new"
+    assert os.listdir(tmp_path) == ["data.json"]
+
+
+def test_atomic_write_keeps_file_on_error(tmp_path):
+    path = str(tmp_path / "data.json")
+    storage.atomic_write(path, lambda f: f.write("old"))
+
+    def broken(f) -> None:
+        f.write("partial")
+        raise OSError("disk full")
+
+    with pytest.raises(OSError):
+        storage.atomic_write(path, broken)
+    with open(path) as f:
+        assert f.read() == "old"
+    assert os.listdir(tmp_path) == ["data.json"]
+
+
+def test_file_lock_is_shared_and_reentrant(tmp_path):
+    path = str(tmp_path / "history.jsonl")
+    lock = storage.file_lock(path)
+    assert storage.file_lock(os.path.join(str(tmp_path), ".", "history.jsonl")) is lock
+    with lock:
+        with lock:
+            pass
+    metrics = lock.metrics()
+    assert metrics["acquisitions"] == 1
+    assert metrics["contended"] == 0
+    assert os.path.exists(path + ".lock")
+
+
+def test_history_storage_is_abstract(tmp_path):
+    with pytest.raises(TypeError):
+        storage.HistoryStorage(str(tmp_path / "history.jsonl"))
+
+
+# --- Отложенная запись ---
+def test_write_behind_flushes_before_reading(tmp_path):
+    path = str(tmp_path / "history.jsonl")
+    writer = storage.WriteBehindStorage(storage.JournalHistoryStorage(path), flush_interval=10)
+    history = [make_record(i) for i in range(3)]
+    for record in history:
+        writer.append(record)
+    assert dicts(writer.load()) == dicts(history)
+    assert dicts(writer.iter_newest(offset=1)) == dicts(history[1::-1])
+    metrics = writer.metrics()
+    assert metrics["flushed_records"] == 3
+    assert metrics["queue_depth"] == 0
+    writer.close()
+
+
+def test_write_behind_close_saves_queue(tmp_path):
+    path = str(tmp_path / "history.db")
+    writer = storage.WriteBehindStorage(storage.SQLiteHistoryStorage(path), flush_interval=10)
+    writer.append_many([make_record(i) for i in range(4)])
+    writer.close()
+    writer.close()
+    database = storage.SQLiteHistoryStorage(path)
+    assert len(database.load()) == 4
+    database.close()
+
+
+def test_write_behind_submit_runs_after_queued_records(tmp_path):
+    inner = storage.JournalHistoryStorage(str(tmp_path / "history.jsonl"))
+    writer = storage.WriteBehindStorage(inner, flush_interval=10)
+    seen = []
+    writer.append_many([make_record(0), make_record(1)])
+    writer.submit(lambda: seen.append(len(inner.load())), key="count")
+    writer.append(make_record(2))
+    writer.submit(lambda: seen.append(len(inner.load())), key="count")
+    writer.flush()
+    # Из двух операций с одним ключом в пачке выполняется только последняя
+    assert seen == [3]
+    writer.close()
+
+
+def test_write_behind_retries_failed_batch(tmp_path, monkeypatch):
+    path = str(tmp_path / "history.jsonl")
+    inner = storage.JournalHistoryStorage(path)
+    append_many = inner.append_many
+    failures = [OSError("disk")]
+
+    def flaky(records) -> None:
+        if failures:
+            raise failures.pop()
+        append_many(records)
+
+    monkeypatch.setattr(inner, "append_many", flaky)
+    stats = statistic.StatsManager(path, storage.WriteBehindStorage(inner, flush_interval=0.01))
+    for i in range(5):
+        stats.record(3, 3, 1, [(0, 0)], [(0, 0)], i, i, "win")
+        stats.storage.flush()
+    metrics = stats.storage.metrics()
+    assert metrics["errors"] == 1
+    assert metrics["unsaved_records"] == 0
+    stats.close()
+    restarted = statistic.StatsManager(path)
+    assert len(restarted.load_history()) == 5
+    assert restarted.count_games() == 5
+
+
+def test_write_behind_reports_lost_records(tmp_path, monkeypatch):
+    path = str(tmp_path / "history.jsonl")
+    inner = storage.JournalHistoryStorage(path)
+
+    def broken(records) -> None:
+        raise OSError("disk")
+
+    stats = statistic.StatsManager(path, storage.WriteBehindStorage(inner, flush_interval=0.01))
+    monkeypatch.setattr(inner, "append_many", broken)
+    stats.record(3, 3, 1, [(0, 0)], [(0, 0)], 1, 1, "win")
+    stats.storage.flush()
+    assert stats.storage.metrics()["unsaved_records"] == 1
+    with pytest.raises(storage.HistoryWriteError):
+        stats.close()
+    # Снимок статистики, учитывающий несохраненную запись, не записан
+    assert statistic.StatsManager(path).count_games() == 0
+
+
+# --- Страницы истории ---
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_get_page_matches_history(tmp_path, backend):
+    path = str(tmp_path / backend)
+    history = [make_record(i) for i in range(30)]
+    history_storage = storage.open_history(path)
+    history_storage.append_many(history)
+    history_storage.close()
+    stats = statistic.StatsManager(path, recent_limit=8)
+    newest = history[::-1]
+    # Первая страница берется из окна последних игр, дальние - из хранилища
+    assert dicts(stats.get_page(0, 5)) == dicts(newest[:5])
+    assert dicts(stats.get_page(3, 5)) == dicts(newest[15:20])
+    assert dicts(stats.get_page(5, 5)) == dicts(newest[25:30])
+    assert stats.get_page(6, 5) == []
+    losses = [record for record in newest if record.grid_size == "3x3" and record.result == "loss"]
+    assert dicts(stats.get_page(1, 2, grid_size="3x3", result="loss")) == dicts(losses[2:4])
+    assert stats.count_games(grid_size="3x3", result="loss") == len(losses)
+    stats.close()